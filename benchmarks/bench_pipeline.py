@@ -0,0 +1,229 @@
+"""Reproducible benchmark of the capture -> detect -> store pipeline on synthetic scenes.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_pipeline [--resolutions 640x480 1280x720] [--frames 300]
+                                        [--scenes static noise] [--output results.json]
+
+For every (resolution, scene) pair the benchmark reports throughput, p50/p95/p99 latency
+of each stage, transient bytes allocated per frame and peak RSS, and writes everything
+as JSON so runs can be compared across commits and boards.
+"""
+import argparse
+import json
+import logging
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+from benchmarks.scenes import SCENES, make_scene
+from src.camera.background_models import BACKGROUND_MODELS
+from src.camera.object_detector import ObjectDetector
+from src.utils.storage import ImageStorage
+
+STAGES = ('capture', 'detect', 'store')
+
+
+def parse_resolution(value: str) -> Tuple[int, int]:
+    width, height = value.lower().split('x')
+    return int(width), int(height)
+
+
+def summarize(samples_ms: List[float]) -> Dict[str, float]:
+    """Percentile summary of latency samples in milliseconds."""
+    if not samples_ms:
+        return {'count': 0}
+    values = np.asarray(samples_ms)
+    return {
+        'count': int(values.size),
+        'mean_ms': float(values.mean()),
+        'p50_ms': float(np.percentile(values, 50)),
+        'p95_ms': float(np.percentile(values, 95)),
+        'p99_ms': float(np.percentile(values, 99)),
+        'max_ms': float(values.max()),
+    }
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024.0 * 1024.0) if sys.platform == 'darwin' else rss / 1024.0
+
+
+def run_pipeline(scene_name: str, resolution: Tuple[int, int], frames: int, warmup: int,
+                 detector_kwargs: dict, storage_dir: Path, trace_allocations: bool) -> dict:
+    """
+    Run one scene through capture, detection and storage.
+
+    Args:
+        scene_name (str): Name from benchmarks.scenes.SCENES
+        resolution (tuple): Frame size as (width, height)
+        frames (int): Number of measured frames
+        warmup (int): Frames processed before measuring (background model convergence)
+        detector_kwargs (dict): Keyword arguments for ObjectDetector
+        storage_dir (Path): Scratch directory for saved captures
+        trace_allocations (bool): Measure allocations per stage instead of latency (tracemalloc
+            slows every allocation, so timings from this mode are not reported)
+
+    Returns:
+        dict: Stage latencies, throughput and allocation figures
+    """
+    scene = make_scene(scene_name, resolution)
+    detector = ObjectDetector(**detector_kwargs)
+    storage = ImageStorage(base_path=storage_dir)
+    storage.min_save_interval = 0
+
+    samples = {stage: [] for stage in STAGES}
+    allocated = {stage: [] for stage in STAGES}
+    detections = 0
+    frame_iter = scene.frames(warmup + frames)
+
+    for _ in range(warmup):
+        detector.detect_objects(next(frame_iter))
+
+    if trace_allocations:
+        tracemalloc.start()
+
+    def traced(stage, function, *args):
+        # Peak bytes allocated while the stage runs, above what was live before it
+        if not trace_allocations:
+            return function(*args)
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        result = function(*args)
+        allocated[stage].append(tracemalloc.get_traced_memory()[1] - baseline)
+        return result
+
+    start = time.perf_counter()
+    for _ in range(frames):
+        t0 = time.perf_counter()
+        frame = traced('capture', next, frame_iter)
+        t1 = time.perf_counter()
+        objects, _ = traced('detect', detector.detect_objects, frame)
+        t2 = time.perf_counter()
+        samples['capture'].append((t1 - t0) * 1000.0)
+        samples['detect'].append((t2 - t1) * 1000.0)
+
+        if objects:
+            detections += len(objects)
+            t3 = time.perf_counter()
+            traced('store', storage.save_detected_object, frame, objects[0])
+            samples['store'].append((time.perf_counter() - t3) * 1000.0)
+    elapsed = time.perf_counter() - start
+
+    if trace_allocations:
+        tracemalloc.stop()
+    storage.close()
+
+    if trace_allocations:
+        per_frame = np.sum([allocated['capture'], allocated['detect']], axis=0)
+        return {
+            'alloc_bytes_per_frame_mean': float(np.mean(per_frame)),
+            'alloc_bytes_per_frame_max': int(np.max(per_frame)),
+            'alloc_bytes_per_stage_max': {stage: int(max(values)) for stage, values in allocated.items() if values},
+        }
+    return {
+        'frames': frames,
+        'detections': detections,
+        'throughput_fps': frames / elapsed if elapsed > 0 else 0.0,
+        'stages': {stage: summarize(values) for stage, values in samples.items()},
+    }
+
+
+def environment_info() -> dict:
+    """Describe the machine and revision the benchmark ran on."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.now().isoformat(),
+        'machine': platform.machine(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'opencv': cv2.__version__,
+        'numpy': np.__version__,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the capture -> detect -> store pipeline')
+    parser.add_argument('--resolutions', nargs='+', default=['640x480', '1280x720'],
+                        help='Frame sizes as WIDTHxHEIGHT')
+    parser.add_argument('--scenes', nargs='+', default=sorted(SCENES), choices=sorted(SCENES))
+    parser.add_argument('--frames', type=int, default=300, help='Measured frames per run')
+    parser.add_argument('--warmup', type=int, default=30, help='Unmeasured frames per run')
+    parser.add_argument('--scale', type=float, default=1.0, help='Detection scale')
+    parser.add_argument('--backend', default='running_average', choices=sorted(BACKGROUND_MODELS))
+    parser.add_argument('--extraction', default='contours', choices=['contours', 'components'],
+                        help='Bounding box extraction method')
+    parser.add_argument('--no-allocations', action='store_true',
+                        help='Skip the (slower) allocation-tracing pass')
+    parser.add_argument('--max-detect-alloc', type=int, default=None, metavar='BYTES',
+                        help='Fail if the detect stage allocates more than this per frame in steady '
+                             'state (e.g. 16384: no frame-sized buffers)')
+    parser.add_argument('--output', type=Path, help='Write results as JSON to this file')
+    args = parser.parse_args()
+    if args.max_detect_alloc is not None and args.no_allocations:
+        parser.error("--max-detect-alloc needs the allocation-tracing pass")
+    logging.basicConfig(level=logging.WARNING)
+    for name in ('ObjectDetector', 'src.utils.storage'):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    # Boxes only, as in the service; drawing is left to the preview window
+    detector_kwargs = {'detection_scale': args.scale, 'background_model': args.backend,
+                       'extraction': args.extraction, 'render': False}
+    runs = []
+    with tempfile.TemporaryDirectory(prefix='animals-bench-') as scratch:
+        for resolution_spec in args.resolutions:
+            resolution = parse_resolution(resolution_spec)
+            for scene_name in args.scenes:
+                run_dir = Path(scratch) / f"{resolution_spec}-{scene_name}"
+                result = run_pipeline(scene_name, resolution, args.frames, args.warmup,
+                                      detector_kwargs, run_dir, trace_allocations=False)
+                if not args.no_allocations:
+                    result.update(run_pipeline(scene_name, resolution, min(args.frames, 50), args.warmup,
+                                               detector_kwargs, run_dir, trace_allocations=True))
+                result.update({'resolution': resolution_spec, 'scene': scene_name})
+                runs.append(result)
+
+                stages = result['stages']
+                print(f"{resolution_spec:>10} {scene_name:<18} {result['throughput_fps']:8.1f} fps  "
+                      + "  ".join(f"{stage} p50/p99 {stages[stage].get('p50_ms', 0):.2f}/"
+                                  f"{stages[stage].get('p99_ms', 0):.2f} ms" for stage in STAGES))
+
+    report = {
+        'environment': environment_info(),
+        'config': dict(detector_kwargs, frames=args.frames, warmup=args.warmup),
+        'peak_rss_mb': peak_rss_mb(),
+        'runs': runs,
+    }
+    print(f"Peak RSS: {report['peak_rss_mb']:.1f} MB")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.max_detect_alloc is not None:
+        failed = [run for run in runs if run['alloc_bytes_per_stage_max']['detect'] > args.max_detect_alloc]
+        for run in failed:
+            print(f"FAIL {run['resolution']} {run['scene']}: detect allocated "
+                  f"{run['alloc_bytes_per_stage_max']['detect']} bytes in one frame "
+                  f"(limit {args.max_detect_alloc})")
+        if failed:
+            sys.exit(1)
+        print(f"Detect stage stayed below {args.max_detect_alloc} bytes allocated per frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Compare background-subtraction backends on the same recorded clip.
+
+Usage (from the repository root):
+    python -m benchmarks.compare_backends clip.mp4 [--max-frames 600] [--scale 0.5] [--json out.json]
+"""
+import argparse
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+from src.camera.background_models import BACKGROUND_MODELS
+from src.camera.object_detector import ObjectDetector
+
+
+def load_frames(path: Path, max_frames: int) -> List[np.ndarray]:
+    """Decode up to max_frames frames so decoding cost is excluded from the comparison."""
+    capture = cv2.VideoCapture(str(path))
+    frames = []
+    while len(frames) < max_frames:
+        success, frame = capture.read()
+        if not success:
+            break
+        frames.append(frame)
+    capture.release()
+    return frames
+
+
+def compare_backends(frames: List[np.ndarray], backends: List[str], scale: float = 1.0) -> Dict[str, dict]:
+    """
+    Run every backend over the same frames.
+
+    Args:
+        frames (list): Decoded frames
+        backends (list): Background model names
+        scale (float): Detection scale passed to ObjectDetector
+
+    Returns:
+        dict: Per-backend ms/frame, total detections and frames with detections
+    """
+    results = {}
+    for name in backends:
+        detector = ObjectDetector(detection_scale=scale, background_model=name)
+        detections = 0
+        active_frames = 0
+        start = time.perf_counter()
+        for frame in frames:
+            objects, _ = detector.detect_objects(frame)
+            detections += len(objects)
+            active_frames += 1 if objects else 0
+        elapsed = time.perf_counter() - start
+        results[name] = {
+            'ms_per_frame': elapsed * 1000.0 / max(1, len(frames)),
+            'detections': detections,
+            'frames_with_detections': active_frames,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare background-subtraction backends')
+    parser.add_argument('clip', type=Path, help='Recorded video clip')
+    parser.add_argument('--backends', nargs='+', default=sorted(BACKGROUND_MODELS),
+                        choices=sorted(BACKGROUND_MODELS), help='Backends to compare')
+    parser.add_argument('--max-frames', type=int, default=600, help='Number of frames to use')
+    parser.add_argument('--scale', type=float, default=1.0, help='Detection scale')
+    parser.add_argument('--json', type=Path, help='Write results as JSON to this file')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger('ObjectDetector').setLevel(logging.WARNING)
+
+    frames = load_frames(args.clip, args.max_frames)
+    if not frames:
+        raise SystemExit(f"No frames could be read from {args.clip}")
+
+    results = compare_backends(frames, args.backends, args.scale)
+
+    print(f"{len(frames)} frames from {args.clip} at scale {args.scale}")
+    print(f"{'backend':<18}{'ms/frame':>10}{'detections':>12}{'active frames':>15}")
+    for name, result in results.items():
+        print(f"{name:<18}{result['ms_per_frame']:>10.2f}{result['detections']:>12}"
+              f"{result['frames_with_detections']:>15}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'clip': str(args.clip), 'frames': len(frames), 'scale': args.scale,
+                       'results': results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,69 +1,353 @@
 import argparse
 import logging
+import signal
+import sqlite3
 from pathlib import Path
 import cv2
 import time
 
-from src.camera.camera_handler import CameraHandler
-from src.camera.object_detector import ObjectDetector
+from src.camera.frame_buffer import FrameRingBuffer
+from src.camera.pipeline import (apply_detection_settings, build_camera, build_classifier, build_detector,
+                                 build_governor, build_roi, configure_opencv)
+from src.camera.supervisor import CameraSupervisor
+from src.camera.tracker import ObjectTracker, TrackEvent
+from src.utils.clip_recorder import EventClipRecorder
+from src.utils.config_loader import AppConfig, ConfigError, ConfigLoader, ConfigWatcher
+from src.utils.metrics import (MetricsServer, instrument_cameras, instrument_governor, instrument_pipeline,
+                               instrument_storage, instrument_uploader)
 from src.utils.storage import ImageStorage
+from src.utils.upload_scheduler import UploadScheduler
+from src.utils.uploader import S3Uploader
 
 def parse_args():
     parser = argparse.ArgumentParser(description='Animal Detection Service')
     parser.add_argument('--no-ui', action='store_true', 
                        help='Run without UI display (headless mode)')
-    parser.add_argument('--config', type=Path, default=Path('config.json'),
-                       help='Path to configuration file')
+    parser.add_argument('--config', type=Path, default=None,
+                       help='Path to the YAML configuration file (built-in defaults if omitted); '
+                            'reloaded on SIGHUP or when it changes')
+    parser.add_argument('--source', default=None,
+                       help='Frame source: camera index, video file, image directory or "synthetic"')
+    parser.add_argument('--fast', action='store_true',
+                       help='Process recorded sources as fast as possible instead of in real time')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                       help='Serve Prometheus metrics on this local port (overrides performance.metrics_port)')
+    parser.add_argument('--s3-bucket', default=None,
+                       help='Upload captures and clips to this S3 bucket (overrides aws.bucket)')
+    parser.add_argument('--s3-endpoint', default=None,
+                       help='Custom S3-compatible endpoint URL (e.g. a local test server)')
+    parser.add_argument('--upload-interval', type=float, default=None,
+                       help='Seconds between upload windows, 0 uploads continuously (overrides aws.upload_interval)')
+    parser.add_argument('--upload-max-bps', type=float, default=None,
+                       help='Average upload rate cap in bytes per second')
+    parser.add_argument('--upload-offpeak', default=None,
+                       help='Daily window (e.g. 01:00-05:00) for full images and clips; '
+                            'only thumbnails are uploaded outside it')
+    parser.add_argument('--clips', action='store_true',
+                       help='Record video clips of events with pre-roll and post-roll')
     return parser.parse_args()
 
+def install_shutdown_handler():
+    """Turn SIGTERM (systemctl stop/restart) into KeyboardInterrupt so shutdown flushes pending captures."""
+    def terminate(signum, frame):
+        # A second SIGTERM must not interrupt the cleanup
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, terminate)
+
+def start_config_watcher(args):
+    """Watch the configuration file (SIGHUP or file change); without one, SIGHUP is only logged."""
+    if args.config is not None:
+        watcher = ConfigWatcher(args.config)
+        watcher.start()
+        return watcher
+    # SIGHUP's default action would terminate the service on `systemctl reload`
+    logger = logging.getLogger(__name__)
+    signal.signal(signal.SIGHUP,
+                  lambda signum, frame: logger.warning("Reload requested, but no --config file to reload"))
+    return None
+
+def load_config(args) -> AppConfig:
+    """Read the configuration file (or defaults) and apply command-line overrides."""
+    config = ConfigLoader(args.config).load() if args.config is not None else AppConfig()
+    config = apply_overrides(config, args)
+    # Zones that exclude the whole frame would otherwise only fail on the first frame
+    for camera in config.camera_list():
+        build_roi(config.detection, (camera.height, camera.width))
+    return config
+
+def apply_overrides(config: AppConfig, args) -> AppConfig:
+    """Let explicit command-line options win over the configuration file."""
+    if args.source is not None:
+        if config.cameras:
+            raise ConfigError("--source cannot be combined with a cameras list")
+        config.camera.source = args.source
+    if args.fast:
+        # Offline sources must not lose frames when processing as fast as possible
+        config.performance.drop_policy = FrameRingBuffer.BLOCK
+    if args.metrics_port is not None:
+        config.performance.metrics_port = args.metrics_port
+    if args.s3_bucket:
+        config.upload.enabled = True
+        config.upload.bucket = args.s3_bucket
+    if args.s3_endpoint:
+        config.upload.endpoint_url = args.s3_endpoint
+    if args.upload_interval is not None:
+        config.upload.upload_interval = args.upload_interval
+    if args.upload_max_bps is not None:
+        config.upload.max_bytes_per_second = args.upload_max_bps
+    if args.upload_offpeak is not None:
+        config.upload.offpeak_window = args.upload_offpeak
+    if args.clips:
+        config.storage.clips = True
+    config.upload.validate()
+    config.performance.validate()
+    return config
+
+def apply_reloadable(config: AppConfig, detector, storage, scheduler, classifier=None):
+    """Apply the settings that can change without reopening the camera or re-learning the background."""
+    apply_detection_settings(config.detection, detector, classifier)
+    apply_storage_settings(config, storage, scheduler)
+
+def apply_storage_settings(config: AppConfig, storage, scheduler):
+    """Apply reloadable save rate limits, eviction threshold and upload schedule."""
+    storage.rate_limiter.interval = config.storage.min_save_interval
+    storage.rate_limiter.burst = config.storage.save_burst
+    storage.cleanup_threshold = config.storage.cleanup_threshold
+    if scheduler is not None:
+        scheduler.configure(config.upload.upload_interval, config.upload.max_bytes_per_second,
+                            config.upload.offpeak_window)
+
+def poll_reload(watcher, config: AppConfig, args):
+    """
+    Return the configuration in effect after a reload if the watcher has a valid one, else None.
+
+    Settings that need a restart keep their running values, so later reloads are compared
+    against what the pipeline actually uses.
+    """
+    reloaded = watcher.poll() if watcher is not None else None
+    if reloaded is None:
+        return None
+    logger = logging.getLogger(__name__)
+    try:
+        reloaded = apply_overrides(reloaded, args)
+    except ConfigError as e:
+        logger.error(f"Configuration reload rejected, keeping current settings: {e}")
+        return None
+    pending = config.restart_required(reloaded)
+    if pending:
+        logger.warning(f"Restart required to apply: {', '.join(pending)}")
+    return config.with_reloaded(reloaded)
+
+def build_storage(config: AppConfig):
+    """
+    Create the storage backend and, if uploads are enabled, its uploader and scheduler.
+
+    Raises:
+        ConfigError: If the storage directory or its databases cannot be created
+    """
+    uploader = None
+    scheduler = None
+    try:
+        if config.upload.enabled:
+            scheduler = UploadScheduler(config.upload.upload_interval, config.upload.max_bytes_per_second,
+                                        config.upload.offpeak_window)
+            uploader = S3Uploader(config.upload.bucket, Path(config.storage.base_path) / "uploads.db",
+                                  region=config.upload.region, prefix=config.upload.prefix,
+                                  endpoint_url=config.upload.endpoint_url, workers=config.upload.workers,
+                                  scheduler=scheduler)
+        storage = ImageStorage(config.storage.base_path, config.storage.max_storage_gb, async_mode=True,
+                               queue_size=config.performance.storage_queue_size,
+                               workers=config.performance.storage_workers,
+                               min_save_interval=config.storage.min_save_interval,
+                               save_burst=config.storage.save_burst,
+                               retention_policy=config.storage.retention_policy,
+                               cleanup_threshold=config.storage.cleanup_threshold, uploader=uploader,
+                               thumbnail_width=config.storage.thumbnail_width)
+    except (OSError, sqlite3.Error) as e:
+        raise ConfigError(f"Cannot set up storage in {config.storage.base_path}: {e}") from e
+    if uploader is not None:
+        uploader.start()
+    return storage, uploader, scheduler
+
+def run_cameras(args, config: AppConfig, storage: ImageStorage, uploader=None, scheduler=None, watcher=None):
+    """Run one capture-and-detect process per configured camera (headless), sharing one storage."""
+    logger = logging.getLogger(__name__)
+    supervisor = CameraSupervisor(config, storage, realtime=not args.fast)
+    
+    metrics_server = None
+    if config.performance.metrics_port is not None:
+        instrument_cameras(supervisor)
+        instrument_storage(storage)
+        if uploader is not None:
+            instrument_uploader(uploader)
+        metrics_server = MetricsServer(config.performance.metrics_port)
+        metrics_server.start()
+    
+    logger.info(f"Starting {len(supervisor.workers)} camera workers")
+    supervisor.start()
+    try:
+        while supervisor.running:
+            reloaded = poll_reload(watcher, config, args)
+            if reloaded is not None:
+                apply_storage_settings(reloaded, storage, scheduler)
+                supervisor.reload(reloaded.detection)
+                config = reloaded
+            # Save finished tracks and restart failed workers
+            supervisor.poll(timeout=0.5)
+        logger.info("All frame sources finished")
+    except KeyboardInterrupt:
+        logger.info("Shutting down...")
+    finally:
+        supervisor.stop(timeout=30.0)
+        for name, stats in supervisor.stats().items():
+            logger.info(f"Camera {name}: frames captured: {stats.get('captured', 0)}, "
+                        f"dropped: {stats.get('dropped', 0)}, restarts: {stats['restarts']}")
+        if watcher is not None:
+            watcher.stop()
+        storage.flush(timeout=10.0)
+        if uploader is not None:
+            uploader.stop()
+        storage.close(timeout=10.0)
+        if metrics_server is not None:
+            metrics_server.stop()
+        logger.info("Cleanup complete")
+
 def main():
     args = parse_args()
     logging.basicConfig(level=logging.INFO)
     logger = logging.getLogger(__name__)
+    install_shutdown_handler()
+    # Hot reload of thresholds and rate limits, handled before the camera is opened
+    watcher = start_config_watcher(args)
+    try:
+        config = load_config(args)
+        configure_opencv(config.performance)
+        storage, uploader, scheduler = build_storage(config)
+    except ConfigError as e:
+        logger.error(f"Invalid configuration: {e}")
+        if watcher is not None:
+            watcher.stop()
+        return
+    
+    cameras = config.camera_list()
+    if len(cameras) > 1:
+        if not args.no_ui:
+            logger.warning("The preview window needs a single camera, running headless")
+        run_cameras(args, config, storage, uploader, scheduler, watcher)
+        return
     
     # Initialize components
-    camera = CameraHandler()
-    detector = ObjectDetector()
-    storage = ImageStorage()
+    camera = build_camera(cameras[0], config.performance, realtime=not args.fast)
+    detector = build_detector(config.detection, config.performance)
+    tracker = ObjectTracker()
+    # Optional second stage: classify motion crops of tracked objects only
+    classifier = build_classifier(config.detection)
+    # Paces the headless loop: target rate, quiet-period rate and CPU temperature/load limits
+    governor = build_governor(config.performance, realtime=not args.fast)
+    recorder = None
+    if config.storage.clips:
+        recorder = EventClipRecorder(storage.base_path, index=storage.index, on_saved=storage.register_clip)
+    
+    metrics_server = None
+    if config.performance.metrics_port is not None:
+        instrument_pipeline(camera, detector, storage, classifier=classifier)
+        instrument_governor(governor)
+        if uploader is not None:
+            instrument_uploader(uploader)
+        metrics_server = MetricsServer(config.performance.metrics_port)
+        metrics_server.start()
     
     # Initialize camera
     if not camera.initialize():
         logger.error("Failed to initialize camera")
+        if watcher is not None:
+            watcher.stop()
         return
+    camera.start_capture()
+    
+    def save_track(track):
+        # With a classifier, only tracks reaching detection.confidence_threshold are kept
+        if classifier is not None and not classifier.accepts(track):
+            logger.info(f"Discarding track {track.track_id}: best label {track.label} ({track.confidence:.2f})")
+            return
+        storage.save_track(track)
     
+    # Headless real-time loops run at the governor's rate: newest frames, capped decoding
+    paced = args.no_ui and not args.fast
     logger.info("Starting detection loop")
     try:
         while True:
-            # Capture frame
-            success, frame = camera.capture_frame()
+            # Apply configuration changes between frames
+            reloaded = poll_reload(watcher, config, args)
+            if reloaded is not None:
+                apply_reloadable(reloaded, detector, storage, scheduler, classifier)
+                config = reloaded
+            
+            # Take the next frame from the capture thread
+            success, frame = camera.next(timeout=1.0, newest=paced and governor.limited)
             if not success:
-                logger.error("Failed to capture frame")
+                if camera.finished:
+                    logger.info("End of frame source reached")
+                    break
+                logger.error("No frame received from camera")
                 continue
             
-            # Detect objects
-            objects, processed_frame = detector.detect_objects(frame)
+            # Detect objects (boxes only, nothing is drawn on the frame)
+            start = time.perf_counter()
+            objects, _ = detector.detect_objects(frame)
+            motion = bool(objects)
+            # Motion and detector load decide how many frames the camera decodes
+            camera.report(motion, time.perf_counter() - start)
             
-            # Save detected objects
-            for bbox in objects:
-                storage.save_detected_object(frame, bbox)
+            # Follow objects across frames and save each one once, when its track ends
+            events = tracker.update(objects, frame)
+            if classifier is not None:
+                classifier.update(frame, [event.track for event in events if event.kind != TrackEvent.END])
+            for event in events:
+                if event.kind == TrackEvent.END:
+                    save_track(event.track)
+                elif recorder is not None:
+                    recorder.trigger(event.track.bbox)
+            if recorder is not None:
+                recorder.add_frame(frame)
             
             # Display if UI is enabled
             if not args.no_ui:
-                # Add debug information
-                display_frame = detector.draw_debug_info(processed_frame, objects)
+                # Storage has taken its own copy, so annotate the capture buffer in place
+                display_frame = detector.draw_detections(frame, objects)
+                display_frame = detector.draw_debug_info(display_frame, objects, in_place=True)
                 cv2.imshow('Animal Detection', display_frame)
                 
                 # Check for quit command
                 if cv2.waitKey(1) & 0xFF == ord('q'):
                     break
             else:
-                # Small sleep to prevent CPU overuse in headless mode
-                time.sleep(0.01)
+                # Wait until the next frame is due at the current rate
+                governor.pace(motion, time.perf_counter() - start)
+                if paced:
+                    camera.limit_rate(governor.capture_fps)
                 
     except KeyboardInterrupt:
         logger.info("Shutting down...")
     finally:
+        stats = camera.stats()
+        logger.info(f"Frames captured: {stats['captured']}, dropped: {stats['dropped']}, "
+                    f"skipped: {stats['skipped']}")
         camera.release()
+        if watcher is not None:
+            watcher.stop()
+        for event in tracker.finish():
+            save_track(event.track)
+        if recorder is not None:
+            # Wait for the clip writer: it adds clips to the index closed below
+            recorder.close()
+        storage.flush(timeout=10.0)
+        if uploader is not None:
+            uploader.stop()
+        storage.close(timeout=10.0)
+        if metrics_server is not None:
+            metrics_server.stop()
         if not args.no_ui:
             cv2.destroyAllWindows()
         logger.info("Cleanup complete")
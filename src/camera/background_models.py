@@ -0,0 +1,204 @@
+import cv2
+import numpy as np
+from typing import Dict, Optional, Type
+
+from src.camera.frame_buffer import ScratchBuffers
+
+
+class BackgroundModel:
+    """Base class for background-subtraction backends used by ObjectDetector.
+
+    A backend receives the preprocessed (grayscale, blurred) frame and returns a binary
+    foreground mask (0/255, uint8), or None while it is still building its initial model.
+    The mask is a scratch buffer owned by the backend and overwritten by the next call.
+    """
+
+    name = 'base'
+    fast_adaptation = False
+
+    def set_fast_adaptation(self, enabled: bool):
+        """Learn the background much faster while enabled, e.g. after a global illumination change."""
+        self.fast_adaptation = enabled
+
+    def apply(self, frame: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Update the model with a frame and compute its foreground mask.
+
+        Args:
+            frame (np.ndarray): Preprocessed grayscale frame
+
+        Returns:
+            np.ndarray: Foreground mask, or None if the model is not initialized yet
+        """
+        raise NotImplementedError
+
+    def reset(self):
+        """Forget the learned background."""
+        raise NotImplementedError
+
+
+class RunningAverageModel(BackgroundModel):
+    """Exponential running average of past frames (cv2.accumulateWeighted)."""
+
+    name = 'running_average'
+
+    def __init__(self, alpha: float = 0.2, threshold: int = 30, fast_alpha: float = 0.6):
+        """
+        Args:
+            alpha (float): Weight of the new frame when updating the average
+            threshold (int): Minimum absolute difference to count a pixel as foreground
+            fast_alpha (float): Weight of the new frame while fast adaptation is enabled
+        """
+        self.alpha = alpha
+        self.fast_alpha = fast_alpha
+        self.threshold = threshold
+        self.background = None
+        self._scratch = ScratchBuffers()
+
+    def apply(self, frame: np.ndarray) -> Optional[np.ndarray]:
+        if self.background is None or self.background.shape != frame.shape:
+            self.background = frame.astype(np.float32)
+            return None
+
+        average = cv2.convertScaleAbs(self.background, dst=self._scratch.get('average', frame.shape))
+        frame_delta = cv2.absdiff(average, frame, dst=self._scratch.get('delta', frame.shape))
+        mask = cv2.threshold(frame_delta, self.threshold, 255, cv2.THRESH_BINARY,
+                             dst=self._scratch.get('mask', frame.shape))[1]
+        alpha = self.fast_alpha if self.fast_adaptation else self.alpha
+        # accumulateWeighted takes the 8-bit frame directly, no float copy needed
+        cv2.accumulateWeighted(frame, self.background, alpha)
+        return mask
+
+    def reset(self):
+        self.background = None
+
+
+class FrameDifferenceModel(BackgroundModel):
+    """Cheapest backend: absolute difference against the previous frame only."""
+
+    name = 'frame_difference'
+
+    def __init__(self, threshold: int = 30):
+        """
+        Args:
+            threshold (int): Minimum absolute difference to count a pixel as foreground
+        """
+        self.threshold = threshold
+        self.previous = None
+        self._scratch = ScratchBuffers()
+
+    def apply(self, frame: np.ndarray) -> Optional[np.ndarray]:
+        if self.previous is None or self.previous.shape != frame.shape:
+            self.previous = frame.copy()
+            return None
+
+        frame_delta = cv2.absdiff(self.previous, frame, dst=self._scratch.get('delta', frame.shape))
+        np.copyto(self.previous, frame)
+        return cv2.threshold(frame_delta, self.threshold, 255, cv2.THRESH_BINARY, dst=frame_delta)[1]
+
+    def reset(self):
+        self.previous = None
+
+
+class _OpenCVSubtractorModel(BackgroundModel):
+    """Shared logic for OpenCV's BackgroundSubtractor implementations."""
+
+    def __init__(self, learning_rate: float = -1, detect_shadows: bool = False,
+                 fast_learning_rate: float = 0.5):
+        self.learning_rate = learning_rate
+        self.fast_learning_rate = fast_learning_rate
+        self.detect_shadows = detect_shadows
+        self.subtractor = self._create()
+        self._initialized = False
+        self._scratch = ScratchBuffers()
+
+    def _create(self):
+        raise NotImplementedError
+
+    def apply(self, frame: np.ndarray) -> Optional[np.ndarray]:
+        learning_rate = self.fast_learning_rate if self.fast_adaptation else self.learning_rate
+        mask = self.subtractor.apply(frame, fgmask=self._scratch.get('mask', frame.shape),
+                                     learningRate=learning_rate)
+        if not self._initialized:
+            self._initialized = True
+            return None
+        if self.detect_shadows:
+            # Shadows are marked as 127; keep only confident foreground
+            mask = cv2.threshold(mask, 200, 255, cv2.THRESH_BINARY, dst=mask)[1]
+        return mask
+
+    def reset(self):
+        self.subtractor = self._create()
+        self._initialized = False
+
+
+class MOG2Model(_OpenCVSubtractorModel):
+    """Gaussian mixture background model (cv2.createBackgroundSubtractorMOG2)."""
+
+    name = 'mog2'
+
+    def __init__(self, history: int = 500, var_threshold: float = 16,
+                 detect_shadows: bool = False, learning_rate: float = -1, fast_learning_rate: float = 0.5):
+        """
+        Args:
+            history (int): Number of frames that affect the model
+            var_threshold (float): Squared Mahalanobis distance threshold for foreground
+            detect_shadows (bool): Detect shadows (slower) and exclude them from the mask
+            learning_rate (float): Model update rate, -1 for automatic
+            fast_learning_rate (float): Update rate while fast adaptation is enabled
+        """
+        self.history = history
+        self.var_threshold = var_threshold
+        super().__init__(learning_rate, detect_shadows, fast_learning_rate)
+
+    def _create(self):
+        return cv2.createBackgroundSubtractorMOG2(self.history, self.var_threshold, self.detect_shadows)
+
+
+class KNNModel(_OpenCVSubtractorModel):
+    """K-nearest-neighbours background model (cv2.createBackgroundSubtractorKNN)."""
+
+    name = 'knn'
+
+    def __init__(self, history: int = 500, dist2_threshold: float = 400.0,
+                 detect_shadows: bool = False, learning_rate: float = -1, fast_learning_rate: float = 0.5):
+        """
+        Args:
+            history (int): Number of frames that affect the model
+            dist2_threshold (float): Squared distance threshold for foreground
+            detect_shadows (bool): Detect shadows (slower) and exclude them from the mask
+            learning_rate (float): Model update rate, -1 for automatic
+            fast_learning_rate (float): Update rate while fast adaptation is enabled
+        """
+        self.history = history
+        self.dist2_threshold = dist2_threshold
+        super().__init__(learning_rate, detect_shadows, fast_learning_rate)
+
+    def _create(self):
+        return cv2.createBackgroundSubtractorKNN(self.history, self.dist2_threshold, self.detect_shadows)
+
+
+BACKGROUND_MODELS: Dict[str, Type[BackgroundModel]] = {
+    RunningAverageModel.name: RunningAverageModel,
+    MOG2Model.name: MOG2Model,
+    KNNModel.name: KNNModel,
+    FrameDifferenceModel.name: FrameDifferenceModel,
+}
+
+
+def create_background_model(name: str, **params) -> BackgroundModel:
+    """
+    Create a background model by name.
+
+    Args:
+        name (str): One of BACKGROUND_MODELS ('running_average', 'mog2', 'knn', 'frame_difference')
+        **params: Backend-specific tunables
+
+    Returns:
+        BackgroundModel: The configured backend
+    """
+    try:
+        model_class = BACKGROUND_MODELS[name]
+    except KeyError:
+        raise ValueError(f"Unknown background model '{name}', expected one of {sorted(BACKGROUND_MODELS)}")
+    return model_class(**params)
@@ -1,22 +1,152 @@
-import cv2
+import sys
+import time
+import signal
 import logging
+import threading
+import multiprocessing
 import numpy as np
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
+
+from src.camera.frame_buffer import FrameRingBuffer
+from src.camera.frame_source import DeviceSource, FrameSource
+from src.camera.skip_policy import AdaptiveSkipPolicy
+
+
+def _grab_selected(source: FrameSource, skip_policy: AdaptiveSkipPolicy) -> bool:
+    """Grab frames without decoding them until the policy selects one; False if a grab fails."""
+    while source.grab():
+        if skip_policy.decide(source.timestamp()):
+            return True
+    return False
+
+
+def _capture_process(source: FrameSource, conn, lock, capacity: int, drop_policy: str,
+                     skip_policy: Optional[AdaptiveSkipPolicy] = None):
+    """
+    Body of the capture process: read frames straight into shared pool slots.
+
+    Sends ('ready', pool name, slots, shape, dtype) or ('error', message) first, then one
+    FrameHandle per frame and ('finished',) when a recorded source ends. Receives
+    ('report', motion, seconds) feedback and ('limit', fps) decode rate caps for the skip
+    policy and stops on 'stop'.
+    """
+    # Stopped by the parent ('stop'), so that systemd's SIGTERM to the group does not race it
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    from src.camera.frame_pool import SharedFramePool
+    logger = logging.getLogger('CameraHandler')
+    if not source.open():
+        conn.send(('error', "Failed to open camera"))
+        return
+    pool = None
+    try:
+        # The first frame decides the slot shape (devices may ignore the requested resolution)
+        success, first = source.read()
+        if not success:
+            conn.send(('error', "Failed to capture the first frame"))
+            return
+        pool = SharedFramePool.create(capacity + 2, first.shape, first.dtype, lock)
+        conn.send(('ready', pool.name, pool.slots, first.shape, first.dtype.str))
+        slot = pool.acquire()
+        np.copyto(pool.frame(slot), first)
+        conn.send(pool.publish(slot, time.time()))
+        steal = drop_policy == FrameRingBuffer.DROP_OLDEST
+        selected = False
+
+        while True:
+            while conn.poll():
+                message = conn.recv()
+                if message == 'stop':
+                    return
+                if skip_policy is None:
+                    continue
+                if message[0] == 'limit':
+                    skip_policy.max_fps = message[1]
+                else:
+                    skip_policy.report(*message[1:])
+            success = True
+            if skip_policy is not None and not selected:
+                skipped = skip_policy.skipped
+                try:
+                    success = selected = _grab_selected(source, skip_policy)
+                except Exception as e:
+                    logger.error(f"Error capturing frame: {str(e)}")
+                    success = False
+                if skip_policy.skipped != skipped:
+                    pool.skip(skip_policy.skipped - skipped)
+            if success:
+                slot = pool.acquire(capacity, steal)
+                if slot is None:
+                    time.sleep(0.005)
+                    continue
+                buffer = pool.frame(slot)
+                try:
+                    success, frame = source.retrieve(buffer) if selected else source.read(buffer)
+                except Exception as e:
+                    logger.error(f"Error capturing frame: {str(e)}")
+                    success, frame = False, None
+                selected = False
+                if success and frame is not buffer:
+                    if frame.shape != buffer.shape:
+                        logger.error(f"Frame size changed to {frame.shape}, expected {buffer.shape}")
+                        success = False
+                    else:
+                        np.copyto(buffer, frame)
+                if success:
+                    conn.send(pool.publish(slot, time.time()))
+                    continue
+                pool.abort(slot)
+            if source.exhausted:
+                conn.send(('finished',))
+                return
+            time.sleep(0.01)
+    finally:
+        source.release()
+        if pool is not None:
+            pool.close()
 
 class CameraHandler:
     """Handles camera operations including initialization, frame capture, and error handling."""
     
-    def __init__(self, camera_id: int = 0, resolution: Tuple[int, int] = (640, 480)):
+    def __init__(self, camera_id: int = 0, resolution: Tuple[int, int] = (640, 480),
+                 buffer_size: int = 4, drop_policy: str = FrameRingBuffer.DROP_OLDEST,
+                 source: Optional[FrameSource] = None, capture_process: bool = False,
+                 skip_policy: Optional[AdaptiveSkipPolicy] = None):
         """
         Initialize the camera handler.
         
         Args:
             camera_id (int): ID of the camera to use (default: 0 for primary camera)
             resolution (tuple): Desired resolution as (width, height)
+            buffer_size (int): Number of frames the capture thread may queue ahead of the consumer
+            drop_policy (str): 'drop_oldest' or 'block' when the capture queue is full
+            source (FrameSource): Frame source to read from instead of the camera device
+                (video file, image directory, synthetic scene)
+            capture_process (bool): Read frames in a separate process that writes them into a
+                SharedFramePool; next() and latest() then return views of the shared slots
+            skip_policy (AdaptiveSkipPolicy): Grab every frame but decode only the ones the
+                policy selects; detection results are fed back through report()
         """
         self.camera_id = camera_id
         self.resolution = resolution
+        self.source = source if source is not None else DeviceSource(camera_id, resolution)
         self.camera = None
+        self.frame_buffer = FrameRingBuffer(buffer_size, drop_policy)
+        self._capture_thread = None
+        self._stop_event = threading.Event()
+        self.capture_process = capture_process
+        self.skip_policy = skip_policy
+        self._process = None
+        self._conn = None
+        # SharedFramePool of the capture process (imported on demand, needs Python 3.8)
+        self._pool = None
+        self._held_slot: Optional[int] = None
+        self._source_finished = False
+        self._rate_limit = 0.0
+        self._final_stats = {'captured': 0, 'dropped': 0, 'skipped': 0, 'pending': 0}
+        # capture_frame() alternates between two preallocated frames
+        self._read_buffers: List[Optional[np.ndarray]] = [None, None]
+        self._read_index = 0
         self.setup_logging()
         
     def setup_logging(self):
@@ -34,27 +164,129 @@ class CameraHandler:
         Returns:
             bool: True if initialization successful, False otherwise
         """
+        if self.capture_process:
+            return self._start_process()
         try:
-            self.camera = cv2.VideoCapture(self.camera_id)
-            if not self.camera.isOpened():
+            if not self.source.open():
                 self.logger.error("Failed to open camera")
                 return False
+            self.camera = self.source
             
-            # Set resolution
-            self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, self.resolution[0])
-            self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, self.resolution[1])
-            
-            self.logger.info("Camera initialized successfully")
+            self.logger.info(f"Camera initialized successfully ({type(self.source).__name__})")
             return True
             
         except Exception as e:
             self.logger.error(f"Error initializing camera: {str(e)}")
             return False
     
+    def _start_process(self, open_timeout: float = 15.0) -> bool:
+        """Spawn the capture process and map its frame pool once the source is open."""
+        if sys.version_info < (3, 8):
+            self.logger.error("The capture process needs Python 3.8 or newer (multiprocessing.shared_memory)")
+            return False
+        from src.camera.frame_pool import SharedFramePool
+        context = multiprocessing.get_context('spawn')
+        lock = context.Lock()
+        self._conn, child_conn = context.Pipe()
+        self._process = context.Process(target=_capture_process, name='camera-capture-process',
+                                        args=(self.source, child_conn, lock, self.frame_buffer.capacity,
+                                              self.frame_buffer.drop_policy, self.skip_policy), daemon=True)
+        self._process.start()
+        child_conn.close()
+        self._source_finished = False
+        try:
+            if not self._conn.poll(open_timeout):
+                raise EOFError("no answer from the capture process")
+            message = self._conn.recv()
+        except (EOFError, OSError) as e:
+            message = ('error', str(e))
+        if message[0] != 'ready':
+            self.logger.error(f"Failed to open camera: {message[1]}")
+            self._stop_process()
+            return False
+        _, name, slots, shape, dtype = message
+        self._pool = SharedFramePool.attach(name, slots, shape, dtype, lock)
+        self.logger.info(f"Camera initialized successfully ({type(self.source).__name__}, "
+                         f"capture process with {slots} shared frame slots)")
+        return True
+
+    def _stop_process(self):
+        if self._process is None:
+            return
+        try:
+            self._conn.send('stop')
+        except OSError:
+            pass
+        self._process.join(timeout=2.0)
+        if self._process.is_alive():
+            self._process.kill()
+            self._process.join(timeout=1.0)
+        self._conn.close()
+        if self._pool is not None:
+            self._final_stats = self._pool.stats()
+            self._held_slot = None
+            if self._process.exitcode != 0:
+                # The capture process could not remove the block itself
+                self._pool.unlink()
+            self._pool.close()
+            self._pool = None
+        self._process = None
+        self.logger.info("Capture process stopped")
+
+    def _receive(self, timeout: Optional[float]):
+        """Next message of the capture process; None on timeout."""
+        try:
+            if not self._conn.poll(timeout):
+                return None
+            return self._conn.recv()
+        except (EOFError, OSError):
+            if self._source_finished:
+                return None
+            raise RuntimeError("Capture process exited unexpectedly")
+
+    def _next_shared(self, timeout: Optional[float], newest: bool) -> Tuple[bool, Optional[np.ndarray]]:
+        """Claim the next (or newest) frame of the capture process, releasing the previous one."""
+        from src.camera.frame_pool import FrameHandle
+        if self._pool is None:
+            return False, None
+        if self._held_slot is not None:
+            self._pool.release(self._held_slot)
+            self._held_slot = None
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._source_finished:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            message = self._receive(remaining)
+            if message is None:
+                return False, None
+            if not isinstance(message, FrameHandle):
+                self._source_finished = message[0] == 'finished'
+                continue
+            if newest:
+                # Skip to the most recent handle already delivered
+                while not self._source_finished:
+                    later = self._receive(0.0)
+                    if later is None:
+                        break
+                    if isinstance(later, FrameHandle):
+                        self._pool.discard(message)
+                        message = later
+                    else:
+                        self._source_finished = later[0] == 'finished'
+            frame = self._pool.claim(message)
+            if frame is not None:
+                self._held_slot = message.slot
+                return True, frame
+            # The slot was recycled for a newer frame, whose handle follows
+        return False, None
+
     def capture_frame(self) -> Tuple[bool, Optional[np.ndarray]]:
         """
         Capture a single frame from the camera.
         
+        Frames are read in place into two alternating preallocated arrays, so the returned
+        array stays valid until the call after next. With a skip policy, frames it does not
+        select are grabbed and discarded without decoding.
+        
         Returns:
             tuple: (success (bool), frame (numpy array) or None if capture failed)
         """
@@ -63,19 +295,180 @@ class CameraHandler:
             return False, None
             
         try:
-            success, frame = self.camera.read()
+            buffer = self._read_buffers[self._read_index]
+            if self.skip_policy is not None:
+                success = _grab_selected(self.camera, self.skip_policy)
+                if success:
+                    success, frame = self.camera.retrieve(buffer)
+            else:
+                success, frame = self.camera.read(buffer)
             if not success:
                 self.logger.error("Failed to capture frame")
                 return False, None
-                
+            
+            self._read_buffers[self._read_index] = frame
+            self._read_index = 1 - self._read_index
             return True, frame
             
         except Exception as e:
             self.logger.error(f"Error capturing frame: {str(e)}")
             return False, None
     
+    def start_capture(self) -> bool:
+        """
+        Start the background capture thread that drains the device into the frame buffer.
+        
+        Returns:
+            bool: True if the thread is running, False if the camera is not initialized
+        """
+        if self.capture_process:
+            # The capture process reads from the moment the source is open
+            return self._process is not None
+        if self.camera is None or not self.camera.isOpened():
+            self.logger.error("Camera is not initialized")
+            return False
+        if self._capture_thread is not None and self._capture_thread.is_alive():
+            return True
+
+        self._stop_event.clear()
+        self.frame_buffer.reset()
+        self._capture_thread = threading.Thread(target=self._capture_loop,
+                                                name='camera-capture', daemon=True)
+        self._capture_thread.start()
+        self.logger.info("Background capture started")
+        return True
+
+    def stop_capture(self):
+        """Stop the background capture thread (or process)."""
+        self._stop_process()
+        if self._capture_thread is None:
+            return
+        self._stop_event.set()
+        self.frame_buffer.close()
+        self._capture_thread.join(timeout=2.0)
+        self._capture_thread = None
+        self.logger.info("Background capture stopped")
+
+    def _capture_loop(self):
+        """Continuously read frames into preallocated ring buffer slots."""
+        selected = False
+        while not self._stop_event.is_set():
+            success = True
+            if self.skip_policy is not None and not selected:
+                # Keep the device drained, decode only the frames the policy picks
+                try:
+                    success = selected = _grab_selected(self.camera, self.skip_policy)
+                except Exception as e:
+                    self.logger.error(f"Error capturing frame: {str(e)}")
+                    success = False
+            if success:
+                slot = self.frame_buffer.acquire_slot(timeout=0.5)
+                if slot is None:
+                    continue
+                index, buffer = slot
+                try:
+                    success, frame = self.camera.retrieve(buffer) if selected else self.camera.read(buffer)
+                except Exception as e:
+                    self.logger.error(f"Error capturing frame: {str(e)}")
+                    success, frame = False, None
+                selected = False
+                if success:
+                    self.frame_buffer.commit(index, frame)
+                    continue
+                self.frame_buffer.abort(index)
+            if self.finished:
+                self.logger.info("Frame source exhausted")
+                self.frame_buffer.close()
+                return
+            self._stop_event.wait(0.01)
+
+    @property
+    def finished(self) -> bool:
+        """True once a recorded source has delivered its last frame."""
+        if self.capture_process:
+            return self._source_finished
+        return self.source.exhausted
+
+    def next(self, timeout: Optional[float] = None, newest: bool = False) -> Tuple[bool, Optional[np.ndarray]]:
+        """
+        Get the oldest frame queued by the capture thread, waiting if none is available.
+        
+        The returned array is reused by the capture thread once the next frame is requested.
+        
+        Args:
+            timeout (float): Maximum time to wait in seconds (None waits forever)
+            newest (bool): Take the most recent queued frame instead, dropping older ones
+                (for a consumer that runs slower than the camera on purpose)
+            
+        Returns:
+            tuple: (success (bool), frame (numpy array) or None on timeout)
+        
+        Raises:
+            RuntimeError: If the capture process died (capture_process mode)
+        """
+        if self.capture_process:
+            return self._next_shared(timeout, newest=newest)
+        return self.frame_buffer.next(timeout, newest=newest)
+
+    def latest(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """
+        Get the newest frame queued by the capture thread without waiting, skipping older ones.
+        
+        Returns:
+            tuple: (success (bool), frame (numpy array) or None if no new frame is available)
+        """
+        if self.capture_process:
+            return self._next_shared(0.0, newest=True)
+        return self.frame_buffer.latest()
+
+    def report(self, motion: bool, seconds: float):
+        """
+        Feed the analysis of a frame back to the skip policy (no-op without one).
+
+        Args:
+            motion (bool): The detector found moving objects in the frame
+            seconds (float): Time spent analyzing the frame
+        """
+        if self.skip_policy is None:
+            return
+        if not self.capture_process:
+            self.skip_policy.report(motion, seconds)
+        elif self._conn is not None:
+            try:
+                self._conn.send(('report', motion, seconds))
+            except OSError:
+                pass
+
+    def limit_rate(self, fps: float):
+        """
+        Cap the rate at which frames are decoded to what the consumer processes (no-op
+        without a skip policy).
+
+        Args:
+            fps (float): Frames decoded per second at most (0 removes the cap)
+        """
+        if self.skip_policy is None or fps == self._rate_limit:
+            return
+        self._rate_limit = fps
+        # Also kept on the local copy, which a restarted capture process starts from
+        self.skip_policy.max_fps = fps
+        if self.capture_process and self._conn is not None:
+            try:
+                self._conn.send(('limit', fps))
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        """Return captured/dropped/skipped frame counters of the capture thread."""
+        if self.capture_process:
+            return self._pool.stats() if self._pool is not None else dict(self._final_stats)
+        stats = self.frame_buffer.stats()
+        stats['skipped'] = self.skip_policy.skipped if self.skip_policy is not None else 0
+        return stats
+
     def release(self):
         """Release the camera resources."""
+        self.stop_capture()
         if self.camera is not None:
             self.camera.release()
             self.logger.info("Camera released") 
\ No newline at end of file
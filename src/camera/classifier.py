@@ -0,0 +1,229 @@
+import time
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+
+BBox = Tuple[int, int, int, int]
+
+
+class CropClassifier:
+    """Small CPU image classifier applied to motion crops (ONNX Runtime or OpenCV DNN).
+
+    All crops of one frame are stacked into a single NCHW blob and classified in one
+    inference call. ONNX Runtime is used for .onnx models when it is installed;
+    otherwise the model is loaded with cv2.dnn.readNet, which also accepts Caffe,
+    TensorFlow and Darknet models.
+    """
+
+    BACKEND_AUTO = 'auto'
+    BACKEND_ONNXRUNTIME = 'onnxruntime'
+    BACKEND_OPENCV = 'opencv'
+
+    def __init__(self, model_path: Union[str, Path], labels: Optional[Union[str, Path, Sequence[str]]] = None,
+                 input_size: Tuple[int, int] = (224, 224), backend: str = BACKEND_AUTO,
+                 config_path: Optional[Union[str, Path]] = None, scale: float = 1.0 / 255,
+                 mean: Tuple[float, float, float] = (0.0, 0.0, 0.0), swap_rb: bool = True,
+                 padding: float = 0.1, threads: int = 2):
+        """
+        Load the model.
+
+        Args:
+            model_path: Network file (.onnx, .caffemodel, .pb, .weights, ...)
+            labels: Class names, as a list or a text file with one name per line
+            input_size (tuple): Network input size as (width, height)
+            backend (str): 'auto', 'onnxruntime' or 'opencv'
+            config_path: Network description for formats that need one (OpenCV backend)
+            scale (float): Multiplier applied to pixel values
+            mean (tuple): Per-channel mean subtracted before scaling
+            swap_rb (bool): Convert BGR frames to RGB
+            padding (float): Context added around each box, as a fraction of its size
+            threads (int): Inference threads of the onnxruntime session; the OpenCV backend
+                uses OpenCV's process-wide thread pool (performance.opencv_threads)
+        """
+        self.logger = logging.getLogger('CropClassifier')
+        self.input_size = tuple(input_size)
+        self.scale = scale
+        self.mean = mean
+        self.swap_rb = swap_rb
+        self.padding = padding
+        self.labels = self._load_labels(labels)
+        self.session = None
+        self.net = None
+        self._batch_size: Optional[int] = None
+
+        model_path = Path(model_path)
+        if backend == self.BACKEND_AUTO:
+            backend = self.BACKEND_OPENCV
+            if model_path.suffix == '.onnx':
+                try:
+                    import onnxruntime  # noqa: F401
+                    backend = self.BACKEND_ONNXRUNTIME
+                except ImportError:
+                    pass
+
+        if backend == self.BACKEND_ONNXRUNTIME:
+            try:
+                import onnxruntime
+            except ImportError as e:
+                raise ImportError("The onnxruntime backend requires onnxruntime (pip install onnxruntime)") from e
+            options = onnxruntime.SessionOptions()
+            options.intra_op_num_threads = threads
+            self.session = onnxruntime.InferenceSession(str(model_path), options,
+                                                        providers=['CPUExecutionProvider'])
+            model_input = self.session.get_inputs()[0]
+            self._input_name = model_input.name
+            # Models exported with a fixed batch dimension are fed one crop at a time
+            if isinstance(model_input.shape[0], int):
+                self._batch_size = model_input.shape[0]
+        elif backend == self.BACKEND_OPENCV:
+            self.net = cv2.dnn.readNet(str(model_path), str(config_path) if config_path else '')
+        else:
+            raise ValueError(f"Unknown classifier backend: {backend}")
+        self.backend = backend
+        self.logger.info(f"Loaded classifier {model_path.name} ({backend})")
+
+    @staticmethod
+    def _load_labels(labels) -> Optional[List[str]]:
+        if labels is None:
+            return None
+        if isinstance(labels, (str, Path)):
+            with open(labels) as f:
+                return [line.strip() for line in f if line.strip()]
+        return list(labels)
+
+    def crop(self, frame: np.ndarray, bbox: BBox) -> np.ndarray:
+        """View of the frame around a box, padded by the context fraction and clipped to the frame."""
+        x, y, w, h = bbox
+        pad_x, pad_y = int(w * self.padding), int(h * self.padding)
+        height, width = frame.shape[:2]
+        x0, y0 = max(0, x - pad_x), max(0, y - pad_y)
+        x1, y1 = min(width, x + w + pad_x), min(height, y + h + pad_y)
+        return frame[y0:y1, x0:x1]
+
+    def classify(self, frame: np.ndarray, boxes: Sequence[BBox]) -> List[Tuple[str, float]]:
+        """
+        Classify the crops of one frame in a single batch.
+
+        Args:
+            frame (np.ndarray): BGR frame
+            boxes (list): Bounding boxes (x, y, w, h) in frame coordinates
+
+        Returns:
+            list: (label, confidence) per box, in the same order
+        """
+        if not boxes:
+            return []
+        crops = [self.crop(frame, box) for box in boxes]
+        if any(crop.size == 0 for crop in crops):
+            raise ValueError("Cannot classify an empty box")
+        blob = cv2.dnn.blobFromImages(crops, self.scale, self.input_size, self.mean, self.swap_rb, crop=False)
+        scores = self._infer(blob)
+        return [self._top(row) for row in scores]
+
+    def _infer(self, blob: np.ndarray) -> np.ndarray:
+        if self._batch_size is not None and self._batch_size != len(blob):
+            return np.concatenate([self._infer_batch(blob[i:i + 1]) for i in range(len(blob))])
+        return self._infer_batch(blob)
+
+    def _infer_batch(self, blob: np.ndarray) -> np.ndarray:
+        if self.session is not None:
+            output = self.session.run(None, {self._input_name: blob})[0]
+        else:
+            self.net.setInput(blob)
+            output = self.net.forward()
+        return output.reshape(len(blob), -1)
+
+    def _top(self, scores: np.ndarray) -> Tuple[str, float]:
+        # Turn logits into probabilities unless the network already ends in a softmax
+        if scores.min() < 0 or abs(float(scores.sum()) - 1.0) > 1e-3:
+            scores = np.exp(scores - scores.max())
+            scores /= scores.sum()
+        index = int(np.argmax(scores))
+        label = self.labels[index] if self.labels and index < len(self.labels) else str(index)
+        return label, float(scores[index])
+
+
+class TrackClassifier:
+    """Runs a CropClassifier on tracked objects only, caching results per track.
+
+    A track is classified when it is confirmed and then every ``refresh_interval``
+    detections until a result reaches ``confidence_threshold`` (at most ``max_attempts``
+    times). The most confident result is kept on the track as ``label``/``confidence``,
+    so inference cost follows the number of moving objects, not the frame rate.
+    """
+
+    def __init__(self, classifier: CropClassifier, confidence_threshold: float = 0.5,
+                 refresh_interval: int = 10, max_attempts: int = 5, min_box_size: int = 16):
+        """
+        Args:
+            classifier (CropClassifier): Model applied to the crops
+            confidence_threshold (float): Confidence at which a track counts as classified
+            refresh_interval (int): Detections between attempts while below the threshold
+            max_attempts (int): Attempts per track before giving up
+            min_box_size (int): Boxes narrower or lower than this are not classified
+        """
+        self.classifier = classifier
+        self.confidence_threshold = confidence_threshold
+        self.refresh_interval = refresh_interval
+        self.max_attempts = max_attempts
+        self.min_box_size = min_box_size
+        self.inferences = 0
+        self.crops_classified = 0
+        self.total_seconds = 0.0
+        self.logger = logging.getLogger('TrackClassifier')
+
+    def update(self, frame: np.ndarray, tracks: Sequence[Any]) -> int:
+        """
+        Classify the tracks that need it, in one batch.
+
+        Args:
+            frame (np.ndarray): Frame the tracks were just updated with
+            tracks (list): Confirmed Track objects observed in this frame
+
+        Returns:
+            int: Number of crops classified
+        """
+        due = [track for track in tracks if self._due(track)]
+        if not due:
+            return 0
+        start = time.perf_counter()
+        try:
+            results = self.classifier.classify(frame, [track.bbox for track in due])
+        except Exception as e:
+            self.logger.error(f"Classification failed: {e}")
+            return 0
+        self.total_seconds += time.perf_counter() - start
+        self.inferences += 1
+        self.crops_classified += len(due)
+
+        for track, (label, confidence) in zip(due, results):
+            track.classification_attempts += 1
+            track.classified_at_hit = track.hits
+            if confidence > track.confidence:
+                track.label, track.confidence = label, confidence
+                if confidence >= self.confidence_threshold:
+                    self.logger.info(f"Track {track.track_id} classified as {label} ({confidence:.2f})")
+        return len(due)
+
+    def _due(self, track: Any) -> bool:
+        if track.confidence >= self.confidence_threshold or track.classification_attempts >= self.max_attempts:
+            return False
+        _, _, w, h = track.bbox
+        if w < self.min_box_size or h < self.min_box_size:
+            return False
+        return (track.classification_attempts == 0
+                or track.hits - track.classified_at_hit >= self.refresh_interval)
+
+    def accepts(self, track: Any) -> bool:
+        """True if the track reached the confidence threshold and is worth saving."""
+        return track.confidence >= self.confidence_threshold
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'inferences': self.inferences,
+            'crops_classified': self.crops_classified,
+            'avg_inference_ms': self.total_seconds / self.inferences * 1000.0 if self.inferences else 0.0,
+        }
@@ -0,0 +1,195 @@
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class FrameRingBuffer:
+    """Fixed-size ring of reusable frame buffers shared by a capture thread and a consumer.
+
+    The producer asks for a free slot, fills it in place (e.g. ``VideoCapture.read(image=...)``)
+    and commits it. The consumer takes committed slots with :meth:`next` or :meth:`latest`.
+    A slot handed to the consumer stays reserved until the consumer asks for another frame,
+    so the returned array is valid until the following ``next()``/``latest()`` call.
+    """
+
+    DROP_OLDEST = 'drop_oldest'
+    BLOCK = 'block'
+
+    def __init__(self, capacity: int = 4, drop_policy: str = DROP_OLDEST):
+        """
+        Initialize the ring buffer.
+
+        Args:
+            capacity (int): Maximum number of captured frames waiting for the consumer
+            drop_policy (str): 'drop_oldest' to overwrite the oldest waiting frame when full,
+                'block' to make the producer wait for the consumer
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if drop_policy not in (self.DROP_OLDEST, self.BLOCK):
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+
+        self.capacity = capacity
+        self.drop_policy = drop_policy
+
+        # One extra slot for the frame being written and one for the frame held by the consumer
+        slot_count = capacity + 2
+        self._slots: List[Optional[np.ndarray]] = [None] * slot_count
+        self._free: Deque[int] = deque(range(slot_count))
+        self._ready: Deque[int] = deque()
+        self._in_use: Optional[int] = None
+        self._closed = False
+        self._cond = threading.Condition()
+
+        self.frames_captured = 0
+        self.frames_dropped = 0
+
+    def acquire_slot(self, timeout: Optional[float] = None) -> Optional[Tuple[int, Optional[np.ndarray]]]:
+        """
+        Reserve a slot for the producer to write into.
+
+        Args:
+            timeout (float): Maximum time to wait for a free slot under the 'block' policy
+
+        Returns:
+            tuple: (slot index, preallocated buffer or None before the first frame),
+                or None if the buffer was closed or the wait timed out
+        """
+        with self._cond:
+            if self.drop_policy == self.BLOCK:
+                has_room = lambda: len(self._ready) < self.capacity or self._closed
+                if not self._cond.wait_for(has_room, timeout):
+                    return None
+            if self._closed:
+                return None
+
+            if len(self._ready) >= self.capacity:
+                # Drop-oldest: recycle the oldest frame nobody has consumed yet
+                index = self._ready.popleft()
+                self.frames_dropped += 1
+            else:
+                index = self._free.popleft()
+            return index, self._slots[index]
+
+    def commit(self, index: int, frame: np.ndarray) -> None:
+        """
+        Publish a filled slot to the consumer.
+
+        Args:
+            index (int): Slot index returned by acquire_slot
+            frame (np.ndarray): Frame written for this slot; stored as the slot buffer for reuse
+        """
+        with self._cond:
+            self._slots[index] = frame
+            self._ready.append(index)
+            self.frames_captured += 1
+            self._cond.notify_all()
+
+    def abort(self, index: int) -> None:
+        """Return a reserved slot without publishing it (e.g. after a failed read)."""
+        with self._cond:
+            self._free.append(index)
+            self._cond.notify_all()
+
+    def next(self, timeout: Optional[float] = None, newest: bool = False) -> Tuple[bool, Optional[np.ndarray]]:
+        """
+        Take the oldest unconsumed frame, waiting for one if necessary.
+
+        Args:
+            timeout (float): Maximum time to wait in seconds (None waits forever)
+            newest (bool): Take the most recent frame instead, discarding older ones
+
+        Returns:
+            tuple: (success (bool), frame (numpy array) or None on timeout/close)
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._ready or self._closed, timeout):
+                return False, None
+            if not self._ready:
+                return False, None
+            if newest:
+                self._discard_older()
+            return True, self._hand_out(self._ready.popleft())
+
+    def latest(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """
+        Take the most recent unconsumed frame without waiting, discarding older ones.
+
+        Returns:
+            tuple: (success (bool), frame (numpy array) or None if no new frame is available)
+        """
+        with self._cond:
+            if not self._ready:
+                return False, None
+            self._discard_older()
+            return True, self._hand_out(self._ready.popleft())
+
+    def _discard_older(self):
+        while len(self._ready) > 1:
+            self._free.append(self._ready.popleft())
+            self.frames_dropped += 1
+
+    def _hand_out(self, index: int) -> np.ndarray:
+        """Reserve a slot for the consumer and release the previously held one."""
+        if self._in_use is not None:
+            self._free.append(self._in_use)
+        self._in_use = index
+        self._cond.notify_all()
+        return self._slots[index]
+
+    def close(self) -> None:
+        """Wake up any waiting producer or consumer and refuse further writes."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def reset(self) -> None:
+        """Reopen the buffer and discard pending frames, keeping the allocated slots."""
+        with self._cond:
+            self._closed = False
+            self._free.extend(self._ready)
+            self._ready.clear()
+            if self._in_use is not None:
+                self._free.append(self._in_use)
+                self._in_use = None
+
+    def stats(self) -> dict:
+        """Return capture/drop counters and the current queue depth."""
+        with self._cond:
+            return {
+                'captured': self.frames_captured,
+                'dropped': self.frames_dropped,
+                'pending': len(self._ready),
+            }
+
+
+class ScratchBuffers:
+    """Named arrays reused across frames as ``dst`` outputs of OpenCV calls.
+
+    A buffer is allocated on first use and again only when the requested shape or dtype
+    changes (e.g. a new resolution), so per-frame processing runs without allocating
+    frame-sized arrays in steady state. Contents are overwritten by the next frame.
+    """
+
+    def __init__(self):
+        self._buffers: Dict[str, np.ndarray] = {}
+
+    def get(self, name: str, shape: Tuple[int, ...], dtype: Any = np.uint8) -> np.ndarray:
+        """
+        Return the buffer registered under name, (re)allocating it if it does not fit.
+
+        Args:
+            name (str): Buffer name, unique per use within the owner
+            shape (tuple): Required array shape
+            dtype: Required element type
+        """
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.shape != tuple(shape) or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype)
+            self._buffers[name] = buffer
+        return buffer
+
+    def clear(self):
+        self._buffers.clear()
@@ -0,0 +1,221 @@
+import sys
+import logging
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+
+def _attach_untracked(name: str) -> shared_memory.SharedMemory:
+    """
+    Map an existing block without taking over the creator's resource tracker entry.
+
+    Processes started with spawn share the creator's tracker, which keeps one entry per
+    block name: an attach before Python 3.13 registers the name again, which changes
+    nothing, and unregistering it afterwards would drop the creator's entry (the
+    creator's own unlink then fails in the tracker). From 3.13 on, attach untracked.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+class FrameHandle(NamedTuple):
+    """Reference to a published frame, small enough to send over a pipe."""
+    slot: int
+    sequence: int
+    timestamp: float
+
+
+class SharedFramePool:
+    """Fixed slots of preallocated frames in shared memory, handed between processes.
+
+    A producer fills a slot in place (e.g. ``VideoCapture.read(image=...)`` on the slot's
+    array), publishes it and sends the returned FrameHandle over a pipe; the consumer
+    claims the handle and gets an np.ndarray view of the same memory, so no pixel is
+    copied or pickled. A header in the shared block keeps the state, sequence number and
+    reference count of every slot; a slot is recycled once its last reference is released.
+
+    With ``steal=True`` the producer reclaims the oldest published frame nobody has claimed
+    yet when ``capacity`` frames are waiting; handles still in flight for that slot no longer
+    match its sequence number and are rejected by claim().
+    """
+
+    FREE = 0
+    WRITING = 1
+    READY = 2
+    CLAIMED = 3
+
+    # Per-slot header fields and global counters, all int64
+    _STATE, _SEQUENCE, _REFS = range(3)
+    _CAPTURED, _DROPPED, _NEXT_SEQUENCE, _SKIPPED = range(4)
+
+    def __init__(self, memory: shared_memory.SharedMemory, slots: int, shape: Tuple[int, ...],
+                 dtype: Any, lock: Any, owner: bool):
+        """
+        Use create() or attach() instead of calling this directly.
+
+        Args:
+            memory (SharedMemory): Block holding the header and the frames
+            slots (int): Number of frame slots
+            shape (tuple): Shape of every frame
+            dtype: Frame element type
+            lock: multiprocessing.Lock shared by all processes using the pool
+            owner (bool): This process created the block and unlinks it
+        """
+        self.logger = logging.getLogger('SharedFramePool')
+        self.memory = memory
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.lock = lock
+        self.owner = owner
+        header_items = slots * 3 + 4
+        self._header = np.ndarray((header_items,), np.int64, memory.buf)
+        self._table = self._header[:slots * 3].reshape(slots, 3)
+        self._counters = self._header[slots * 3:]
+        offset = self._data_offset(slots)
+        frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        self._frames: List[np.ndarray] = [
+            np.ndarray(self.shape, self.dtype, memory.buf, offset + i * frame_bytes) for i in range(slots)
+        ]
+
+    @staticmethod
+    def _data_offset(slots: int) -> int:
+        # Header rounded up to a cache line so frames start aligned
+        return ((slots * 3 + 4) * 8 + 63) // 64 * 64
+
+    @classmethod
+    def create(cls, slots: int, shape: Tuple[int, ...], dtype: Any, lock: Any) -> 'SharedFramePool':
+        """Allocate a new pool; all slots start free."""
+        frame_bytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        memory = shared_memory.SharedMemory(create=True, size=cls._data_offset(slots) + slots * frame_bytes)
+        pool = cls(memory, slots, shape, dtype, lock, owner=True)
+        pool._header[:] = 0
+        return pool
+
+    @classmethod
+    def attach(cls, name: str, slots: int, shape: Tuple[int, ...], dtype: Any, lock: Any) -> 'SharedFramePool':
+        """Map a pool created by another process, which stays responsible for removing it."""
+        return cls(_attach_untracked(name), slots, shape, dtype, lock, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.memory.name
+
+    def frame(self, slot: int) -> np.ndarray:
+        """Array view of a slot (valid while the pool is open)."""
+        return self._frames[slot]
+
+    def acquire(self, capacity: Optional[int] = None, steal: bool = False) -> Optional[int]:
+        """
+        Reserve a slot for the producer to write into.
+
+        Args:
+            capacity (int): Maximum number of published, unclaimed frames (default: all slots)
+            steal (bool): Reclaim the oldest unclaimed frame instead of failing when full
+
+        Returns:
+            int: Slot index, or None if no slot can be reserved right now
+        """
+        with self.lock:
+            states = self._table[:, self._STATE]
+            ready = np.flatnonzero(states == self.READY)
+            if capacity is None or len(ready) < capacity:
+                free = np.flatnonzero(states == self.FREE)
+                if len(free):
+                    slot = int(free[0])
+                    self._table[slot, self._STATE] = self.WRITING
+                    return slot
+            if not steal or not len(ready):
+                return None
+            slot = int(ready[np.argmin(self._table[ready, self._SEQUENCE])])
+            self._table[slot, self._STATE] = self.WRITING
+            self._counters[self._DROPPED] += 1
+            return slot
+
+    def publish(self, slot: int, timestamp: float) -> FrameHandle:
+        """Mark a written slot as ready and return the handle to send to the consumer."""
+        with self.lock:
+            sequence = int(self._counters[self._NEXT_SEQUENCE])
+            self._counters[self._NEXT_SEQUENCE] += 1
+            self._counters[self._CAPTURED] += 1
+            self._table[slot] = (self.READY, sequence, 0)
+        return FrameHandle(slot, sequence, timestamp)
+
+    def abort(self, slot: int):
+        """Return a reserved slot without publishing it (e.g. after a failed read)."""
+        with self.lock:
+            self._table[slot, self._STATE] = self.FREE
+
+    def claim(self, handle: FrameHandle) -> Optional[np.ndarray]:
+        """
+        Take a published frame, holding one reference to its slot.
+
+        Returns:
+            np.ndarray: View of the frame, or None if the producer already reclaimed the slot
+        """
+        with self.lock:
+            state, sequence, _ = self._table[handle.slot]
+            if state != self.READY or sequence != handle.sequence:
+                return None
+            self._table[handle.slot] = (self.CLAIMED, sequence, 1)
+        return self._frames[handle.slot]
+
+    def discard(self, handle: FrameHandle):
+        """Skip a published frame without claiming it (counted as dropped)."""
+        with self.lock:
+            state, sequence, _ = self._table[handle.slot]
+            if state == self.READY and sequence == handle.sequence:
+                self._table[handle.slot, self._STATE] = self.FREE
+                self._counters[self._DROPPED] += 1
+
+    def retain(self, slot: int):
+        """Add a reference to a claimed slot, e.g. for a second consumer."""
+        with self.lock:
+            self._table[slot, self._REFS] += 1
+
+    def release(self, slot: int):
+        """Drop a reference; the slot is recycled when none are left."""
+        with self.lock:
+            self._table[slot, self._REFS] -= 1
+            if self._table[slot, self._REFS] <= 0:
+                self._table[slot, self._REFS] = 0
+                self._table[slot, self._STATE] = self.FREE
+
+    def skip(self, count: int = 1):
+        """Count frames the producer grabbed but did not decode."""
+        with self.lock:
+            self._counters[self._SKIPPED] += count
+
+    def stats(self) -> Dict[str, int]:
+        """Published, dropped and skipped frame counters and the number of frames waiting."""
+        with self.lock:
+            return {
+                'captured': int(self._counters[self._CAPTURED]),
+                'dropped': int(self._counters[self._DROPPED]),
+                'skipped': int(self._counters[self._SKIPPED]),
+                'pending': int(np.count_nonzero(self._table[:, self._STATE] == self.READY)),
+            }
+
+    def close(self):
+        """Unmap the block; the creator also removes it."""
+        self._frames = []
+        self._table = self._counters = self._header = None
+        try:
+            self.memory.close()
+        except BufferError:
+            # A caller still holds a frame view; the mapping goes away with the process
+            self.logger.debug("Frame views still referenced, shared memory left mapped")
+        if self.owner:
+            self.unlink()
+
+    def unlink(self):
+        """Remove the block, also on behalf of a creator that died before it could."""
+        try:
+            self.memory.unlink()
+        except FileNotFoundError:
+            return
+        if not self.owner and sys.version_info >= (3, 13):
+            # An untracked mapping leaves the creator's registration behind
+            resource_tracker.unregister(self.memory._name, 'shared_memory')
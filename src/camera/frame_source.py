@@ -0,0 +1,394 @@
+import time
+import logging
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+
+class FrameSource:
+    """Base class for anything CameraHandler can pull frames from.
+
+    Sources expose the subset of the cv2.VideoCapture interface used by CameraHandler
+    (``isOpened``, ``read``, ``grab``, ``retrieve``, ``release``), so a live device and a
+    recorded file are interchangeable. Recorded sources either replay at their nominal frame rate
+    (``realtime=True``) or as fast as the consumer can take frames.
+    """
+
+    def __init__(self, fps: float = 30.0, realtime: bool = True):
+        """
+        Args:
+            fps (float): Nominal frame rate used for wall-clock pacing
+            realtime (bool): Pace frames at fps; False reads as fast as possible
+        """
+        self.fps = fps
+        self.realtime = realtime
+        self.exhausted = False
+        self.frames_read = 0
+        self._start_time = None
+        self._grabbed: Optional[np.ndarray] = None
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def open(self) -> bool:
+        """Open the source. Returns True on success."""
+        raise NotImplementedError
+
+    def isOpened(self) -> bool:
+        raise NotImplementedError
+
+    def read(self, image: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        """
+        Read the next frame, optionally into a preallocated buffer.
+
+        Args:
+            image (np.ndarray): Buffer to reuse if it matches the frame shape
+
+        Returns:
+            tuple: (success (bool), frame (numpy array) or None)
+        """
+        success, frame = self._read(image)
+        if success:
+            self._pace()
+            self.frames_read += 1
+        return success, frame
+
+    def _read(self, image: Optional[np.ndarray]) -> Tuple[bool, Optional[np.ndarray]]:
+        raise NotImplementedError
+
+    def grab(self) -> bool:
+        """
+        Advance to the next frame without decoding it; retrieve() decodes it if needed.
+
+        Returns:
+            bool: True if a frame was grabbed
+        """
+        success = self._grab()
+        if success:
+            self._pace()
+            self.frames_read += 1
+        return success
+
+    def retrieve(self, image: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        """
+        Decode the frame taken by the last grab(), optionally into a preallocated buffer.
+
+        Args:
+            image (np.ndarray): Buffer to reuse if it matches the frame shape
+
+        Returns:
+            tuple: (success (bool), frame (numpy array) or None)
+        """
+        return self._retrieve(image)
+
+    def _grab(self) -> bool:
+        # Sources without a cheaper path read the whole frame and hand it out on retrieve()
+        success, self._grabbed = self._read(None)
+        return success
+
+    def _retrieve(self, image: Optional[np.ndarray]) -> Tuple[bool, Optional[np.ndarray]]:
+        frame, self._grabbed = self._grabbed, None
+        if frame is None:
+            return False, None
+        if image is not None and image.shape == frame.shape:
+            np.copyto(image, frame)
+            return True, image
+        return True, frame
+
+    def timestamp(self) -> float:
+        """
+        Time of the last frame on the source's clock, in seconds.
+
+        The wall clock when frames arrive in real time, the position in the recording
+        (frames read / fps) when a recording is replayed as fast as possible.
+        """
+        if self.realtime or self.fps <= 0:
+            return time.monotonic()
+        return self.frames_read / self.fps
+
+    def _pace(self):
+        """Sleep until the frame's nominal presentation time when replaying in real time."""
+        if not self.realtime or self.fps <= 0:
+            return
+        now = time.monotonic()
+        if self._start_time is None:
+            self._start_time = now
+            return
+        delay = self._start_time + (self.frames_read + 1) / self.fps - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def release(self):
+        """Release the source."""
+
+
+class DeviceSource(FrameSource):
+    """Live camera device opened through cv2.VideoCapture."""
+
+    def __init__(self, camera_id: int = 0, resolution: Tuple[int, int] = (640, 480),
+                 fps: Optional[float] = None):
+        """
+        Args:
+            camera_id (int): ID of the camera to use
+            resolution (tuple): Desired resolution as (width, height)
+            fps (float): Frame rate requested from the driver (device default if None)
+        """
+        # The device paces itself, never add sleeps on top of it
+        super().__init__(fps=fps or 30.0, realtime=False)
+        self.camera_id = camera_id
+        self.resolution = resolution
+        self.requested_fps = fps
+        self.capture = None
+
+    def open(self) -> bool:
+        self.capture = cv2.VideoCapture(self.camera_id)
+        if not self.capture.isOpened():
+            return False
+        self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, self.resolution[0])
+        self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, self.resolution[1])
+        if self.requested_fps:
+            self.capture.set(cv2.CAP_PROP_FPS, self.requested_fps)
+        return True
+
+    def isOpened(self) -> bool:
+        return self.capture is not None and self.capture.isOpened()
+
+    def _read(self, image):
+        return self.capture.read(image)
+
+    def _grab(self):
+        return self.capture.grab()
+
+    def _retrieve(self, image):
+        return self.capture.retrieve(image)
+
+    def timestamp(self) -> float:
+        return time.monotonic()
+
+    def release(self):
+        if self.capture is not None:
+            self.capture.release()
+
+
+class VideoFileSource(FrameSource):
+    """Recorded video file decoded through cv2.VideoCapture."""
+
+    def __init__(self, path: Union[str, Path], realtime: bool = True, loop: bool = False):
+        """
+        Args:
+            path: Video file to replay
+            realtime (bool): Pace frames at the file's frame rate
+            loop (bool): Restart from the beginning when the file ends
+        """
+        super().__init__(realtime=realtime)
+        self.path = Path(path)
+        self.loop = loop
+        self.capture = None
+
+    def open(self) -> bool:
+        self.capture = cv2.VideoCapture(str(self.path))
+        if not self.capture.isOpened():
+            return False
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or self.fps
+        return True
+
+    def isOpened(self) -> bool:
+        return self.capture is not None and self.capture.isOpened()
+
+    def _read(self, image):
+        success, frame = self.capture.read(image)
+        if not success and self.loop and self.frames_read > 0:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, frame = self.capture.read(image)
+        if not success:
+            self.exhausted = True
+        return success, frame
+
+    def _grab(self):
+        success = self.capture.grab()
+        if not success and self.loop and self.frames_read > 0:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success = self.capture.grab()
+        if not success:
+            self.exhausted = True
+        return success
+
+    def _retrieve(self, image):
+        return self.capture.retrieve(image)
+
+    def release(self):
+        if self.capture is not None:
+            self.capture.release()
+
+
+class ImageDirectorySource(FrameSource):
+    """Directory of still images replayed in file-name order."""
+
+    def __init__(self, path: Union[str, Path], pattern: str = '*.jpg', fps: float = 30.0,
+                 realtime: bool = True, loop: bool = False):
+        """
+        Args:
+            path: Directory containing the images
+            pattern (str): Glob pattern selecting the images
+            fps (float): Frame rate used for real-time pacing
+            realtime (bool): Pace frames at fps
+            loop (bool): Restart from the first image after the last one
+        """
+        super().__init__(fps=fps, realtime=realtime)
+        self.path = Path(path)
+        self.pattern = pattern
+        self.loop = loop
+        self.files: List[Path] = []
+        self._position = 0
+        self._failures = 0
+        self._grabbed_path: Optional[Path] = None
+
+    def open(self) -> bool:
+        self.files = sorted(self.path.glob(self.pattern))
+        self._position = 0
+        self._failures = 0
+        self.exhausted = False
+        return bool(self.files)
+
+    def isOpened(self) -> bool:
+        return bool(self.files)
+
+    def _read(self, image):
+        while self._grab():
+            success, frame = self._retrieve(image)
+            if success:
+                return True, frame
+        return False, None
+
+    def _grab(self):
+        # Only the file name is taken; the image is decoded by retrieve()
+        if self.exhausted:
+            return False
+        if self._position >= len(self.files):
+            if not self.loop:
+                self.exhausted = True
+                return False
+            self._position = 0
+        self._grabbed_path = self.files[self._position]
+        self._position += 1
+        return True
+
+    def _retrieve(self, image):
+        path, self._grabbed_path = self._grabbed_path, None
+        if path is None:
+            return False, None
+        frame = cv2.imread(str(path))
+        if frame is None:
+            self.logger.warning(f"Skipping unreadable image {path}")
+            # A full pass without a readable image would loop forever
+            self._failures += 1
+            if self._failures >= len(self.files):
+                self.logger.error(f"No readable images in {self.path}")
+                self.exhausted = True
+            return False, None
+        self._failures = 0
+        if image is not None and image.shape == frame.shape:
+            np.copyto(image, frame)
+            return True, image
+        return True, frame
+
+
+class SyntheticSource(FrameSource):
+    """Generated scene with bright blobs moving over a static background."""
+
+    def __init__(self, resolution: Tuple[int, int] = (640, 480), fps: float = 30.0,
+                 num_objects: int = 2, object_radius: int = 30, noise: int = 0,
+                 max_frames: Optional[int] = None, realtime: bool = True, seed: int = 0):
+        """
+        Args:
+            resolution (tuple): Frame size as (width, height)
+            fps (float): Frame rate used for real-time pacing
+            num_objects (int): Number of moving blobs
+            object_radius (int): Blob radius in pixels
+            noise (int): Amplitude of per-pixel uniform noise (0 disables it)
+            max_frames (int): Stop after this many frames (None runs forever)
+            realtime (bool): Pace frames at fps
+            seed (int): Random seed for reproducible scenes
+        """
+        super().__init__(fps=fps, realtime=realtime)
+        self.resolution = resolution
+        self.num_objects = num_objects
+        self.object_radius = object_radius
+        self.noise = noise
+        self.max_frames = max_frames
+        self.seed = seed
+        self._opened = False
+
+    def open(self) -> bool:
+        width, height = self.resolution
+        self._rng = np.random.default_rng(self.seed)
+        self._background = np.full((height, width, 3), 60, dtype=np.uint8)
+        self._positions = self._rng.uniform((0, 0), (width, height), size=(self.num_objects, 2))
+        self._velocities = self._rng.uniform(-8, 8, size=(self.num_objects, 2))
+        self._index = 0
+        self._opened = True
+        return True
+
+    def isOpened(self) -> bool:
+        return self._opened
+
+    def _read(self, image):
+        if not self._grab():
+            return False, None
+        return self._retrieve(image)
+
+    def _grab(self):
+        if self.max_frames is not None and self._index >= self.max_frames:
+            self.exhausted = True
+            return False
+
+        # Move blobs and bounce them off the frame borders
+        width, height = self.resolution
+        self._positions += self._velocities
+        for axis, limit in ((0, width), (1, height)):
+            out = (self._positions[:, axis] < 0) | (self._positions[:, axis] >= limit)
+            self._velocities[out, axis] *= -1
+            np.clip(self._positions[:, axis], 0, limit - 1, out=self._positions[:, axis])
+        self._index += 1
+        return True
+
+    def _retrieve(self, image):
+        # Renders the scene at the blob positions of the last grab()
+        frame = image if image is not None and image.shape == self._background.shape else None
+        if frame is None:
+            frame = self._background.copy()
+        else:
+            np.copyto(frame, self._background)
+        for x, y in self._positions:
+            cv2.circle(frame, (int(x), int(y)), self.object_radius, (230, 230, 230), -1)
+
+        if self.noise:
+            noise = self._rng.integers(0, self.noise, size=frame.shape, dtype=np.uint8)
+            cv2.add(frame, noise, dst=frame)
+        return True, frame
+
+    def release(self):
+        self._opened = False
+
+
+def create_frame_source(spec: Union[str, int], resolution: Tuple[int, int] = (640, 480),
+                        realtime: bool = True) -> FrameSource:
+    """
+    Build a frame source from a command-line style specification.
+
+    Args:
+        spec: Device index (e.g. 0 or "4"), "synthetic", a directory of images or a video file
+        resolution (tuple): Resolution for devices and synthetic scenes
+        realtime (bool): Pace recorded sources at their frame rate
+
+    Returns:
+        FrameSource: The matching source (not yet opened)
+    """
+    if isinstance(spec, int) or str(spec).isdigit():
+        return DeviceSource(int(spec), resolution)
+    if spec == 'synthetic':
+        return SyntheticSource(resolution, realtime=realtime)
+    path = Path(spec)
+    if path.is_dir():
+        return ImageDirectorySource(path, realtime=realtime)
+    return VideoFileSource(path, realtime=realtime)
@@ -0,0 +1,87 @@
+import logging
+from typing import Optional
+
+import cv2
+import numpy as np
+
+
+class IlluminationChangeDetector:
+    """Recognizes frame-wide changes such as passing clouds or the IR night mode switching.
+
+    A change is flagged when a large fraction of the analysed pixels turns foreground at
+    once, or when the mean brightness jumps between consecutive frames. It stays active
+    until the scene has been calm for ``recovery_frames`` frames, giving the background
+    model time to re-converge.
+    """
+
+    def __init__(self, changed_fraction: float = 0.6, brightness_jump: float = 20.0,
+                 recovery_frames: int = 10):
+        """
+        Args:
+            changed_fraction (float): Fraction of foreground pixels that marks a global change
+            brightness_jump (float): Change of mean gray level between frames that marks a global change
+            recovery_frames (int): Calm frames required before detections resume
+        """
+        self.changed_fraction = changed_fraction
+        self.brightness_jump = brightness_jump
+        self.recovery_frames = recovery_frames
+        self.active = False
+        self._calm_frames = 0
+        self._previous_mean: Optional[float] = None
+        self._jump = 0.0
+        self.logger = logging.getLogger('IlluminationChangeDetector')
+
+    def check_brightness(self, frame: np.ndarray, roi_mask: Optional[np.ndarray] = None) -> bool:
+        """
+        Compare the mean brightness with the previous frame, before the background model sees it.
+
+        A jump starts a change right away, so the model already learns this frame quickly.
+
+        Args:
+            frame (np.ndarray): Preprocessed grayscale frame
+            roi_mask (np.ndarray): Analysed pixels of the frame (None: all of them)
+
+        Returns:
+            bool: True while detections should be suppressed
+        """
+        mean = cv2.mean(frame, mask=roi_mask)[0]
+        self._jump = abs(mean - self._previous_mean) if self._previous_mean is not None else 0.0
+        self._previous_mean = mean
+        if self._jump >= self.brightness_jump:
+            self._start(f"brightness jump {self._jump:.1f}")
+        return self.active
+
+    def update(self, mask: np.ndarray, roi_mask: Optional[np.ndarray] = None) -> bool:
+        """
+        Check the foreground of a frame for a global change, after check_brightness().
+
+        Args:
+            mask (np.ndarray): Foreground mask the background model computed for the frame
+            roi_mask (np.ndarray): Analysed pixels of the frame (None: all of them)
+
+        Returns:
+            bool: True while detections should be suppressed
+        """
+        analysed = cv2.countNonZero(roi_mask) if roi_mask is not None else mask.size
+        fraction = cv2.countNonZero(mask) / float(max(1, analysed))
+
+        if fraction >= self.changed_fraction or self._jump >= self.brightness_jump:
+            self._start(f"{fraction:.0%} of pixels changed")
+        elif self.active:
+            self._calm_frames += 1
+            if self._calm_frames >= self.recovery_frames:
+                self.active = False
+                self.logger.info("Background re-adapted, detections resumed")
+        return self.active
+
+    def _start(self, reason: str):
+        self._calm_frames = 0
+        if not self.active:
+            self.active = True
+            self.logger.info(f"Global illumination change ({reason}), suppressing detections")
+
+    def reset(self):
+        self.active = False
+        self._calm_frames = 0
+        self._previous_mean = None
+        self._jump = 0.0
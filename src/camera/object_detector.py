@@ -1,32 +1,87 @@
 import cv2
 import numpy as np
 import logging
-from typing import Tuple, List, Optional
+from typing import Any, Dict, Tuple, List, Optional
+
+from src.camera.background_models import BackgroundModel, RunningAverageModel, create_background_model
+from src.camera.frame_buffer import ScratchBuffers
+from src.camera.illumination import IlluminationChangeDetector
+from src.camera.roi import RegionOfInterest
 
 class ObjectDetector:
     """Handles object detection using motion detection technique."""
+
+    EXTRACT_CONTOURS = 'contours'
+    EXTRACT_COMPONENTS = 'components'
     
     def __init__(self, 
                  min_area: int = 500,
                  threshold: int = 30,
                  blur_size: int = 21,
-                 dilate_iterations: int = 2):
+                 dilate_iterations: int = 2,
+                 detection_scale: float = 1.0,
+                 background_model: str = RunningAverageModel.name,
+                 background_params: Optional[Dict[str, Any]] = None,
+                 extraction: str = EXTRACT_CONTOURS,
+                 roi: Optional[RegionOfInterest] = None,
+                 illumination: Optional[IlluminationChangeDetector] = None,
+                 render: bool = True):
         """
         Initialize the object detector.
         
         Args:
-            min_area (int): Minimum area for motion detection
+            min_area (int): Minimum area for motion detection, in full-resolution pixels
             threshold (int): Threshold for motion detection
-            blur_size (int): Gaussian blur kernel size
+            blur_size (int): Gaussian blur kernel size, in full-resolution pixels
             dilate_iterations (int): Number of dilate iterations
+            detection_scale (float): Scale at which motion analysis runs (e.g. 0.5 or 0.25);
+                boxes are mapped back to full-resolution frame coordinates
+            background_model (str): Background-subtraction backend ('running_average', 'mog2',
+                'knn' or 'frame_difference')
+            background_params (dict): Backend-specific tunables; threshold-based backends
+                default to this detector's threshold
+            extraction (str): Box extraction method: 'contours' (findContours + contourArea) or
+                'components' (connectedComponentsWithStats, filtered by pixel count in one pass)
+            roi (RegionOfInterest): Include/exclude zones; frames are cropped to the watched
+                area before processing and motion outside it is ignored
+            illumination (IlluminationChangeDetector): Suppresses detections during frame-wide
+                lighting changes and speeds up background adaptation until they are over
+            render (bool): Return a copy of the frame with boxes drawn from detect_objects;
+                when False only boxes are computed and the input frame is returned untouched,
+                leaving drawing to draw_detections when pixels are actually needed
         """
+        if not 0 < detection_scale <= 1:
+            raise ValueError("detection_scale must be in (0, 1]")
+        if extraction not in (self.EXTRACT_CONTOURS, self.EXTRACT_COMPONENTS):
+            raise ValueError(f"Unknown extraction method: {extraction}")
         self.min_area = min_area
-        self.threshold = threshold
+        self._threshold = threshold
         self.blur_size = blur_size
         self.dilate_iterations = dilate_iterations
-        self.background = None
+        self.detection_scale = detection_scale
+        self.extraction = extraction
+        self.roi = roi
+        self.illumination = illumination
+        # Kept here rather than on the guard, which hot reload may replace or remove
+        self.illumination_changes = 0
+        self.illumination_suppressed_frames = 0
+        self.render = render
+        self.background_model = self._create_background_model(background_model, background_params or {})
+        # Gray, downscaled, blurred, dilated and label images are reused from frame to frame
+        self._scratch = ScratchBuffers()
         self.setup_logging()
 
+    @property
+    def threshold(self) -> int:
+        return self._threshold
+
+    @threshold.setter
+    def threshold(self, value: int):
+        """Change the motion threshold at runtime, including the threshold-based backends."""
+        self._threshold = value
+        if hasattr(self.background_model, 'threshold'):
+            self.background_model.threshold = value
+
     def setup_logging(self):
         """Configure logging for the object detector."""
         logging.basicConfig(
@@ -35,6 +90,12 @@ class ObjectDetector:
         )
         self.logger = logging.getLogger('ObjectDetector')
 
+    def _create_background_model(self, name: str, params: Dict[str, Any]) -> BackgroundModel:
+        """Instantiate the configured backend, sharing the detector threshold where applicable."""
+        if name in ('running_average', 'frame_difference'):
+            params = dict({'threshold': self.threshold}, **params)
+        return create_background_model(name, **params)
+
     def preprocess_frame(self, frame: np.ndarray) -> np.ndarray:
         """
         Preprocess frame for motion detection.
@@ -43,14 +104,42 @@ class ObjectDetector:
             frame (np.ndarray): Input frame
             
         Returns:
-            np.ndarray: Preprocessed frame
+            np.ndarray: Preprocessed frame (a scratch buffer overwritten by the next call)
         """
         # Convert to grayscale
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        height, width = frame.shape[:2]
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._scratch.get('gray', (height, width)))
+        # Downscale before any further analysis
+        if self.detection_scale < 1:
+            size = (max(1, int(round(width * self.detection_scale))),
+                    max(1, int(round(height * self.detection_scale))))
+            # Same fx/fy call as before, so the interpolation weights do not change
+            gray = cv2.resize(gray, None, dst=self._scratch.get('small', (size[1], size[0])),
+                              fx=self.detection_scale, fy=self.detection_scale, interpolation=cv2.INTER_AREA)
         # Apply Gaussian blur
-        blurred = cv2.GaussianBlur(gray, (self.blur_size, self.blur_size), 0)
+        blur_size = self._scaled_blur_size()
+        blurred = cv2.GaussianBlur(gray, (blur_size, blur_size), 0, dst=self._scratch.get('blurred', gray.shape))
         return blurred
 
+    def _scaled_blur_size(self) -> int:
+        """Blur kernel size matching blur_size at the detection scale (odd, at least 3)."""
+        if self.detection_scale == 1:
+            return self.blur_size
+        size = max(3, int(round(self.blur_size * self.detection_scale)))
+        return size if size % 2 == 1 else size + 1
+
+    def _to_frame_coords(self, bbox: Tuple[int, int, int, int],
+                         frame_shape: Tuple[int, ...]) -> Tuple[int, int, int, int]:
+        """Map a box found at the detection scale back to frame coordinates."""
+        if self.detection_scale == 1:
+            return bbox
+        inv = 1.0 / self.detection_scale
+        x, y, w, h = bbox
+        x0, y0 = int(x * inv), int(y * inv)
+        x1 = min(int(np.ceil((x + w) * inv)), frame_shape[1])
+        y1 = min(int(np.ceil((y + h) * inv)), frame_shape[0])
+        return x0, y0, x1 - x0, y1 - y0
+
     def detect_objects(self, frame: np.ndarray) -> Tuple[List[Tuple[int, int, int, int]], np.ndarray]:
         """
         Detect objects in the frame using motion detection.
@@ -59,60 +148,113 @@ class ObjectDetector:
             frame (np.ndarray): Input frame
             
         Returns:
-            tuple: (List of bounding boxes [(x, y, w, h)], processed frame with boxes drawn)
+            tuple: (List of bounding boxes [(x, y, w, h)], processed frame with boxes drawn,
+                or the unmodified input frame when rendering is disabled)
         """
-        processed_frame = frame.copy()
-        preprocessed = self.preprocess_frame(frame)
+        processed_frame = frame.copy() if self.render else frame
+
+        # Only the ROI bounding rectangle is blurred and diffed
+        x0, y0 = 0, 0
+        window = frame
+        if self.roi is not None:
+            x0, y0, w, h = self.roi.window(frame.shape)
+            window = frame[y0:y0 + h, x0:x0 + w]
+        preprocessed = self.preprocess_frame(window)
+        roi_mask = self.roi.analysis_mask(frame.shape, preprocessed.shape) if self.roi is not None else None
 
-        # Initialize background model if not exists
-        if self.background is None:
-            # Convert to float32 and proper shape
-            self.background = np.float32(preprocessed)
+        # A frame-wide lighting change is not motion: re-learn quickly from this frame on
+        was_changing = False
+        if self.illumination is not None:
+            was_changing = self.illumination.active
+            self.background_model.set_fast_adaptation(self.illumination.check_brightness(preprocessed, roi_mask))
+
+        # Compute foreground mask; the first frame(s) only initialize the background model
+        thresh = self.background_model.apply(preprocessed)
+        if thresh is None:
             self.logger.info("Background model initialized")
             return [], processed_frame
 
-        # Calculate difference between current frame and background
-        frame_delta = cv2.absdiff(cv2.convertScaleAbs(self.background), preprocessed)
-        thresh = cv2.threshold(frame_delta, self.threshold, 255, cv2.THRESH_BINARY)[1]
+        # Clear motion in excluded zones inside the window
+        if roi_mask is not None:
+            thresh = cv2.bitwise_and(thresh, roi_mask, dst=thresh)
+
+        # Report nothing until the background has re-adapted to the new lighting
+        if self.illumination is not None:
+            changing = self.illumination.update(thresh, roi_mask)
+            self.background_model.set_fast_adaptation(changing)
+            if changing and not was_changing:
+                self.illumination_changes += 1
+            if changing:
+                self.illumination_suppressed_frames += 1
+                return [], processed_frame
 
         # Dilate threshold image to fill in holes
-        thresh = cv2.dilate(thresh, None, iterations=self.dilate_iterations)
+        thresh = cv2.dilate(thresh, None, dst=self._scratch.get('dilated', thresh.shape),
+                            iterations=self.dilate_iterations)
 
-        # Find contours on thresholded image
-        contours, _ = cv2.findContours(thresh.copy(), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        # Extract bounding boxes of large enough foreground regions
+        min_area = self.min_area * self.detection_scale ** 2
+        if self.extraction == self.EXTRACT_COMPONENTS:
+            boxes = self._extract_components(thresh, min_area)
+        else:
+            boxes = self._extract_contours(thresh, min_area)
 
-        # Initialize list for detected objects
         detected_objects = []
+        for box in boxes:
+            x, y, w, h = self._to_frame_coords(box, window.shape)
+            detected_objects.append((x + x0, y + y0, w, h))
+        if self.render:
+            self.draw_detections(processed_frame, detected_objects)
 
-        # Process each contour
-        for contour in contours:
-            if cv2.contourArea(contour) < self.min_area:
-                continue
-
-            # Compute the bounding box for the contour
-            x, y, w, h = cv2.boundingRect(contour)
-            detected_objects.append((x, y, w, h))
+        return detected_objects, processed_frame
 
-            # Draw the bounding box
-            cv2.rectangle(processed_frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+    def _extract_contours(self, thresh: np.ndarray, min_area: float) -> List[Tuple[int, int, int, int]]:
+        """Bounding boxes of external contours whose polygon area reaches min_area."""
+        # findContours leaves its input untouched since OpenCV 3.2, no copy needed
+        contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        return [cv2.boundingRect(contour) for contour in contours
+                if cv2.contourArea(contour) >= min_area]
 
-        # Update background model (ensure both images are float32)
-        cv2.accumulateWeighted(np.float32(preprocessed), self.background, 0.2)
+    def _extract_components(self, thresh: np.ndarray, min_area: float) -> List[Tuple[int, int, int, int]]:
+        """Bounding boxes of 8-connected components with at least min_area pixels."""
+        labels = self._scratch.get('labels', thresh.shape, np.int32)
+        _, _, stats, _ = cv2.connectedComponentsWithStats(thresh, labels=labels, connectivity=8)
+        # Row 0 is the background component
+        stats = stats[1:]
+        boxes = stats[stats[:, cv2.CC_STAT_AREA] >= min_area, :cv2.CC_STAT_AREA]
+        return [tuple(box) for box in boxes.tolist()]
 
-        return detected_objects, processed_frame
+    def draw_detections(self, frame: np.ndarray, objects: List[Tuple[int, int, int, int]]) -> np.ndarray:
+        """
+        Draw bounding boxes onto the frame in place.
+        
+        Args:
+            frame (np.ndarray): Frame to draw on
+            objects (list): List of detected object coordinates
+            
+        Returns:
+            np.ndarray: The same frame, for chaining
+        """
+        for x, y, w, h in objects:
+            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+        return frame
 
-    def draw_debug_info(self, frame: np.ndarray, objects: List[Tuple[int, int, int, int]]) -> np.ndarray:
+    def draw_debug_info(self, frame: np.ndarray, objects: List[Tuple[int, int, int, int]],
+                        in_place: bool = False) -> np.ndarray:
         """
         Draw debug information on the frame.
         
         Args:
             frame (np.ndarray): Input frame
             objects (list): List of detected object coordinates
+            in_place (bool): Draw directly on the input frame instead of a copy
             
         Returns:
             np.ndarray: Frame with debug information
         """
-        debug_frame = frame.copy()
+        debug_frame = frame if in_place else frame.copy()
+        if self.roi is not None:
+            self.roi.draw(debug_frame)
         
         # Draw number of detected objects
         cv2.putText(debug_frame, f"Objects: {len(objects)}", 
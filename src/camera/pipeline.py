@@ -0,0 +1,137 @@
+from typing import Optional
+
+import cv2
+
+from src.camera.camera_handler import CameraHandler
+from src.camera.classifier import CropClassifier, TrackClassifier
+from src.camera.frame_source import DeviceSource, create_frame_source
+from src.camera.illumination import IlluminationChangeDetector
+from src.camera.object_detector import ObjectDetector
+from src.camera.roi import RegionOfInterest
+from src.camera.skip_policy import AdaptiveSkipPolicy
+from src.utils.config_loader import ConfigError
+from src.utils.frame_governor import FrameRateGovernor
+
+
+def configure_opencv(performance):
+    """
+    Apply the process-wide OpenCV settings (once per process, before building the pipeline).
+
+    Args:
+        performance: PerformanceConfig (opencv_threads)
+    """
+    if performance.opencv_threads is not None:
+        # Shared by detection, JPEG encoding and the OpenCV DNN classifier backend
+        cv2.setNumThreads(performance.opencv_threads)
+
+
+def build_camera(camera, performance, realtime: bool = True) -> CameraHandler:
+    """
+    Create the CameraHandler for one camera configuration.
+
+    Args:
+        camera: CameraConfig
+        performance: PerformanceConfig (capture buffer, drop policy, capture process and
+            frame skipping)
+        realtime (bool): Pace recorded sources at their frame rate; the detection loop
+            may then also cap the decode rate through CameraHandler.limit_rate()
+    """
+    resolution = (camera.width, camera.height)
+    if camera.source is not None:
+        source = create_frame_source(camera.source, resolution, realtime=realtime)
+    else:
+        source = DeviceSource(camera.device_id, resolution, camera.fps)
+    skip_policy = None
+    if performance.idle_fps > 0:
+        skip_policy = AdaptiveSkipPolicy(performance.idle_fps, performance.motion_hold,
+                                         performance.max_detect_load)
+    elif realtime:
+        # Only the decode rate cap set by the frame-rate governor
+        skip_policy = AdaptiveSkipPolicy(idle_fps=0.0, max_load=0.0)
+    return CameraHandler(source=source, buffer_size=performance.buffer_size,
+                         drop_policy=performance.drop_policy, capture_process=performance.capture_process,
+                         skip_policy=skip_policy)
+
+
+def build_governor(performance, realtime: bool = True) -> FrameRateGovernor:
+    """
+    Create the detection loop's frame-rate governor.
+
+    Args:
+        performance: PerformanceConfig (frame rates and CPU limits)
+        realtime (bool): False when processing recordings as fast as possible, which
+            keeps only the CPU temperature and load limits
+    """
+    return FrameRateGovernor(target_fps=performance.target_fps if realtime else 0.0,
+                             quiet_fps=performance.quiet_fps if realtime else 0.0,
+                             quiet_after=performance.quiet_after,
+                             max_temperature=performance.max_cpu_temperature,
+                             max_load=performance.max_cpu_load,
+                             thermal_zone=performance.thermal_zone)
+
+
+def build_illumination(detection, current: Optional[IlluminationChangeDetector] = None):
+    """Illumination-change guard for the detection settings (None when disabled)."""
+    if detection.illumination_change_fraction <= 0:
+        return None
+    guard = current or IlluminationChangeDetector()
+    guard.changed_fraction = detection.illumination_change_fraction
+    guard.brightness_jump = detection.illumination_brightness_jump
+    return guard
+
+
+def build_roi(detection, frame_shape=None) -> Optional[RegionOfInterest]:
+    """
+    Include/exclude zones of the detection settings (None when the whole frame is watched).
+
+    Args:
+        detection: DetectionConfig
+        frame_shape (tuple): Configured (height, width) of the camera to check the zones against
+
+    Raises:
+        ConfigError: If the mask image cannot be read or the zones leave nothing to watch
+    """
+    if not (detection.include_zones or detection.exclude_zones or detection.mask_image):
+        return None
+    try:
+        roi = RegionOfInterest(detection.include_zones, detection.exclude_zones, detection.mask_image)
+        if frame_shape is not None:
+            roi.validate(frame_shape)
+    except ValueError as e:
+        raise ConfigError(f"detection zones: {e}") from e
+    return roi
+
+
+def build_detector(detection, performance) -> ObjectDetector:
+    """Create the motion detector (boxes only, no rendering) for the detection settings."""
+    roi = build_roi(detection)
+    return ObjectDetector(min_area=detection.min_area, threshold=detection.threshold,
+                          blur_size=detection.blur_size, dilate_iterations=detection.dilate_iterations,
+                          detection_scale=performance.detection_scale,
+                          background_model=detection.background_model,
+                          extraction=detection.extraction, roi=roi,
+                          illumination=build_illumination(detection), render=False)
+
+
+def build_classifier(detection) -> Optional[TrackClassifier]:
+    """Second stage classifying motion crops of tracked objects, if a model is configured."""
+    if not detection.classifier_model:
+        return None
+    size = detection.classifier_input_size
+    model = CropClassifier(detection.classifier_model, detection.classifier_labels, (size, size),
+                           detection.classifier_backend, detection.classifier_config)
+    return TrackClassifier(model, detection.confidence_threshold)
+
+
+def apply_detection_settings(detection, detector: ObjectDetector,
+                             classifier: Optional[TrackClassifier] = None):
+    """Apply reloadable detection settings without re-learning the background."""
+    detector.min_area = detection.min_area
+    detector.threshold = detection.threshold
+    detector.blur_size = detection.blur_size
+    detector.dilate_iterations = detection.dilate_iterations
+    detector.illumination = build_illumination(detection, detector.illumination)
+    if detector.illumination is None:
+        detector.background_model.set_fast_adaptation(False)
+    if classifier is not None:
+        classifier.confidence_threshold = detection.confidence_threshold
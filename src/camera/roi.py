@@ -0,0 +1,112 @@
+import cv2
+import numpy as np
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+Polygon = Sequence[Sequence[int]]
+
+
+class RegionOfInterest:
+    """Include/exclude zones limiting where ObjectDetector looks for motion.
+
+    The watched area is the union of the include polygons and the white part of an
+    optional mask image (the whole frame if neither is given), minus the exclude
+    polygons. ObjectDetector crops each frame to the bounding rectangle of that area
+    before any processing and clears the remaining masked-out pixels from the
+    foreground mask.
+    """
+
+    def __init__(self, include: Optional[Sequence[Polygon]] = None,
+                 exclude: Optional[Sequence[Polygon]] = None,
+                 mask_image: Optional[Union[str, Path]] = None):
+        """
+        Args:
+            include (list): Polygons [[x, y], ...] in frame pixels to watch
+            exclude (list): Polygons [[x, y], ...] in frame pixels to ignore (e.g. trees, a road)
+            mask_image: Grayscale image, white where motion counts and black where it is
+                ignored; scaled to the frame size
+        """
+        self.include = [self._to_points(polygon) for polygon in include or []]
+        self.exclude = [self._to_points(polygon) for polygon in exclude or []]
+        self.mask_image = None
+        if mask_image is not None:
+            self.mask_image = cv2.imread(str(mask_image), cv2.IMREAD_GRAYSCALE)
+            if self.mask_image is None:
+                raise ValueError(f"Cannot read ROI mask image {mask_image}")
+        # (frame height, width) -> (window rect, full-resolution mask of the window or None)
+        self._windows: Dict[Tuple[int, int], Tuple[Tuple[int, int, int, int], Optional[np.ndarray]]] = {}
+        self._scaled_masks: Dict[Tuple[int, ...], np.ndarray] = {}
+
+    @staticmethod
+    def _to_points(polygon: Polygon) -> np.ndarray:
+        points = np.asarray(polygon, dtype=np.int32).reshape(-1, 2)
+        if len(points) < 3:
+            raise ValueError("ROI polygons need at least 3 points")
+        return points
+
+    def mask(self, frame_shape: Tuple[int, ...]) -> np.ndarray:
+        """Full-frame mask (uint8, 255 where motion counts) for a frame of the given shape."""
+        height, width = frame_shape[:2]
+        if self.include or self.mask_image is not None:
+            mask = np.zeros((height, width), np.uint8)
+            if self.include:
+                cv2.fillPoly(mask, self.include, 255)
+            if self.mask_image is not None:
+                image = cv2.resize(self.mask_image, (width, height), interpolation=cv2.INTER_NEAREST)
+                mask[image > 127] = 255
+        else:
+            mask = np.full((height, width), 255, np.uint8)
+        if self.exclude:
+            cv2.fillPoly(mask, self.exclude, 0)
+        return mask
+
+    def validate(self, frame_shape: Tuple[int, ...]):
+        """Raise ValueError if the zones leave nothing of a frame of the given shape to watch."""
+        self._window(frame_shape)
+
+    def window(self, frame_shape: Tuple[int, ...]) -> Tuple[int, int, int, int]:
+        """Bounding rectangle (x, y, w, h) of the watched area."""
+        return self._window(frame_shape)[0]
+
+    def _window(self, frame_shape: Tuple[int, ...]):
+        key = tuple(frame_shape[:2])
+        window = self._windows.get(key)
+        if window is None:
+            mask = self.mask(frame_shape)
+            x, y, w, h = cv2.boundingRect(mask)
+            if w == 0 or h == 0:
+                raise ValueError("ROI excludes the whole frame")
+            cropped = mask[y:y + h, x:x + w]
+            # A plain rectangle needs no per-pixel masking after the crop
+            window = ((x, y, w, h), None if cropped.all() else cropped.copy())
+            self._windows[key] = window
+        return window
+
+    def analysis_mask(self, frame_shape: Tuple[int, ...], shape: Tuple[int, ...]) -> Optional[np.ndarray]:
+        """
+        Mask of the window resized to the detector's analysis resolution.
+
+        Args:
+            frame_shape (tuple): Shape of the full frame
+            shape (tuple): Shape of the foreground mask computed for the cropped window
+
+        Returns:
+            np.ndarray: uint8 mask of the given shape, or None if the whole window is watched
+        """
+        cropped = self._window(frame_shape)[1]
+        if cropped is None:
+            return None
+        key = tuple(frame_shape[:2]) + tuple(shape[:2])
+        mask = self._scaled_masks.get(key)
+        if mask is None:
+            mask = cv2.resize(cropped, (shape[1], shape[0]), interpolation=cv2.INTER_NEAREST)
+            self._scaled_masks[key] = mask
+        return mask
+
+    def draw(self, frame: np.ndarray) -> np.ndarray:
+        """Outline include zones in green and exclude zones in red, in place."""
+        if self.include:
+            cv2.polylines(frame, self.include, True, (0, 255, 0), 1)
+        if self.exclude:
+            cv2.polylines(frame, self.exclude, True, (0, 0, 255), 1)
+        return frame
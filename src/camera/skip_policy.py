@@ -0,0 +1,118 @@
+import logging
+from typing import Any, Dict, Optional
+
+
+class AdaptiveSkipPolicy:
+    """Chooses which grabbed frames are decoded and analyzed.
+
+    The capture side grabs every frame so the device buffer never falls behind, but
+    while the scene is quiet only ``idle_fps`` frames per second are decoded. Motion
+    reported by the consumer switches to the full frame rate for ``motion_hold``
+    seconds. The decode rate is always capped at what the detector sustains
+    (``max_load`` divided by the mean analysis time), so frames that the capture buffer
+    would only drop are never decoded. The consumer may also set ``max_fps`` to the rate
+    it processes frames at (the frame-rate governor's limit), which caps decoding as well.
+
+    decide() runs on the capture side and report() on the consumer side; both only
+    assign plain attributes, so no lock is needed between the two threads.
+    """
+
+    def __init__(self, idle_fps: float = 3.0, motion_hold: float = 2.0, max_load: float = 0.8,
+                 smoothing: float = 0.1):
+        """
+        Args:
+            idle_fps (float): Frames decoded per second while no motion was seen recently
+            motion_hold (float): Seconds to stay at full rate after the last motion
+            max_load (float): Fraction of the time the detector may be busy
+            smoothing (float): Weight of the newest sample in the mean analysis time
+        """
+        self.idle_fps = idle_fps
+        self.motion_hold = motion_hold
+        self.max_load = max_load
+        self.smoothing = smoothing
+        self.analysis_seconds: Optional[float] = None
+        self.max_fps = 0.0
+        self.decoded = 0
+        self.skipped = 0
+        self._motion_reported = False
+        self._last_motion: Optional[float] = None
+        self._last_decode: Optional[float] = None
+        self._credit = 0.0
+        self._credit_time: Optional[float] = None
+        self._moving = False
+        self.logger = logging.getLogger('AdaptiveSkipPolicy')
+
+    def report(self, motion: bool, seconds: float):
+        """
+        Feed back the analysis of a decoded frame.
+
+        Args:
+            motion (bool): The frame contained moving objects
+            seconds (float): Time spent analyzing it
+        """
+        if motion:
+            self._motion_reported = True
+        if self.analysis_seconds is None:
+            self.analysis_seconds = seconds
+        else:
+            self.analysis_seconds += self.smoothing * (seconds - self.analysis_seconds)
+
+    def interval(self, now: float) -> float:
+        """Minimum time between decoded frames at the given time."""
+        moving = self._last_motion is not None and now - self._last_motion < self.motion_hold
+        if moving != self._moving:
+            self._moving = moving
+            self.logger.debug("Motion, decoding at full rate" if moving else "Scene quiet, decoding at idle rate")
+        interval = 0.0 if moving or self.idle_fps <= 0 else 1.0 / self.idle_fps
+        if self.analysis_seconds is not None and self.max_load > 0:
+            interval = max(interval, self.analysis_seconds / self.max_load)
+        return interval
+
+    def decide(self, now: float) -> bool:
+        """
+        Decide whether the frame just grabbed is decoded.
+
+        Args:
+            now (float): Timestamp of the frame on the source's clock
+
+        Returns:
+            bool: True to decode and analyze the frame, False to skip it
+        """
+        # Motion is stamped on the capture side's clock, which may be a recording's timeline
+        if self._motion_reported:
+            self._motion_reported = False
+            self._last_motion = now
+        if self._last_decode is not None and now - self._last_decode < self.interval(now) \
+                or not self._take_credit(now):
+            self.skipped += 1
+            return False
+        self._last_decode = now
+        self.decoded += 1
+        return True
+
+    def _take_credit(self, now: float) -> bool:
+        """Token bucket enforcing max_fps on average.
+
+        Up to two frames of credit are kept, so a limit that the camera's frame interval
+        does not divide (20 fps from 30) is met on average instead of rounding down to
+        every other frame.
+        """
+        if self.max_fps <= 0:
+            self._credit_time = None
+            return True
+        if self._credit_time is None:
+            self._credit = 1.0
+        else:
+            self._credit = min(2.0, self._credit + (now - self._credit_time) * self.max_fps)
+        self._credit_time = now
+        if self._credit < 1.0:
+            return False
+        self._credit -= 1.0
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'decoded': self.decoded,
+            'skipped': self.skipped,
+            'avg_analysis_ms': (self.analysis_seconds or 0.0) * 1000.0,
+        }
@@ -0,0 +1,350 @@
+import time
+import signal
+import threading
+import logging
+import multiprocessing
+from datetime import datetime
+from multiprocessing.connection import Connection, wait
+from typing import Any, Dict, Optional
+
+from src.camera.pipeline import (apply_detection_settings, build_camera, build_classifier, build_detector,
+                                 build_governor, configure_opencv)
+from src.camera.tracker import ObjectTracker, TrackEvent
+from src.utils.clip_recorder import EventClipRecorder
+
+
+class _ParentLink:
+    """Worker-side stand-in for the storage objects living in the supervisor process.
+
+    EventClipRecorder reports clips through ``index.add_clip`` and ``on_saved``; both
+    calls are forwarded over the worker's pipe and replayed on the real objects. Sends
+    are serialized because the clip writer thread shares the pipe with the main loop.
+    """
+
+    def __init__(self, conn: Connection):
+        self.conn = conn
+        self._lock = threading.Lock()
+
+    def send(self, kind: str, *args, **kwargs):
+        with self._lock:
+            self.conn.send((kind, args, kwargs))
+
+    def add_clip(self, *args, **kwargs):
+        self.send('add_clip', *args, **kwargs)
+
+    def register_clip(self, *args):
+        self.send('register_clip', *args)
+
+
+def camera_worker(camera, config, conn: Connection, realtime: bool = True):
+    """
+    Capture-and-detect loop of one camera, run in its own process by CameraSupervisor.
+
+    Finished tracks, clip metadata and periodic stats are sent to the supervisor over
+    ``conn``; the supervisor sends back new DetectionConfig objects on reload and None
+    to stop. The process exits with code 0 when stopped or when a recorded source ends
+    and with a non-zero code on failure.
+
+    Args:
+        camera: CameraConfig of this worker (named)
+        config: AppConfig with the shared detection, storage and performance settings
+        conn (Connection): Worker end of the pipe to the supervisor
+        realtime (bool): Pace recorded sources at their frame rate
+    """
+    # Shutdown is requested by the supervisor, not by the terminal's or systemd's signals
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    logging.basicConfig(level=logging.INFO, format=f"%(levelname)s:{camera.name}:%(name)s:%(message)s")
+    logger = logging.getLogger('camera_worker')
+
+    configure_opencv(config.performance)
+    handler = build_camera(camera, config.performance, realtime)
+    detector = build_detector(config.detection, config.performance)
+    tracker = ObjectTracker()
+    classifier = build_classifier(config.detection)
+    governor = build_governor(config.performance, realtime)
+    link = _ParentLink(conn)
+    recorder = None
+    if config.storage.clips:
+        recorder = EventClipRecorder(config.storage.base_path, index=link, on_saved=link.register_clip,
+                                     camera=camera.name)
+    if not handler.initialize():
+        logger.error("Failed to initialize camera")
+        raise SystemExit(2)
+    handler.start_capture()
+
+    counters = {'frames_processed': 0, 'detections': 0, 'detect_seconds': 0.0,
+                'tracks_sent': 0, 'tracks_discarded': 0}
+
+    def send_track(track):
+        if track.best_frame is None:
+            return
+        if classifier is not None and not classifier.accepts(track):
+            logger.info(f"Discarding track {track.track_id}: best label {track.label} ({track.confidence:.2f})")
+            counters['tracks_discarded'] += 1
+            return
+        label = track.label if classifier is not None else None
+        link.send('track', track.best_frame, track.best_bbox, track.best_timestamp, track.track_id,
+                  label, track.confidence if label is not None else None)
+        counters['tracks_sent'] += 1
+
+    def send_stats():
+        stats = dict(counters, **handler.stats())
+        stats['illumination_changes'] = detector.illumination_changes
+        stats['illumination_suppressed_frames'] = detector.illumination_suppressed_frames
+        if classifier is not None:
+            stats['classifier_inferences'] = classifier.inferences
+            stats['classifier_crops'] = classifier.crops_classified
+            stats['classifier_seconds'] = classifier.total_seconds
+        stats['effective_fps'] = governor.effective_fps
+        stats['fps_limit'] = governor.fps
+        stats['duty'] = governor.duty
+        link.send('stats', stats)
+
+    logger.info("Starting detection loop")
+    last_stats = time.monotonic()
+    try:
+        while True:
+            # Control messages: a new DetectionConfig on reload, None to stop
+            stop = False
+            while conn.poll():
+                message = conn.recv()
+                if message is None:
+                    stop = True
+                    break
+                apply_detection_settings(message, detector, classifier)
+                logger.info("Applied reloaded detection settings")
+            if stop:
+                break
+
+            # Below the camera's rate on purpose: process the newest frame, not a stale one
+            success, frame = handler.next(timeout=1.0, newest=realtime and governor.limited)
+            if not success:
+                if handler.finished:
+                    logger.info("End of frame source reached")
+                    break
+                logger.error("No frame received from camera")
+                continue
+
+            start = time.perf_counter()
+            objects, _ = detector.detect_objects(frame)
+            elapsed = time.perf_counter() - start
+            motion = bool(objects)
+            handler.report(motion, elapsed)
+            counters['detect_seconds'] += elapsed
+            counters['frames_processed'] += 1
+            counters['detections'] += len(objects)
+
+            events = tracker.update(objects, frame)
+            if classifier is not None:
+                classifier.update(frame, [event.track for event in events if event.kind != TrackEvent.END])
+            for event in events:
+                if event.kind == TrackEvent.END:
+                    send_track(event.track)
+                elif recorder is not None:
+                    recorder.trigger(event.track.bbox)
+            if recorder is not None:
+                recorder.add_frame(frame)
+
+            if time.monotonic() - last_stats >= 1.0:
+                send_stats()
+                last_stats = time.monotonic()
+            governor.pace(motion, time.perf_counter() - start)
+            if realtime:
+                handler.limit_rate(governor.capture_fps)
+    finally:
+        handler.release()
+        try:
+            for event in tracker.finish():
+                send_track(event.track)
+            if recorder is not None:
+                # The clip writer reports through the pipe closed below
+                recorder.close()
+            send_stats()
+        except OSError as e:
+            logger.error(f"Lost connection to the supervisor: {e}")
+        conn.close()
+
+
+class _Worker:
+    """Supervisor-side state of one camera process."""
+
+    def __init__(self, camera):
+        self.camera = camera
+        self.process = None
+        self.conn: Optional[Connection] = None
+        self.started_at = 0.0
+        self.restart_at: Optional[float] = None
+        self.backoff = 0.0
+        self.restarts = 0
+        self.finished = False
+        self.stats: Dict[str, Any] = {}
+
+
+class CameraSupervisor:
+    """Runs one capture-and-detect process per camera and feeds a shared ImageStorage.
+
+    Each camera gets its own spawned process (so detection scales past the GIL) and its
+    own pipe. Finished tracks and clip metadata arrive over the pipes and are saved
+    through the single ImageStorage/uploader of the main process, under per-camera
+    subdirectories. A worker that crashes or fails to open its camera is restarted with
+    exponential backoff without affecting the others; a worker whose recorded source
+    ended is not restarted.
+    """
+
+    def __init__(self, config, storage, realtime: bool = True, restart_delay: float = 1.0,
+                 max_restart_delay: float = 60.0, stable_after: float = 60.0):
+        """
+        Args:
+            config: AppConfig; every entry of config.camera_list() gets a worker
+            storage: ImageStorage receiving the captures and clips of all cameras
+            realtime (bool): Pace recorded sources at their frame rate
+            restart_delay (float): Delay before the first restart of a failed worker
+            max_restart_delay (float): Upper bound of the doubling restart delay
+            stable_after (float): Seconds a worker must run before its delay is reset
+        """
+        self.logger = logging.getLogger('CameraSupervisor')
+        self.config = config
+        self.storage = storage
+        self.realtime = realtime
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.stable_after = stable_after
+        self._context = multiprocessing.get_context('spawn')
+        self.workers: Dict[str, _Worker] = {camera.name: _Worker(camera) for camera in config.camera_list()}
+
+    @property
+    def running(self) -> bool:
+        """False once every worker has finished its source."""
+        return not all(worker.finished for worker in self.workers.values())
+
+    def start(self):
+        for worker in self.workers.values():
+            self._spawn(worker)
+
+    def _spawn(self, worker: _Worker):
+        parent_conn, child_conn = self._context.Pipe()
+        # Not daemonic, so that a worker can start its own capture process
+        worker.process = self._context.Process(target=camera_worker, name=f'camera-{worker.camera.name}',
+                                               args=(worker.camera, self.config, child_conn, self.realtime))
+        worker.process.start()
+        child_conn.close()
+        worker.conn = parent_conn
+        worker.started_at = time.monotonic()
+        worker.restart_at = None
+        self.logger.info(f"Started camera {worker.camera.name} (pid {worker.process.pid})")
+
+    def poll(self, timeout: float = 0.5):
+        """
+        Handle messages from the workers for up to timeout seconds, then restart failed ones.
+
+        Args:
+            timeout (float): Maximum time to wait for messages
+        """
+        connections = {worker.conn: worker for worker in self.workers.values() if worker.conn is not None}
+        if connections:
+            for conn in wait(list(connections), timeout):
+                self._receive(connections[conn])
+        else:
+            time.sleep(timeout)
+        self._check_workers()
+
+    def _receive(self, worker: _Worker):
+        """Drain the messages a worker has sent; a closed pipe means the process is exiting."""
+        try:
+            while worker.conn.poll():
+                kind, args, kwargs = worker.conn.recv()
+                self._dispatch(worker, kind, args, kwargs)
+        except (EOFError, OSError):
+            worker.conn.close()
+            worker.conn = None
+        except Exception as e:
+            self.logger.error(f"Bad message from camera {worker.camera.name}: {e}")
+
+    def _dispatch(self, worker: _Worker, kind: str, args: tuple, kwargs: dict):
+        name = worker.camera.name
+        if kind == 'track':
+            frame, bbox, timestamp, track_id, label, confidence = args
+            self.storage.save_capture(frame, bbox, datetime.fromtimestamp(timestamp), track_id,
+                                      label, confidence, camera=name)
+        elif kind == 'add_clip':
+            self.storage.index.add_clip(*args, **kwargs)
+        elif kind == 'register_clip':
+            self.storage.register_clip(*args)
+        elif kind == 'stats':
+            worker.stats = args[0]
+
+    def _check_workers(self):
+        now = time.monotonic()
+        for worker in self.workers.values():
+            if worker.finished:
+                continue
+            if worker.process is None:
+                if worker.restart_at is not None and now >= worker.restart_at:
+                    worker.restarts += 1
+                    self._spawn(worker)
+                continue
+            if worker.process.is_alive():
+                continue
+            # Read what the worker sent before exiting
+            if worker.conn is not None:
+                self._receive(worker)
+                if worker.conn is not None:
+                    worker.conn.close()
+                    worker.conn = None
+            exitcode = worker.process.exitcode
+            worker.process.join()
+            worker.process = None
+            if exitcode == 0:
+                worker.finished = True
+                self.logger.info(f"Camera {worker.camera.name} finished")
+                continue
+            if now - worker.started_at >= self.stable_after:
+                worker.backoff = 0.0
+            worker.backoff = min(self.max_restart_delay, worker.backoff * 2 or self.restart_delay)
+            worker.restart_at = now + worker.backoff
+            self.logger.error(f"Camera {worker.camera.name} exited with code {exitcode}, "
+                              f"restarting in {worker.backoff:.0f}s")
+
+    def reload(self, detection):
+        """Send new detection settings to all running workers."""
+        for worker in self.workers.values():
+            if worker.conn is not None:
+                try:
+                    worker.conn.send(detection)
+                except OSError:
+                    pass
+        # Restarted workers pick up the new settings too
+        self.config.detection = detection
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Latest stats reported by each worker, with liveness and restart counts."""
+        return {name: dict(worker.stats, alive=worker.process is not None and worker.process.is_alive(),
+                           restarts=worker.restarts)
+                for name, worker in self.workers.items()}
+
+    def stop(self, timeout: float = 30.0):
+        """Ask all workers to finish their tracks and exit, keep saving their output meanwhile."""
+        for worker in self.workers.values():
+            worker.restart_at = None
+            if worker.conn is not None:
+                try:
+                    worker.conn.send(None)
+                except OSError:
+                    pass
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and any(w.conn is not None for w in self.workers.values()):
+            connections = {w.conn: w for w in self.workers.values() if w.conn is not None}
+            for conn in wait(list(connections), max(0.0, deadline - time.monotonic())):
+                self._receive(connections[conn])
+        for worker in self.workers.values():
+            if worker.process is None:
+                continue
+            worker.process.join(max(0.0, deadline - time.monotonic()))
+            if worker.process.is_alive():
+                self.logger.warning(f"Camera {worker.camera.name} did not stop, killing it")
+                worker.process.kill()
+                worker.process.join(1.0)
+            worker.process = None
+            worker.finished = True
@@ -0,0 +1,254 @@
+import time
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+BBox = Tuple[int, int, int, int]
+
+
+def iou(a: BBox, b: BBox) -> float:
+    """Intersection over union of two (x, y, w, h) boxes."""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    intersection = ix * iy
+    union = aw * ah + bw * bh - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+def centroid(box: BBox) -> Tuple[float, float]:
+    x, y, w, h = box
+    return x + w / 2.0, y + h / 2.0
+
+
+class Track:
+    """A detected object followed across frames."""
+
+    def __init__(self, track_id: int, bbox: BBox, timestamp: float, use_kalman: bool = False):
+        """
+        Args:
+            track_id (int): Persistent identifier
+            bbox (tuple): First bounding box (x, y, w, h)
+            timestamp (float): Time of the first detection
+            use_kalman (bool): Predict the next position with a constant-velocity Kalman filter
+        """
+        self.track_id = track_id
+        self.bbox = bbox
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+        self.hits = 1
+        self.misses = 0
+        self.confirmed = False
+
+        # Best observation so far, kept for a single save per track
+        self.best_bbox = bbox
+        self.best_score = -1.0
+        self.best_frame: Optional[np.ndarray] = None
+        self.best_timestamp = timestamp
+
+        # Set by TrackClassifier when a classification stage is enabled
+        self.label: Optional[str] = None
+        self.confidence = 0.0
+        self.classification_attempts = 0
+        self.classified_at_hit = 0
+
+        self.kalman = self._create_kalman(bbox) if use_kalman else None
+
+    @staticmethod
+    def _create_kalman(bbox: BBox) -> cv2.KalmanFilter:
+        # State: (cx, cy, vx, vy); measurement: (cx, cy)
+        kalman = cv2.KalmanFilter(4, 2)
+        kalman.transitionMatrix = np.array([[1, 0, 1, 0], [0, 1, 0, 1], [0, 0, 1, 0], [0, 0, 0, 1]], np.float32)
+        kalman.measurementMatrix = np.array([[1, 0, 0, 0], [0, 1, 0, 0]], np.float32)
+        kalman.processNoiseCov = np.eye(4, dtype=np.float32) * 1e-2
+        kalman.measurementNoiseCov = np.eye(2, dtype=np.float32) * 1.0
+        cx, cy = centroid(bbox)
+        kalman.statePost = np.array([[cx], [cy], [0], [0]], np.float32)
+        return kalman
+
+    def predict(self) -> BBox:
+        """Expected box in the next frame (the last box when Kalman prediction is off)."""
+        if self.kalman is None:
+            return self.bbox
+        cx, cy = self.kalman.predict()[:2, 0]
+        x, y, w, h = self.bbox
+        return int(cx - w / 2.0), int(cy - h / 2.0), w, h
+
+    def update(self, bbox: BBox, timestamp: float):
+        self.bbox = bbox
+        self.last_seen = timestamp
+        self.hits += 1
+        self.misses = 0
+        if self.kalman is not None:
+            cx, cy = centroid(bbox)
+            self.kalman.correct(np.array([[cx], [cy]], np.float32))
+
+    def offer_frame(self, frame: Optional[np.ndarray], bbox: BBox, timestamp: float):
+        """Keep a private copy of the frame if this observation is the best so far.
+
+        Larger boxes that do not touch the frame border score higher, so the saved
+        image shows the whole animal as close to the camera as it came.
+        """
+        x, y, w, h = bbox
+        score = float(w * h)
+        if frame is not None:
+            height, width = frame.shape[:2]
+            if x <= 0 or y <= 0 or x + w >= width or y + h >= height:
+                score *= 0.5
+        if score <= self.best_score:
+            return
+        self.best_score = score
+        self.best_bbox = bbox
+        self.best_timestamp = timestamp
+        if frame is None:
+            return
+        if self.best_frame is None or self.best_frame.shape != frame.shape:
+            self.best_frame = frame.copy()
+        else:
+            np.copyto(self.best_frame, frame)
+
+    @property
+    def duration(self) -> float:
+        return self.last_seen - self.first_seen
+
+
+class TrackEvent:
+    """Lifecycle notification emitted by ObjectTracker.update."""
+
+    START = 'start'
+    UPDATE = 'update'
+    END = 'end'
+
+    def __init__(self, kind: str, track: Track):
+        self.kind = kind
+        self.track = track
+
+    def __repr__(self):
+        return f"TrackEvent({self.kind}, track={self.track.track_id})"
+
+
+class ObjectTracker:
+    """Associates per-frame detections into persistent tracks using IoU and centroid distance."""
+
+    def __init__(self, iou_threshold: float = 0.3, max_distance: float = 80.0, max_missed: int = 15,
+                 min_hits: int = 3, use_kalman: bool = False, keep_best_frame: bool = True):
+        """
+        Initialize the tracker.
+
+        Args:
+            iou_threshold (float): Minimum IoU to associate a detection with a track
+            max_distance (float): Maximum centroid distance in pixels for the fallback association
+            max_missed (int): Frames a track may go undetected before it ends
+            min_hits (int): Detections needed before a track is confirmed and reported
+            use_kalman (bool): Associate against Kalman-predicted positions
+            keep_best_frame (bool): Keep a copy of each track's best frame for saving
+        """
+        self.iou_threshold = iou_threshold
+        self.max_distance = max_distance
+        self.max_missed = max_missed
+        self.min_hits = min_hits
+        self.use_kalman = use_kalman
+        self.keep_best_frame = keep_best_frame
+        self.tracks: Dict[int, Track] = {}
+        self._next_id = 1
+        self.logger = logging.getLogger('ObjectTracker')
+
+    def update(self, detections: List[BBox], frame: Optional[np.ndarray] = None,
+               timestamp: Optional[float] = None) -> List[TrackEvent]:
+        """
+        Associate the detections of one frame with existing tracks.
+
+        Args:
+            detections (list): Bounding boxes [(x, y, w, h)] from ObjectDetector
+            frame (np.ndarray): Frame the detections come from, used for best-frame selection
+            timestamp (float): Frame time (default: now)
+
+        Returns:
+            list: TrackEvents for tracks that started, were updated or ended in this frame
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        events = []
+        track_ids = list(self.tracks)
+        predicted = [self.tracks[track_id].predict() for track_id in track_ids]
+        matches = self._associate(predicted, detections)
+
+        matched_tracks = set()
+        matched_detections = set()
+        for track_index, detection_index in matches:
+            track = self.tracks[track_ids[track_index]]
+            bbox = detections[detection_index]
+            track.update(bbox, timestamp)
+            self._observe(track, frame, bbox, timestamp, events)
+            matched_tracks.add(track_index)
+            matched_detections.add(detection_index)
+
+        # Age unmatched tracks and end the ones that disappeared
+        for track_index, track_id in enumerate(track_ids):
+            if track_index in matched_tracks:
+                continue
+            track = self.tracks[track_id]
+            track.misses += 1
+            if track.misses > self.max_missed:
+                del self.tracks[track_id]
+                if track.confirmed:
+                    events.append(TrackEvent(TrackEvent.END, track))
+
+        # Unmatched detections start new tracks
+        for detection_index, bbox in enumerate(detections):
+            if detection_index in matched_detections:
+                continue
+            track = Track(self._next_id, bbox, timestamp, self.use_kalman)
+            self._next_id += 1
+            self.tracks[track.track_id] = track
+            self._observe(track, frame, bbox, timestamp, events)
+
+        return events
+
+    def _observe(self, track: Track, frame: Optional[np.ndarray], bbox: BBox,
+                 timestamp: float, events: List[TrackEvent]):
+        if track.confirmed:
+            events.append(TrackEvent(TrackEvent.UPDATE, track))
+        elif track.hits >= self.min_hits:
+            track.confirmed = True
+            self.logger.info(f"Track {track.track_id} started")
+            events.append(TrackEvent(TrackEvent.START, track))
+        # Only confirmed tracks hold frame copies, so flickering noise costs no memory
+        if self.keep_best_frame and track.confirmed:
+            track.offer_frame(frame, bbox, timestamp)
+
+    def _associate(self, predicted: List[BBox], detections: List[BBox]) -> List[Tuple[int, int]]:
+        """Greedy matching: highest IoU pairs first, then nearest centroids for the rest."""
+        if not predicted or not detections:
+            return []
+
+        candidates = []
+        for t, track_box in enumerate(predicted):
+            for d, detection in enumerate(detections):
+                overlap = iou(track_box, detection)
+                if overlap >= self.iou_threshold:
+                    candidates.append((1.0 + overlap, t, d))
+                else:
+                    (tx, ty), (dx, dy) = centroid(track_box), centroid(detection)
+                    distance = ((tx - dx) ** 2 + (ty - dy) ** 2) ** 0.5
+                    if distance <= self.max_distance:
+                        # Always ranked below any IoU match
+                        candidates.append((1.0 - distance / (self.max_distance + 1.0), t, d))
+
+        matches = []
+        used_tracks, used_detections = set(), set()
+        for _, t, d in sorted(candidates, reverse=True):
+            if t in used_tracks or d in used_detections:
+                continue
+            used_tracks.add(t)
+            used_detections.add(d)
+            matches.append((t, d))
+        return matches
+
+    def finish(self) -> List[TrackEvent]:
+        """End all active tracks (e.g. on shutdown) and return their END events."""
+        events = [TrackEvent(TrackEvent.END, track) for track in self.tracks.values() if track.confirmed]
+        self.tracks.clear()
+        return events
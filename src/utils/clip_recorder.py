@@ -0,0 +1,248 @@
+import threading
+import time
+import queue
+import logging
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Deque, List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+
+class EventClipRecorder:
+    """Records video clips of detection events including the seconds before they started.
+
+    A memory-bounded pre-roll ring keeps the last ``pre_roll`` seconds of frames as JPEG
+    bytes (optionally downscaled). When an event is triggered, the pre-roll, the event
+    itself and ``post_roll`` seconds after the last trigger are written with
+    cv2.VideoWriter on a background thread. Clips play back in real time whatever rate
+    the frames arrived at: each buffered frame is repeated (or, rarely, skipped) to fill
+    the output slots between its timestamp and the next one.
+
+    Memory stays bounded under continuous motion and slow storage: a clip is cut once its
+    frames reach ``max_event_mb`` (the next trigger starts a new one), and at most
+    ``max_pending_clips`` finished clips wait for the writer; further clips are dropped.
+    """
+
+    def __init__(self, base_path: Union[str, Path] = "storage", pre_roll: float = 5.0,
+                 post_roll: float = 5.0, fps: float = 10.0, scale: float = 1.0,
+                 jpeg_quality: int = 80, max_buffer_mb: float = 64.0, max_clip_seconds: float = 120.0,
+                 max_event_mb: float = 256.0, max_pending_clips: int = 2, fourcc: str = 'mp4v', index: Any = None,
+                 on_saved: Optional[Callable[[str, Path, int], None]] = None, camera: Optional[str] = None):
+        """
+        Initialize the clip recorder.
+
+        Args:
+            base_path: Base storage directory; clips go to <base_path>/clips/[<camera>/]<date>/
+            pre_roll (float): Seconds of frames kept before an event
+            post_roll (float): Seconds recorded after the last trigger
+            fps (float): Frame rate of the stored frames and clips; faster input is subsampled,
+                slower input (skipped or throttled frames) is repeated
+            scale (float): Downscale factor applied before buffering (1.0 keeps full resolution)
+            jpeg_quality (int): JPEG quality of buffered frames
+            max_buffer_mb (float): Upper bound for the pre-roll ring size in megabytes
+            max_clip_seconds (float): Clips are cut after this duration even if triggers continue
+            max_event_mb (float): Clips are cut when their buffered frames reach this many megabytes
+            max_pending_clips (int): Finished clips that may wait for the writer before new ones are dropped
+            fourcc (str): FourCC code of the output video codec
+            index: Optional MetadataIndex receiving clip metadata
+            on_saved: Optional callback (clip_id, path, size_bytes) for every written clip
+                (e.g. ImageStorage.register_clip for budget accounting and upload)
+            camera (str): Camera name used as clip subdirectory and clip ID prefix
+        """
+        self.logger = logging.getLogger(__name__)
+        self.clips_path = Path(base_path) / "clips"
+        if camera:
+            self.clips_path /= camera
+        self.camera = camera
+        self.pre_roll = pre_roll
+        self.post_roll = post_roll
+        self.fps = fps
+        self.scale = scale
+        self.jpeg_quality = jpeg_quality
+        self.max_buffer_bytes = int(max_buffer_mb * 1024 * 1024)
+        self.max_clip_seconds = max_clip_seconds
+        self.max_event_bytes = int(max_event_mb * 1024 * 1024)
+        self.fourcc = fourcc
+        self.index = index
+        self.on_saved = on_saved
+
+        # Pre-roll ring of (timestamp, jpeg bytes)
+        self._ring: Deque[Tuple[float, bytes]] = deque()
+        self._ring_bytes = 0
+        self._last_buffered = 0.0
+
+        # Active event state
+        self._event_frames: Optional[List[Tuple[float, bytes]]] = None
+        self._event_bytes = 0
+        self._event_start = 0.0
+        self._event_deadline = 0.0
+        self._event_bbox = None
+
+        self._jobs = queue.Queue(max_pending_clips)
+        self._writer = threading.Thread(target=self._writer_loop, name='clip-writer', daemon=True)
+        self._writer.start()
+        self.clips_written = 0
+        self.clips_dropped = 0
+
+    @property
+    def recording(self) -> bool:
+        return self._event_frames is not None
+
+    def add_frame(self, frame: np.ndarray, timestamp: Optional[float] = None):
+        """
+        Offer a frame to the recorder; called for every captured frame.
+
+        Args:
+            frame (np.ndarray): Current frame (not retained; it is encoded immediately)
+            timestamp (float): Frame time (default: now)
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        if timestamp - self._last_buffered < 1.0 / self.fps:
+            self._check_event_end(timestamp)
+            return
+        self._last_buffered = timestamp
+
+        encoded = self._encode(frame)
+        if encoded is None:
+            return
+        entry = (timestamp, encoded)
+
+        if self._event_frames is not None:
+            self._event_frames.append(entry)
+            self._event_bytes += len(encoded)
+            if self._event_bytes >= self.max_event_bytes:
+                self.logger.warning("Event clip reached its memory limit, cutting it")
+                self._finish_event()
+                return
+        else:
+            self._ring.append(entry)
+            self._ring_bytes += len(encoded)
+            self._trim_ring(timestamp)
+        self._check_event_end(timestamp)
+
+    def trigger(self, bbox: Optional[Tuple[int, int, int, int]] = None, timestamp: Optional[float] = None):
+        """
+        Start an event clip, or extend the current one by post_roll seconds.
+
+        Args:
+            bbox (tuple): Bounding box of the object that caused the trigger
+            timestamp (float): Trigger time (default: now)
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        if self._event_frames is None:
+            self._event_frames = list(self._ring)
+            self._event_bytes = self._ring_bytes
+            self._ring.clear()
+            self._ring_bytes = 0
+            self._event_start = timestamp
+            self._event_bbox = bbox
+            self.logger.info("Event clip started")
+        self._event_deadline = timestamp + self.post_roll
+
+    def _check_event_end(self, timestamp: float):
+        if self._event_frames is None:
+            return
+        if timestamp >= self._event_deadline or timestamp - self._event_start >= self.max_clip_seconds:
+            self._finish_event()
+
+    def _finish_event(self, block: bool = False):
+        frames = self._event_frames
+        self._event_frames = None
+        self._event_bytes = 0
+        if not frames:
+            return
+        try:
+            self._jobs.put((frames, self._event_start, self._event_bbox), block=block)
+        except queue.Full:
+            # The writer is behind (slow storage); keep memory bounded instead
+            self.clips_dropped += 1
+            self.logger.warning(f"Dropping event clip with {len(frames)} frames, "
+                                f"{self._jobs.maxsize} clips already waiting to be written")
+
+    def _encode(self, frame: np.ndarray) -> Optional[bytes]:
+        if self.scale != 1.0:
+            frame = cv2.resize(frame, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        success, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        return buffer.tobytes() if success else None
+
+    def _trim_ring(self, now: float):
+        """Drop frames older than the pre-roll window or beyond the memory budget."""
+        while self._ring and (now - self._ring[0][0] > self.pre_roll
+                              or self._ring_bytes > self.max_buffer_bytes):
+            _, encoded = self._ring.popleft()
+            self._ring_bytes -= len(encoded)
+
+    def _writer_loop(self):
+        while True:
+            job = self._jobs.get()
+            try:
+                if job is None:
+                    return
+                self._write_clip(*job)
+            except Exception as e:
+                self.logger.error(f"Failed to write event clip: {e}")
+            finally:
+                self._jobs.task_done()
+
+    def _write_clip(self, frames: List[Tuple[float, bytes]], event_start: float, bbox):
+        started_at = datetime.fromtimestamp(frames[0][0])
+        clip_id = datetime.fromtimestamp(event_start).strftime("%Y%m%d_%H%M%S_%f")
+        if self.camera:
+            clip_id = f"{self.camera}_{clip_id}"
+        clip_dir = self.clips_path / started_at.strftime("%Y-%m-%d")
+        clip_dir.mkdir(parents=True, exist_ok=True)
+        path = clip_dir / f"{started_at.strftime('%H-%M-%S')}_clip_{clip_id}.mp4"
+
+        writer = None
+        written = 0
+        try:
+            for i, (timestamp, encoded) in enumerate(frames):
+                # Output slots up to the next frame's time, so the clip keeps wall-clock time
+                end = frames[i + 1][0] if i + 1 < len(frames) else timestamp + 1.0 / self.fps
+                repeats = round((end - frames[0][0]) * self.fps) - written
+                if repeats <= 0:
+                    continue
+                image = cv2.imdecode(np.frombuffer(encoded, np.uint8), cv2.IMREAD_COLOR)
+                if writer is None:
+                    height, width = image.shape[:2]
+                    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*self.fourcc),
+                                             self.fps, (width, height))
+                    if not writer.isOpened():
+                        raise IOError(f"cv2.VideoWriter could not open {path}")
+                for _ in range(repeats):
+                    writer.write(image)
+                written += repeats
+        finally:
+            if writer is not None:
+                writer.release()
+
+        size_bytes = path.stat().st_size
+        if self.index is not None:
+            self.index.add_clip(clip_id, datetime.fromtimestamp(event_start), frames[0][0], frames[-1][0],
+                                len(frames), path, size_bytes, bbox, camera=self.camera)
+        if self.on_saved is not None:
+            self.on_saved(clip_id, path, size_bytes)
+        self.clips_written += 1
+        self.logger.info(f"Saved event clip with {len(frames)} frames to {path}")
+
+    def close(self, timeout: Optional[float] = None):
+        """
+        Finish any active event and wait for pending clips to be written.
+
+        Call without a timeout before closing the index or storage the clips are reported
+        to; the wait is bounded by max_pending_clips clips.
+
+        Args:
+            timeout (float): Maximum seconds to wait for the writer (None waits until done)
+
+        Returns:
+            bool: True if the writer has finished
+        """
+        if self._event_frames is not None:
+            self._finish_event(block=True)
+        self._jobs.put(None)
+        self._writer.join(timeout)
+        return not self._writer.is_alive()
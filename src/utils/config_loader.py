@@ -1,22 +1,414 @@
+import sys
+import copy
 import yaml
+import signal
+import threading
+import logging
+from dataclasses import dataclass, field, fields
 from pathlib import Path
+from typing import Any, Dict, List, Optional, Union, get_type_hints
 from dotenv import load_dotenv
 import os
+import re
+
+from src.utils.upload_scheduler import parse_time_window
+
+
+class ConfigError(ValueError):
+    """Raised when the configuration file cannot be read or holds invalid values."""
+
+
+def _require(condition: bool, message: str):
+    if not condition:
+        raise ConfigError(message)
+
+
+@dataclass
+class CameraConfig:
+    """Frame source settings (changes need a restart)."""
+    name: Optional[str] = None  # Used for storage subdirectories and metric labels with several cameras
+    device_id: int = 0
+    width: int = 640
+    height: int = 480
+    fps: Optional[float] = None  # Requested device frame rate (driver default if unset)
+    source: Optional[str] = None  # Video file, image directory or "synthetic" instead of the device
+
+    def validate(self):
+        _require(self.name is None or re.fullmatch(r'[A-Za-z0-9_-]+', self.name) is not None,
+                 "camera.name may only contain letters, digits, '_' and '-'")
+        _require(self.device_id >= 0, "camera.device_id must be >= 0")
+        _require(self.width > 0 and self.height > 0, "camera.width and camera.height must be positive")
+        _require(self.fps is None or self.fps > 0, "camera.fps must be positive")
+
+
+@dataclass
+class DetectionConfig:
+    """Motion detection settings; thresholds are applied on reload."""
+    min_object_size: int = 500  # Area in pixels of the smallest reported object
+    threshold: int = 30
+    blur_size: int = 21
+    dilate_iterations: int = 2
+    background_model: str = 'running_average'
+    extraction: str = 'contours'
+    confidence_threshold: float = 0.5
+    include_zones: List[list] = field(default_factory=list)  # Polygons [[x, y], ...] in frame pixels
+    exclude_zones: List[list] = field(default_factory=list)
+    mask_image: Optional[str] = None  # White where motion counts, black where it is ignored
+    illumination_change_fraction: float = 0.6  # Foreground fraction treated as a lighting change (0 disables)
+    illumination_brightness_jump: float = 20.0  # Mean gray-level jump treated as a lighting change
+    classifier_model: Optional[str] = None  # Optional crop classifier (.onnx or any cv2.dnn format)
+    classifier_config: Optional[str] = None  # Network description for formats that need one
+    classifier_labels: Optional[str] = None  # Text file with one class name per line
+    classifier_backend: str = 'auto'
+    classifier_input_size: int = 224
+
+    @property
+    def min_area(self) -> int:
+        return self.min_object_size
+
+    def validate(self):
+        _require(self.min_object_size > 0, "detection.min_object_size must be positive")
+        _require(0 < self.threshold < 256, "detection.threshold must be in 1..255")
+        _require(self.blur_size > 0 and self.blur_size % 2 == 1, "detection.blur_size must be a positive odd number")
+        _require(self.dilate_iterations >= 0, "detection.dilate_iterations must be >= 0")
+        _require(self.extraction in ('contours', 'components'),
+                 "detection.extraction must be 'contours' or 'components'")
+        _require(0.0 <= self.confidence_threshold <= 1.0, "detection.confidence_threshold must be in [0, 1]")
+        for name in ('include_zones', 'exclude_zones'):
+            for polygon in getattr(self, name):
+                _require(isinstance(polygon, list) and len(polygon) >= 3
+                         and all(isinstance(point, list) and len(point) == 2
+                                 and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in point)
+                                 for point in polygon),
+                         f"detection.{name} must be a list of polygons with at least 3 [x, y] points")
+        _require(0.0 <= self.illumination_change_fraction <= 1.0,
+                 "detection.illumination_change_fraction must be in [0, 1]")
+        _require(self.illumination_brightness_jump > 0, "detection.illumination_brightness_jump must be positive")
+        _require(self.classifier_backend in ('auto', 'onnxruntime', 'opencv'),
+                 "detection.classifier_backend must be 'auto', 'onnxruntime' or 'opencv'")
+        _require(self.classifier_input_size > 0, "detection.classifier_input_size must be positive")
+        for name in ('classifier_model', 'classifier_config', 'classifier_labels'):
+            path = getattr(self, name)
+            _require(path is None or Path(path).is_file(), f"detection.{name} {path} does not exist")
+        _require(self.mask_image is None or Path(self.mask_image).is_file(),
+                 f"detection.mask_image {self.mask_image} does not exist")
+
+
+@dataclass
+class StorageConfig:
+    """Local storage settings, read from ``storage.local``; save rate limits are applied on reload."""
+    base_path: str = "storage"
+    max_storage_gb: float = 10.0
+    cleanup_threshold: float = 0.9
+    retention_policy: str = 'oldest'
+    min_save_interval: float = 10.0
+    save_burst: int = 1
+    thumbnail_width: Optional[int] = 320
+    clips: bool = False
+
+    def validate(self):
+        _require(self.max_storage_gb > 0, "storage.local.max_storage_gb must be positive")
+        _require(0.0 < self.cleanup_threshold <= 1.0, "storage.local.cleanup_threshold must be in (0, 1]")
+        _require(self.retention_policy in ('oldest', 'smallest'),
+                 "storage.local.retention_policy must be 'oldest' or 'smallest'")
+        _require(self.min_save_interval >= 0, "storage.local.min_save_interval must be >= 0")
+        _require(self.save_burst >= 1, "storage.local.save_burst must be >= 1")
+        _require(self.thumbnail_width is None or self.thumbnail_width > 0,
+                 "storage.local.thumbnail_width must be positive")
+
+
+@dataclass
+class UploadConfig:
+    """S3 upload settings, read from the ``aws`` section; scheduling limits are applied on reload."""
+    enabled: bool = False
+    bucket: Optional[str] = None
+    region: Optional[str] = None
+    prefix: str = ""
+    endpoint_url: Optional[str] = None
+    upload_interval: float = 300.0
+    max_bytes_per_second: Optional[float] = None
+    offpeak_window: Optional[str] = None
+    workers: int = 2
+
+    def validate(self):
+        _require(not self.enabled or bool(self.bucket), "aws.bucket is required when uploads are enabled")
+        _require(self.upload_interval >= 0, "aws.upload_interval must be >= 0")
+        _require(self.max_bytes_per_second is None or self.max_bytes_per_second > 0,
+                 "aws.max_bytes_per_second must be positive")
+        _require(self.workers >= 1, "aws.workers must be >= 1")
+        if self.offpeak_window:
+            try:
+                parse_time_window(self.offpeak_window)
+            except ValueError as e:
+                raise ConfigError(f"aws.offpeak_window: {e}") from e
+
+
+@dataclass
+class PerformanceConfig:
+    """Throughput and resource knobs (changes need a restart)."""
+    buffer_size: int = 4
+    drop_policy: str = 'drop_oldest'
+    capture_process: bool = False  # Capture in its own process, frames shared through shared memory
+    idle_fps: float = 0.0  # Frames decoded per second while the scene is quiet (0 decodes all frames)
+    motion_hold: float = 2.0  # Seconds at the full frame rate after motion
+    max_detect_load: float = 0.8  # Fraction of the time the detector may be busy when skipping frames
+    target_fps: float = 0.0  # Frames processed per second by the detection loop (0: every frame delivered)
+    quiet_fps: float = 0.0  # Processing rate after quiet_after seconds without motion (0: stay at target_fps)
+    quiet_after: float = 30.0
+    max_cpu_temperature: float = 80.0  # Throttle the detection loop above this CPU temperature in °C (0: off)
+    max_cpu_load: float = 0.0  # Throttle above this 1-minute load average per core (0: off)
+    thermal_zone: Optional[str] = None  # sysfs temperature file (default: the zone whose type is the CPU)
+    detection_scale: float = 1.0
+    storage_workers: int = 1
+    storage_queue_size: int = 16
+    metrics_port: Optional[int] = None
+    opencv_threads: Optional[int] = None  # OpenCV thread pool size of each process (default: OpenCV's choice)
+
+    def validate(self):
+        _require(self.buffer_size >= 1, "performance.buffer_size must be >= 1")
+        _require(self.drop_policy in ('drop_oldest', 'block'),
+                 "performance.drop_policy must be 'drop_oldest' or 'block'")
+        _require(not self.capture_process or sys.version_info >= (3, 8),
+                 "performance.capture_process needs Python 3.8 or newer (shared memory)")
+        _require(0.0 < self.detection_scale <= 1.0, "performance.detection_scale must be in (0, 1]")
+        _require(self.idle_fps >= 0, "performance.idle_fps must be >= 0")
+        _require(self.motion_hold >= 0, "performance.motion_hold must be >= 0")
+        _require(0.0 < self.max_detect_load <= 1.0, "performance.max_detect_load must be in (0, 1]")
+        _require(self.target_fps >= 0, "performance.target_fps must be >= 0")
+        _require(self.quiet_fps >= 0, "performance.quiet_fps must be >= 0")
+        _require(self.target_fps == 0 or self.quiet_fps <= self.target_fps,
+                 "performance.quiet_fps must not exceed performance.target_fps")
+        _require(self.quiet_after >= 0, "performance.quiet_after must be >= 0")
+        _require(self.max_cpu_temperature >= 0, "performance.max_cpu_temperature must be >= 0")
+        _require(self.max_cpu_load >= 0, "performance.max_cpu_load must be >= 0")
+        _require(self.thermal_zone is None or Path(self.thermal_zone).is_file(),
+                 f"performance.thermal_zone {self.thermal_zone} does not exist")
+        _require(self.storage_workers >= 1, "performance.storage_workers must be >= 1")
+        _require(self.storage_queue_size >= 1, "performance.storage_queue_size must be >= 1")
+        _require(self.metrics_port is None or 0 <= self.metrics_port < 65536,
+                 "performance.metrics_port must be a valid port")
+        _require(self.opencv_threads is None or self.opencv_threads >= 0,
+                 "performance.opencv_threads must be >= 0")
+
+
+@dataclass
+class AppConfig:
+    """Typed, validated service configuration."""
+    camera: CameraConfig = field(default_factory=CameraConfig)
+    detection: DetectionConfig = field(default_factory=DetectionConfig)
+    storage: StorageConfig = field(default_factory=StorageConfig)
+    upload: UploadConfig = field(default_factory=UploadConfig)
+    performance: PerformanceConfig = field(default_factory=PerformanceConfig)
+    cameras: List[CameraConfig] = field(default_factory=list)  # Several cameras, one worker process each
+
+    # Settings hot reload can change on a running pipeline, by section attribute
+    RELOADABLE = {
+        'detection': ('min_object_size', 'threshold', 'blur_size', 'dilate_iterations', 'confidence_threshold',
+                      'illumination_change_fraction', 'illumination_brightness_jump'),
+        'storage': ('min_save_interval', 'save_burst', 'cleanup_threshold'),
+        'upload': ('upload_interval', 'max_bytes_per_second', 'offpeak_window'),
+    }
+
+    @classmethod
+    def from_dict(cls, raw: Optional[Dict[str, Any]]) -> 'AppConfig':
+        """
+        Build and validate a configuration from parsed YAML.
+
+        Missing sections and keys fall back to defaults; unknown keys are logged and ignored.
+
+        Raises:
+            ConfigError: If a value has the wrong type or is out of range
+        """
+        raw = raw or {}
+        _require(isinstance(raw, dict), "configuration must be a mapping")
+        logger = logging.getLogger(__name__)
+        for key in sorted(set(raw) - {'camera', 'cameras', 'detection', 'storage', 'aws', 'performance'}):
+            logger.warning(f"Ignoring unknown configuration section '{key}'")
+
+        storage = raw.get('storage') or {}
+        _require(isinstance(storage, dict), "'storage' must be a mapping")
+        for key in sorted(set(storage) - {'local'}):
+            logger.warning(f"Ignoring unknown setting storage.{key}")
+
+        # Entries of the cameras list inherit the settings of the camera section
+        camera = raw.get('camera') or {}
+        cameras = raw.get('cameras') or []
+        _require(isinstance(camera, dict), "'camera' must be a mapping")
+        _require(isinstance(cameras, list), "'cameras' must be a list")
+        cameras = [_build(CameraConfig, f'cameras[{i}]', {**camera, **entry} if isinstance(entry, dict) else entry)
+                   for i, entry in enumerate(cameras)]
+        for i, entry in enumerate(cameras):
+            entry.name = entry.name or f"cam{i}"
+        names = [entry.name for entry in cameras]
+        _require(len(set(names)) == len(names), "camera names must be unique")
+
+        return cls(
+            camera=_build(CameraConfig, 'camera', camera),
+            cameras=cameras,
+            detection=_build(DetectionConfig, 'detection', raw.get('detection')),
+            storage=_build(StorageConfig, 'storage.local', storage.get('local'), ignored=('max_files',)),
+            upload=_build(UploadConfig, 'aws', raw.get('aws')),
+            performance=_build(PerformanceConfig, 'performance', raw.get('performance')),
+        )
+
+    def restart_required(self, other: 'AppConfig') -> List[str]:
+        """Names of settings that differ from other but cannot be applied without a restart."""
+        changed = []
+        for section in ('camera', 'detection', 'storage', 'upload', 'performance'):
+            mine, theirs = getattr(self, section), getattr(other, section)
+            for f in fields(mine):
+                if (getattr(mine, f.name) != getattr(theirs, f.name)
+                        and f.name not in self.RELOADABLE.get(section, ())):
+                    changed.append(f"{section}.{f.name}")
+        if self.cameras != other.cameras:
+            changed.append('cameras')
+        return changed
+
+    def with_reloaded(self, other: 'AppConfig') -> 'AppConfig':
+        """Copy of this configuration with the reloadable settings taken from other."""
+        merged = copy.deepcopy(self)
+        for section, names in self.RELOADABLE.items():
+            for name in names:
+                setattr(getattr(merged, section), name, getattr(getattr(other, section), name))
+        return merged
+
+    def camera_list(self) -> List[CameraConfig]:
+        """The configured cameras: the cameras list, or the single camera section."""
+        return self.cameras or [self.camera]
+
+
+def _build(cls, section: str, data: Any, ignored=()):
+    """Instantiate one config dataclass from a YAML mapping, coercing and validating values."""
+    data = data or {}
+    _require(isinstance(data, dict), f"'{section}' must be a mapping")
+    hints = get_type_hints(cls)
+    names = {f.name for f in fields(cls)}
+    logger = logging.getLogger(__name__)
+    for key in sorted(set(data) - names):
+        if key in ignored:
+            logger.warning(f"Setting {section}.{key} is no longer used and is ignored")
+        else:
+            logger.warning(f"Ignoring unknown setting {section}.{key}")
+    config = cls(**{name: _coerce(value, hints[name], f"{section}.{name}")
+                    for name, value in data.items() if name in names})
+    config.validate()
+    return config
+
+
+def _coerce(value: Any, hint: Any, name: str) -> Any:
+    """Check a YAML value against a field annotation (bool, int, float, str, list or Optional of one)."""
+    # The origin of List[...] is list, but typing.List itself on Python 3.6
+    if getattr(hint, '__origin__', None) in (list, List):
+        _require(isinstance(value, list), f"{name} must be a list")
+        return value
+    optional = getattr(hint, '__origin__', None) is Union
+    if optional:
+        hint = next(arg for arg in hint.__args__ if arg is not type(None))
+    if value is None:
+        _require(optional, f"{name} must be set")
+        return None
+    if hint is bool:
+        _require(isinstance(value, bool), f"{name} must be true or false")
+        return value
+    if hint in (int, float):
+        _require(isinstance(value, (int, float)) and not isinstance(value, bool), f"{name} must be a number")
+        _require(hint is float or float(value).is_integer(), f"{name} must be a whole number")
+        return hint(value)
+    _require(isinstance(value, (str, int, float)) and not isinstance(value, bool), f"{name} must be a string")
+    return str(value)
+
 
 class ConfigLoader:
     def __init__(self, config_path="config/config.yaml"):
         # Load environment variables
         load_dotenv()
-        
+        self.config_path = Path(config_path)
+
         # Load YAML config
-        with open(config_path, 'r') as file:
-            self.config = yaml.safe_load(file)
-    
+        try:
+            with open(config_path, 'r', encoding='utf-8') as file:
+                self.config = yaml.safe_load(file) or {}
+        except (OSError, yaml.YAMLError) as e:
+            raise ConfigError(f"Cannot read configuration {config_path}: {e}") from e
+
     def get_camera_config(self):
         return self.config.get('camera', {})
-    
+
     def get_storage_config(self):
         return self.config.get('storage', {})
-    
+
     def get_aws_config(self):
-        return self.config.get('aws', {})
\ No newline at end of file
+        return self.config.get('aws', {})
+
+    def load(self) -> AppConfig:
+        """Return the typed, validated configuration."""
+        return AppConfig.from_dict(self.config)
+
+
+class ConfigWatcher:
+    """Re-reads the configuration file on SIGHUP or when it changes on disk.
+
+    Parsing and validation happen on a background thread; the result is handed to the
+    main loop through poll(), so settings are applied between frames. Invalid files are
+    logged and the running configuration is kept.
+    """
+
+    def __init__(self, config_path: Union[str, Path], poll_interval: float = 2.0):
+        """
+        Args:
+            config_path: YAML file to watch
+            poll_interval (float): Seconds between modification time checks
+        """
+        self.logger = logging.getLogger(__name__)
+        self.config_path = Path(config_path)
+        self.poll_interval = poll_interval
+        self._mtime = self._current_mtime()
+        self._reload_requested = threading.Event()
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._pending: Optional[AppConfig] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Install the SIGHUP handler (main thread only) and start watching the file."""
+        if hasattr(signal, 'SIGHUP') and threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGHUP, lambda signum, frame: self._reload_requested.set())
+        self._thread = threading.Thread(target=self._watch_loop, name='config-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._reload_requested.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    def poll(self) -> Optional[AppConfig]:
+        """Return a newly loaded configuration once, or None if nothing changed."""
+        with self._lock:
+            config, self._pending = self._pending, None
+        return config
+
+    def _current_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.config_path).st_mtime
+        except OSError:
+            return None
+
+    def _watch_loop(self):
+        while not self._stop_event.is_set():
+            requested = self._reload_requested.wait(self.poll_interval)
+            self._reload_requested.clear()
+            if self._stop_event.is_set():
+                return
+            mtime = self._current_mtime()
+            if not requested and mtime == self._mtime:
+                continue
+            self._mtime = mtime
+            try:
+                config = ConfigLoader(self.config_path).load()
+            except ConfigError as e:
+                self.logger.error(f"Configuration reload rejected, keeping current settings: {e}")
+                continue
+            with self._lock:
+                self._pending = config
+            self.logger.info(f"Configuration reloaded from {self.config_path}")
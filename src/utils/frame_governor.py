@@ -0,0 +1,209 @@
+import os
+import threading
+import time
+import logging
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Optional, Union
+
+THERMAL_ROOT = Path('/sys/class/thermal')
+
+
+def find_cpu_thermal_zone(root: Union[str, Path] = THERMAL_ROOT) -> Path:
+    """
+    Temperature file of the CPU thermal zone.
+
+    Zone numbering differs between boards (on the Jetson Nano zone0 is AO-therm), so
+    the zone is picked by its ``type``: CPU-therm on Jetson, cpu-thermal on the
+    Raspberry Pi, x86_pkg_temp on Intel. Falls back to zone0.
+
+    Args:
+        root: sysfs thermal class directory
+    """
+    root = Path(root)
+    zones = []
+    for zone in sorted(root.glob('thermal_zone*')):
+        try:
+            zones.append((zone.joinpath('type').read_text().strip().lower(), zone / 'temp'))
+        except OSError:
+            continue
+    for prefix in ('cpu', 'x86_pkg_temp'):
+        for kind, temp in zones:
+            if kind.startswith(prefix):
+                return temp
+    return root / 'thermal_zone0' / 'temp'
+
+
+class FrameRateGovernor:
+    """Paces the detection loop instead of a fixed sleep per frame.
+
+    The loop runs at ``target_fps`` (0 takes every frame the camera delivers). After
+    ``quiet_after`` seconds without motion it drops to ``quiet_fps``; the first frame with
+    motion switches back to the target immediately. Independently of both, the loop's
+    duty cycle (busy time over frame time) is halved every check while the CPU is hotter
+    than ``max_temperature`` or busier than ``max_load`` and recovers once it is not, so
+    a board that overheats slows down instead of throttling itself into stalls.
+
+    While a limit is active the loop should take the newest frame rather than the oldest
+    queued one, and pass ``capture_fps`` on to the capture side so that frames the loop
+    will not process are not decoded either.
+    """
+
+    def __init__(self, target_fps: float = 0.0, quiet_fps: float = 0.0, quiet_after: float = 30.0,
+                 max_temperature: float = 80.0, max_load: float = 0.0, min_duty: float = 0.1,
+                 check_interval: float = 5.0, thermal_zone: Optional[Union[str, Path]] = None):
+        """
+        Args:
+            target_fps (float): Frames processed per second (0: no limit)
+            quiet_fps (float): Frames processed per second after a quiet period (0: stay at target_fps)
+            quiet_after (float): Seconds without motion before switching to quiet_fps
+            max_temperature (float): CPU temperature in °C above which the loop is throttled (0 disables)
+            max_load (float): 1-minute load average per core above which the loop is throttled (0 disables)
+            min_duty (float): Lowest duty cycle thermal and load throttling may impose
+            check_interval (float): Seconds between temperature and load checks
+            thermal_zone: sysfs file with the CPU temperature in millidegrees (None picks
+                the CPU zone by its type)
+        """
+        self.target_fps = target_fps
+        self.quiet_fps = quiet_fps
+        self.quiet_after = quiet_after
+        self.max_temperature = max_temperature
+        self.max_load = max_load
+        self.min_duty = min_duty
+        self.check_interval = check_interval
+        self.thermal_zone = Path(thermal_zone) if thermal_zone is not None else find_cpu_thermal_zone()
+        self.duty = 1.0
+        self.quiet = False
+        self.temperature: Optional[float] = None
+        self.load: Optional[float] = None
+        self.frames = 0
+        self.slept_seconds = 0.0
+        self._busy: Optional[float] = None
+        self._last_motion = time.monotonic()
+        self._last_release: Optional[float] = None
+        self._next_check = 0.0
+        self._releases: Deque[float] = deque()
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger('FrameRateGovernor')
+
+    @property
+    def fps(self) -> float:
+        """Current frame rate limit (0 when unlimited)."""
+        return self.quiet_fps if self.quiet and self.quiet_fps > 0 else self.target_fps
+
+    @property
+    def limited(self) -> bool:
+        """True while the loop runs slower than the frames arrive on purpose."""
+        return self.fps > 0 or self.duty < 1.0
+
+    @property
+    def capture_fps(self) -> float:
+        """Frames per second the capture side needs to decode for this loop (0 when unlimited)."""
+        fps = self.fps
+        if self.duty < 1.0 and self._busy:
+            # A throttled frame takes busy / duty seconds
+            throttled = self.duty / self._busy
+            fps = min(fps, throttled) if fps > 0 else throttled
+        return round(fps, 1)
+
+    @property
+    def effective_fps(self) -> float:
+        """Frames processed per second over the last check interval."""
+        with self._lock:
+            self._expire(time.monotonic())
+            return len(self._releases) / self.check_interval
+
+    def _expire(self, now: float):
+        while self._releases and self._releases[0] <= now - self.check_interval:
+            self._releases.popleft()
+
+    def pace(self, motion: bool, busy: float) -> float:
+        """
+        Call once per processed frame; sleeps until the next frame is due.
+
+        Args:
+            motion (bool): The frame contained moving objects
+            busy (float): Seconds spent processing the frame
+
+        Returns:
+            float: Seconds slept
+        """
+        now = time.monotonic()
+        self._busy = busy if self._busy is None else self._busy + 0.1 * (busy - self._busy)
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval
+            self._check_system()
+        if motion:
+            self._last_motion = now
+            if self.quiet:
+                self.quiet = False
+                self.logger.info(f"Motion, back to {self.target_fps or 'unlimited'} fps")
+        elif not self.quiet and self.quiet_fps > 0 and now - self._last_motion >= self.quiet_after:
+            self.quiet = True
+            self.logger.info(f"No motion for {self.quiet_after:.0f}s, slowing to {self.quiet_fps} fps")
+
+        delay = 0.0
+        if self.fps > 0 and self._last_release is not None:
+            delay = self._last_release + 1.0 / self.fps - now
+        if self.duty < 1.0:
+            delay = max(delay, busy * (1.0 / self.duty - 1.0))
+        if delay > 0:
+            time.sleep(delay)
+            self.slept_seconds += delay
+        else:
+            delay = 0.0
+
+        released = time.monotonic()
+        self._last_release = released
+        self.frames += 1
+        with self._lock:
+            self._releases.append(released)
+            self._expire(released)
+        return delay
+
+    def _check_system(self):
+        """Adjust the duty cycle to the CPU temperature and load."""
+        self.temperature = self._read_temperature()
+        if self.max_load > 0:
+            try:
+                self.load = os.getloadavg()[0] / (os.cpu_count() or 1)
+            except OSError:
+                self.load = None
+        hot = self.max_temperature > 0 and self.temperature is not None and self.temperature >= self.max_temperature
+        busy = self.max_load > 0 and self.load is not None and self.load >= self.max_load
+        if hot or busy:
+            duty = max(self.min_duty, self.duty * 0.5)
+            if duty < self.duty:
+                self.logger.warning(f"Throttling to {duty:.0%} duty cycle (CPU {self._describe()})")
+            self.duty = duty
+        elif self.duty < 1.0:
+            self.duty = min(1.0, round(self.duty + 0.1, 3))
+            if self.duty >= 1.0:
+                self.logger.info(f"Throttling lifted (CPU {self._describe()})")
+
+    def _read_temperature(self) -> Optional[float]:
+        if self.max_temperature <= 0:
+            return None
+        try:
+            return int(self.thermal_zone.read_text().strip()) / 1000.0
+        except (OSError, ValueError):
+            # Not a board with a thermal zone (or no access); temperature is not monitored
+            return None
+
+    def _describe(self) -> str:
+        parts = []
+        if self.temperature is not None:
+            parts.append(f"{self.temperature:.1f}°C")
+        if self.load is not None:
+            parts.append(f"load {self.load:.2f}/core")
+        return ', '.join(parts) or 'unknown'
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'effective_fps': self.effective_fps,
+            'fps_limit': self.fps,
+            'duty': self.duty,
+            'quiet': self.quiet,
+            'frames': self.frames,
+            'slept_seconds': self.slept_seconds,
+        }
@@ -0,0 +1,304 @@
+import sqlite3
+import threading
+import time
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+TimeLike = Union[datetime, float]
+
+
+class MetadataIndex:
+    """SQLite index of saved captures, replacing the per-image JSON sidecar files."""
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS captures (
+            object_id    TEXT PRIMARY KEY,
+            timestamp    REAL NOT NULL,
+            x            INTEGER NOT NULL,
+            y            INTEGER NOT NULL,
+            width        INTEGER NOT NULL,
+            height       INTEGER NOT NULL,
+            area         INTEGER NOT NULL,
+            frame_width  INTEGER NOT NULL,
+            frame_height INTEGER NOT NULL,
+            path         TEXT NOT NULL,
+            bytes        INTEGER NOT NULL,
+            track_id     INTEGER,
+            uploaded     INTEGER NOT NULL DEFAULT 0,
+            label        TEXT,
+            confidence   REAL,
+            camera       TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_captures_timestamp ON captures (timestamp);
+        CREATE INDEX IF NOT EXISTS idx_captures_area ON captures (area);
+        CREATE TABLE IF NOT EXISTS clips (
+            clip_id      TEXT PRIMARY KEY,
+            event_time   REAL NOT NULL,
+            start_time   REAL NOT NULL,
+            end_time     REAL NOT NULL,
+            frame_count  INTEGER NOT NULL,
+            path         TEXT NOT NULL,
+            bytes        INTEGER NOT NULL,
+            x            INTEGER,
+            y            INTEGER,
+            width        INTEGER,
+            height       INTEGER,
+            uploaded     INTEGER NOT NULL DEFAULT 0,
+            camera       TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_clips_event_time ON clips (event_time);
+    """
+
+    _COLUMNS = ("object_id, timestamp, x, y, width, height, area, "
+                "frame_width, frame_height, path, bytes, track_id, uploaded, label, confidence, camera")
+
+    def __init__(self, db_path: Union[str, Path], batch_size: int = 20, batch_interval: float = 5.0):
+        """Open (or create) the index database.
+
+        Args:
+            db_path: Location of the SQLite database file
+            batch_size (int): Number of inserts grouped into one commit
+            batch_interval (float): Maximum seconds an insert may stay uncommitted (a timer
+                commits a partial batch even when no further insert arrives)
+        """
+        self.logger = logging.getLogger(__name__)
+        self.db_path = Path(db_path)
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self._pending = 0
+        self._last_commit = time.monotonic()
+        self._lock = threading.Lock()
+        self._flush_timer: Optional[threading.Timer] = None
+        self._closed = False
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self._SCHEMA)
+        self._migrate()
+        self._conn.commit()
+
+    def _migrate(self):
+        """Add columns introduced after the first schema version to existing databases."""
+        columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(captures)")}
+        if 'track_id' not in columns:
+            self._conn.execute("ALTER TABLE captures ADD COLUMN track_id INTEGER")
+        if 'uploaded' not in columns:
+            self._conn.execute("ALTER TABLE captures ADD COLUMN uploaded INTEGER NOT NULL DEFAULT 0")
+        if 'label' not in columns:
+            self._conn.execute("ALTER TABLE captures ADD COLUMN label TEXT")
+            self._conn.execute("ALTER TABLE captures ADD COLUMN confidence REAL")
+        if 'camera' not in columns:
+            self._conn.execute("ALTER TABLE captures ADD COLUMN camera TEXT")
+        clip_columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(clips)")}
+        if 'uploaded' not in clip_columns:
+            self._conn.execute("ALTER TABLE clips ADD COLUMN uploaded INTEGER NOT NULL DEFAULT 0")
+        if 'camera' not in clip_columns:
+            self._conn.execute("ALTER TABLE clips ADD COLUMN camera TEXT")
+
+    def add(self, object_id: str, captured_at: datetime, bbox: Tuple[int, int, int, int],
+            frame_size: Tuple[int, int], path: Union[str, Path], size_bytes: int,
+            track_id: Optional[int] = None, label: Optional[str] = None,
+            confidence: Optional[float] = None, camera: Optional[str] = None) -> None:
+        """Record a saved capture; committed in batches.
+
+        Args:
+            object_id: Identifier of the capture
+            captured_at: Capture time
+            bbox: Bounding box tuple (x, y, w, h)
+            frame_size: Frame size as (width, height)
+            path: Path of the saved image
+            size_bytes: Size of the saved image in bytes
+            track_id: Tracker identifier of the object, if any
+            label: Class name assigned by the classifier, if any
+            confidence: Classifier confidence of the label
+            camera: Name of the camera that took the capture (multi-camera setups)
+        """
+        x, y, w, h = (int(v) for v in bbox)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO captures ({self._COLUMNS}) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0, ?, ?, ?)",
+                (object_id, captured_at.timestamp(), x, y, w, h, w * h,
+                 int(frame_size[0]), int(frame_size[1]), str(path), int(size_bytes), track_id,
+                 label, confidence, camera))
+            self._maybe_commit_locked()
+
+    def add_clip(self, clip_id: str, event_time: datetime, start_time: float, end_time: float,
+                 frame_count: int, path: Union[str, Path], size_bytes: int,
+                 bbox: Optional[Tuple[int, int, int, int]] = None, camera: Optional[str] = None) -> None:
+        """Record a saved event clip; committed immediately since clips are rare.
+
+        Args:
+            clip_id: Identifier of the clip
+            event_time: Time of the triggering detection
+            start_time: Epoch time of the first frame (including pre-roll)
+            end_time: Epoch time of the last frame (including post-roll)
+            frame_count: Number of frames in the clip
+            path: Path of the saved video
+            size_bytes: Size of the saved video in bytes
+            bbox: Bounding box of the triggering detection, if known
+            camera: Name of the camera that recorded the clip (multi-camera setups)
+        """
+        x, y, w, h = (int(v) for v in bbox) if bbox is not None else (None,) * 4
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO clips (clip_id, event_time, start_time, end_time, frame_count, "
+                "path, bytes, x, y, width, height, camera) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (clip_id, event_time.timestamp(), start_time, end_time, frame_count,
+                 str(path), int(size_bytes), x, y, w, h, camera))
+            self._commit_locked()
+
+    def latest_clips(self, n: int = 10) -> List[Dict[str, Any]]:
+        """Return the n most recent event clips, newest first."""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM clips ORDER BY event_time DESC LIMIT ?", (n,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def flush(self) -> None:
+        """Commit any pending inserts."""
+        with self._lock:
+            if not self._closed:
+                self._commit_locked()
+
+    def _maybe_commit_locked(self):
+        """Count a pending write and commit once the batch is full or old enough."""
+        self._pending += 1
+        if (self._pending >= self.batch_size
+                or time.monotonic() - self._last_commit >= self.batch_interval):
+            self._commit_locked()
+        elif self._flush_timer is None:
+            # Commits the partial batch if no further insert arrives in time
+            self._flush_timer = threading.Timer(self.batch_interval, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _commit_locked(self):
+        self._conn.commit()
+        self._pending = 0
+        self._last_commit = time.monotonic()
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+
+    def by_time_range(self, start: TimeLike, end: TimeLike) -> List[Dict[str, Any]]:
+        """Return captures with start <= timestamp < end, oldest first."""
+        return self._query("WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp",
+                           (self._epoch(start), self._epoch(end)))
+
+    def by_bbox_area(self, min_area: int = 0, max_area: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return captures whose bounding box area lies in [min_area, max_area], largest first."""
+        if max_area is None:
+            return self._query("WHERE area >= ? ORDER BY area DESC", (min_area,))
+        return self._query("WHERE area >= ? AND area <= ? ORDER BY area DESC", (min_area, max_area))
+
+    def by_label(self, label: str, min_confidence: float = 0.0) -> List[Dict[str, Any]]:
+        """Return captures classified as label with at least min_confidence, newest first."""
+        return self._query("WHERE label = ? AND confidence >= ? ORDER BY timestamp DESC", (label, min_confidence))
+
+    def by_track(self, track_id: int) -> List[Dict[str, Any]]:
+        """Return captures of one tracked object, oldest first."""
+        return self._query("WHERE track_id = ? ORDER BY timestamp", (track_id,))
+
+    def latest(self, n: int = 10) -> List[Dict[str, Any]]:
+        """Return the n most recent captures, newest first."""
+        return self._query("ORDER BY timestamp DESC LIMIT ?", (n,))
+
+    def eviction_candidates(self, limit: int = 50, order: str = 'oldest') -> List[Dict[str, Any]]:
+        """Return captures to delete first when the storage budget is exceeded.
+
+        Captures already uploaded always come before ones that only exist locally.
+
+        Args:
+            limit (int): Maximum number of candidates
+            order (str): 'oldest' (by timestamp) or 'smallest' (by bbox area, then age)
+        """
+        if order == 'smallest':
+            return self._query("ORDER BY uploaded DESC, area, timestamp LIMIT ?", (limit,))
+        return self._query("ORDER BY uploaded DESC, timestamp LIMIT ?", (limit,))
+
+    def oldest_clips(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Return event clips to evict, uploaded ones first, then oldest first."""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM clips ORDER BY uploaded DESC, event_time LIMIT ?",
+                                      (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def mark_uploaded(self, kind: str, item_id: str) -> None:
+        """Flag a capture ('image') or clip ('clip') as safely stored remotely."""
+        table, key = ('clips', 'clip_id') if kind == 'clip' else ('captures', 'object_id')
+        with self._lock:
+            self._conn.execute(f"UPDATE {table} SET uploaded = 1 WHERE {key} = ?", (item_id,))
+            self._maybe_commit_locked()
+
+    def delete_captures(self, object_ids: List[str]) -> None:
+        """Remove capture entries by object_id."""
+        with self._lock:
+            self._conn.executemany("DELETE FROM captures WHERE object_id = ?", [(i,) for i in object_ids])
+            self._commit_locked()
+
+    def delete_clips(self, clip_ids: List[str]) -> None:
+        """Remove clip entries by clip_id."""
+        with self._lock:
+            self._conn.executemany("DELETE FROM clips WHERE clip_id = ?", [(i,) for i in clip_ids])
+            self._commit_locked()
+
+    def delete_time_range(self, start: TimeLike, end: TimeLike) -> int:
+        """Remove index entries with start <= timestamp < end.
+
+        Returns:
+            int: Number of removed entries
+        """
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM captures WHERE timestamp >= ? AND timestamp < ?",
+                                        (self._epoch(start), self._epoch(end)))
+            removed = cursor.rowcount
+            self._conn.execute("DELETE FROM clips WHERE event_time >= ? AND event_time < ?",
+                               (self._epoch(start), self._epoch(end)))
+            self._commit_locked()
+            return removed
+
+    def close(self) -> None:
+        """Commit pending inserts and close the database."""
+        with self._lock:
+            self._commit_locked()
+            self._closed = True
+            self._conn.close()
+
+    def _query(self, clause: str, params: tuple) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {self._COLUMNS} FROM captures {clause}", params).fetchall()
+        return [self._row_to_metadata(row) for row in rows]
+
+    @staticmethod
+    def _epoch(value: TimeLike) -> float:
+        return value.timestamp() if isinstance(value, datetime) else float(value)
+
+    @staticmethod
+    def _row_to_metadata(row: sqlite3.Row) -> Dict[str, Any]:
+        """Convert a row to the metadata layout previously stored in the JSON sidecars."""
+        return {
+            'object_id': row['object_id'],
+            'timestamp': datetime.fromtimestamp(row['timestamp']).isoformat(),
+            'bbox': {
+                'x': row['x'],
+                'y': row['y'],
+                'width': row['width'],
+                'height': row['height']
+            },
+            'frame_size': {
+                'width': row['frame_width'],
+                'height': row['frame_height']
+            },
+            'path': row['path'],
+            'bytes': row['bytes'],
+            'track_id': row['track_id'],
+            'uploaded': bool(row['uploaded']),
+            'label': row['label'],
+            'confidence': row['confidence'],
+            'camera': row['camera'],
+        }
@@ -0,0 +1,517 @@
+import bisect
+import functools
+import logging
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+# Latency buckets in seconds, tuned for per-frame work on edge boards
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class _Child:
+    """Single labelled time series of a metric."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    def set_function(self, function: Callable[[], float]):
+        """Compute the value lazily at scrape time instead of on the hot path."""
+        self._function = function
+
+    def get(self) -> float:
+        if self._function is not None:
+            return float(self._function())
+        return self._value
+
+
+class _CounterChild(_Child):
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+
+class _GaugeChild(_Child):
+    def set(self, value: float):
+        self._value = float(value)
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+
+class _HistogramChild:
+    def __init__(self, buckets: Sequence[float]):
+        self._lock = threading.Lock()
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        """Observe the duration of the enclosed block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        with self._lock:
+            return list(self.counts), self.sum
+
+
+class _Metric:
+    """Metric family: a name, help text and one child per label combination."""
+
+    type_name = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, **labels):
+        """Return the child for the given label values, creating it on first use."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        if self.labelnames:
+            raise ValueError(f"Metric {self.name} requires labels {self.labelnames}")
+        return self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _label_string(self, key: Tuple[str, ...], extra: str = '') -> str:
+        pairs = [f'{name}="{value}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key, child) -> List[str]:
+        try:
+            value = child.get()
+        except Exception:
+            return []
+        return [f"{self.name}{self._label_string(key)} {value}"]
+
+
+class Counter(_Metric):
+    type_name = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+    def set_function(self, function: Callable[[], float]):
+        self._default().set_function(function)
+
+
+class Gauge(_Metric):
+    type_name = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._default().set(value)
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._default().dec(amount)
+
+    def set_function(self, function: Callable[[], float]):
+        self._default().set_function(function)
+
+
+class Histogram(_Metric):
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+    def _render_child(self, key, child) -> List[str]:
+        counts, total = child.snapshot()
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            le_label = f'le="{le}"'
+            lines.append(f"{self.name}_bucket{self._label_string(key, le_label)} {cumulative}")
+        lines.append(f"{self.name}_sum{self._label_string(key)} {total}")
+        lines.append(f"{self.name}_count{self._label_string(key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric_class, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = metric_class(name, *args, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, metric_class):
+                raise ValueError(f"Metric {name} already registered as {metric.type_name}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    # http.server.ThreadingHTTPServer only exists from Python 3.7
+    daemon_threads = True
+
+
+class MetricsServer:
+    """Minimal HTTP server exposing a registry at /metrics on a background thread."""
+
+    def __init__(self, port: int = 9100, host: str = '127.0.0.1', registry: MetricsRegistry = REGISTRY):
+        """
+        Args:
+            port (int): TCP port to listen on
+            host (str): Interface to bind; keep it local unless a scraper runs elsewhere
+            registry (MetricsRegistry): Metrics to expose
+        """
+        self.logger = logging.getLogger(__name__)
+        self.registry = registry
+
+        registry_ref = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry_ref.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = _ThreadingHTTPServer((host, port), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, name='metrics-server', daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self):
+        self._thread.start()
+        self.logger.info(f"Metrics available at http://{self._server.server_address[0]}:{self.port}/metrics")
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def _wrap(obj, method_name: str, wrapper_factory):
+    """Replace a bound method on one instance with an instrumented wrapper."""
+    original = getattr(obj, method_name)
+    setattr(obj, method_name, functools.wraps(original)(wrapper_factory(original)))
+
+
+def instrument_pipeline(camera, detector, storage, registry: MetricsRegistry = REGISTRY,
+                        labels: Optional[Dict[str, str]] = None, classifier=None):
+    """
+    Record counters and latency histograms around the pipeline's hot-path methods.
+
+    Wraps the frame source read behind both CameraHandler.capture_frame and the capture
+    thread and ObjectDetector.detect_objects on the given instances; storage is
+    instrumented by instrument_storage(). Buffer, queue and disk figures are collected
+    only at scrape time.
+
+    Args:
+        camera: CameraHandler instance (instrument before starting capture)
+        detector: ObjectDetector instance
+        storage: ImageStorage instance
+        registry (MetricsRegistry): Registry receiving the metrics
+        labels (dict): Constant labels (e.g. {'camera': '0'}) added to every series
+        classifier: Optional TrackClassifier whose inference counters are exported
+    """
+    labels = labels or {}
+    labelnames = tuple(labels)
+
+    def metric(kind, name, documentation, **kwargs):
+        return getattr(registry, kind)(name, documentation, labelnames, **kwargs).labels(**labels)
+
+    capture_seconds = metric('histogram', 'animals_capture_seconds', 'Time to read one frame from the source')
+    frames_total = metric('counter', 'animals_frames_captured_total', 'Frames read from the source')
+    capture_errors = metric('counter', 'animals_capture_errors_total', 'Failed frame reads')
+    detect_seconds = metric('histogram', 'animals_detect_seconds', 'ObjectDetector.detect_objects duration')
+    detections_total = metric('counter', 'animals_detections_total', 'Bounding boxes returned by the detector')
+
+    def read_wrapper(original):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            success, frame = original(*args, **kwargs)
+            capture_seconds.observe(time.perf_counter() - start)
+            (frames_total if success else capture_errors).inc()
+            return success, frame
+        return wrapper
+
+    if getattr(camera, 'capture_process', False):
+        # The source is read in another process; report the shared pool counters instead
+        frames_total.set_function(lambda: camera.stats()['captured'])
+    elif getattr(camera, 'skip_policy', None) is not None:
+        # Frames are grabbed and only the selected ones decoded
+        _wrap(camera.source, 'retrieve', read_wrapper)
+    else:
+        _wrap(camera.source, 'read', read_wrapper)
+
+    def detect_wrapper(original):
+        def wrapper(frame, *args, **kwargs):
+            start = time.perf_counter()
+            result = original(frame, *args, **kwargs)
+            detect_seconds.observe(time.perf_counter() - start)
+            detections_total.inc(len(result[0]))
+            return result
+        return wrapper
+
+    _wrap(detector, 'detect_objects', detect_wrapper)
+
+    metric('counter', 'animals_frames_dropped_total',
+           'Frames dropped by the capture ring buffer').set_function(lambda: camera.stats()['dropped'])
+    metric('counter', 'animals_frames_skipped_total',
+           'Frames grabbed but not decoded by the skip policy').set_function(lambda: camera.stats()['skipped'])
+    metric('gauge', 'animals_capture_pending_frames',
+           'Frames waiting in the capture ring buffer').set_function(lambda: camera.stats()['pending'])
+    metric('counter', 'animals_illumination_changes_total',
+           'Frame-wide lighting changes during which detections were suppressed').set_function(
+        lambda: detector.illumination_changes)
+    metric('counter', 'animals_illumination_suppressed_frames_total',
+           'Frames whose detections were suppressed by a lighting change').set_function(
+        lambda: detector.illumination_suppressed_frames)
+    if classifier is not None:
+        metric('counter', 'animals_classifier_inferences_total',
+               'Batched classifier inference calls').set_function(lambda: classifier.inferences)
+        metric('counter', 'animals_classifier_crops_total',
+               'Motion crops classified').set_function(lambda: classifier.crops_classified)
+        metric('counter', 'animals_classifier_seconds_total',
+               'Time spent in classifier inference').set_function(lambda: classifier.total_seconds)
+    instrument_storage(storage, registry, labels)
+
+
+def instrument_storage(storage, registry: MetricsRegistry = REGISTRY, labels: Optional[Dict[str, str]] = None):
+    """
+    Record save latency and outcomes and export ImageStorage queue, rate limiting and
+    disk figures, the latter collected at scrape time.
+
+    save_capture() is wrapped on the instance; it is the path taken by save_track() and
+    by the captures camera worker processes report.
+
+    Args:
+        storage: ImageStorage instance
+        registry (MetricsRegistry): Registry receiving the metrics
+        labels (dict): Constant labels added to every series
+    """
+    labels = labels or {}
+    labelnames = tuple(labels)
+
+    def metric(kind, name, documentation):
+        return getattr(registry, kind)(name, documentation, labelnames).labels(**labels)
+
+    save_seconds = metric('histogram', 'animals_save_seconds', 'ImageStorage.save_capture duration')
+    saves_accepted = metric('counter', 'animals_saves_accepted_total', 'Saves accepted by storage')
+    saves_skipped = metric('counter', 'animals_saves_skipped_total', 'Saves rejected by rate limiting or errors')
+
+    def save_wrapper(original):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            saved = original(*args, **kwargs)
+            save_seconds.observe(time.perf_counter() - start)
+            (saves_accepted if saved else saves_skipped).inc()
+            return saved
+        return wrapper
+
+    _wrap(storage, 'save_capture', save_wrapper)
+
+    metric('gauge', 'animals_storage_queue_depth',
+           'Captures waiting for the storage writer').set_function(lambda: storage.stats()['queue_depth'])
+    metric('counter', 'animals_storage_written_total',
+           'Captures written to disk').set_function(lambda: storage.stats()['written'])
+    metric('counter', 'animals_storage_dropped_total',
+           'Captures dropped by storage backpressure').set_function(lambda: storage.stats()['dropped'])
+    metric('counter', 'animals_storage_over_budget_total',
+           'Saves skipped while the storage budget was exhausted').set_function(
+        lambda: storage.stats()['over_budget'])
+    metric('counter', 'animals_saves_rate_limited_total',
+           'Saves suppressed by the per-region/per-track rate limiter').set_function(
+        lambda: storage.rate_limiter.stats()['suppressed'])
+    metric('gauge', 'animals_storage_used_bytes',
+           'Bytes owned by storage (running count)').set_function(lambda: storage.used_bytes)
+    metric('gauge', 'animals_disk_free_bytes',
+           'Free space on the storage filesystem').set_function(lambda: shutil.disk_usage(storage.base_path).free)
+
+
+def instrument_uploader(uploader, registry: MetricsRegistry = REGISTRY, labels: Optional[Dict[str, str]] = None):
+    """
+    Export S3Uploader (and UploadScheduler) state, collected at scrape time.
+
+    Args:
+        uploader: S3Uploader instance
+        registry (MetricsRegistry): Registry receiving the metrics
+        labels (dict): Constant labels added to every series
+    """
+    labels = labels or {}
+    labelnames = tuple(labels)
+
+    def metric(kind, name, documentation):
+        return getattr(registry, kind)(name, documentation, labelnames).labels(**labels)
+
+    metric('counter', 'animals_upload_bytes_sent_total',
+           'Bytes uploaded successfully').set_function(lambda: uploader.stats()['uploaded_bytes'])
+    metric('counter', 'animals_uploads_total',
+           'Files uploaded successfully').set_function(lambda: uploader.stats()['uploaded'])
+    metric('counter', 'animals_upload_failures_total',
+           'Failed upload attempts').set_function(lambda: uploader.stats()['failed_attempts'])
+    metric('gauge', 'animals_upload_pending_items',
+           'Files waiting for upload').set_function(lambda: uploader.stats()['pending'])
+    metric('gauge', 'animals_upload_backlog_age_seconds',
+           'Age of the oldest file waiting for upload').set_function(lambda: uploader.stats()['backlog_age_seconds'])
+    metric('gauge', 'animals_upload_deferred_items',
+           'Files held back until the off-peak window').set_function(lambda: uploader.stats().get('deferred', 0))
+
+
+def instrument_governor(governor, registry: MetricsRegistry = REGISTRY, labels: Optional[Dict[str, str]] = None):
+    """
+    Export the frame rate of the detection loop, collected at scrape time.
+
+    Args:
+        governor: FrameRateGovernor instance
+        registry (MetricsRegistry): Registry receiving the metrics
+        labels (dict): Constant labels added to every series
+    """
+    labels = labels or {}
+    labelnames = tuple(labels)
+
+    def metric(kind, name, documentation):
+        return getattr(registry, kind)(name, documentation, labelnames).labels(**labels)
+
+    metric('gauge', 'animals_processing_fps',
+           'Frames processed per second by the detection loop').set_function(lambda: governor.effective_fps)
+    metric('gauge', 'animals_processing_fps_limit',
+           'Current frame rate limit of the detection loop (0: unlimited)').set_function(lambda: governor.fps)
+    metric('gauge', 'animals_processing_duty_cycle',
+           'Busy fraction allowed by CPU temperature and load throttling').set_function(lambda: governor.duty)
+
+
+def instrument_cameras(supervisor, registry: MetricsRegistry = REGISTRY):
+    """
+    Export the stats reported by CameraSupervisor workers, one ``camera`` label per worker.
+
+    Worker counters restart from zero when a worker process is restarted.
+
+    Args:
+        supervisor: CameraSupervisor instance
+        registry (MetricsRegistry): Registry receiving the metrics
+    """
+    series = (
+        ('counter', 'animals_frames_captured_total', 'Frames read from the source', 'captured'),
+        ('counter', 'animals_frames_dropped_total', 'Frames dropped by the capture ring buffer', 'dropped'),
+        ('counter', 'animals_frames_skipped_total', 'Frames grabbed but not decoded by the skip policy',
+         'skipped'),
+        ('gauge', 'animals_capture_pending_frames', 'Frames waiting in the capture ring buffer', 'pending'),
+        ('counter', 'animals_frames_processed_total', 'Frames run through the detector', 'frames_processed'),
+        ('counter', 'animals_detect_seconds_total', 'Time spent in ObjectDetector.detect_objects',
+         'detect_seconds'),
+        ('counter', 'animals_detections_total', 'Bounding boxes returned by the detector', 'detections'),
+        ('counter', 'animals_tracks_saved_total', 'Finished tracks handed to storage', 'tracks_sent'),
+        ('counter', 'animals_tracks_discarded_total', 'Finished tracks below the classifier threshold',
+         'tracks_discarded'),
+        ('counter', 'animals_illumination_changes_total',
+         'Frame-wide lighting changes during which detections were suppressed', 'illumination_changes'),
+        ('counter', 'animals_illumination_suppressed_frames_total',
+         'Frames whose detections were suppressed by a lighting change', 'illumination_suppressed_frames'),
+        ('counter', 'animals_classifier_inferences_total', 'Batched classifier inference calls',
+         'classifier_inferences'),
+        ('counter', 'animals_classifier_crops_total', 'Motion crops classified', 'classifier_crops'),
+        ('counter', 'animals_classifier_seconds_total', 'Time spent in classifier inference',
+         'classifier_seconds'),
+        ('gauge', 'animals_processing_fps', 'Frames processed per second by the detection loop',
+         'effective_fps'),
+        ('gauge', 'animals_processing_fps_limit', 'Current frame rate limit of the detection loop (0: unlimited)',
+         'fps_limit'),
+        ('gauge', 'animals_processing_duty_cycle', 'Busy fraction allowed by CPU temperature and load throttling',
+         'duty'),
+        ('gauge', 'animals_camera_up', 'Whether the camera worker process is running', 'alive'),
+        ('counter', 'animals_camera_restarts_total', 'Camera worker restarts after a failure', 'restarts'),
+    )
+    for name in supervisor.workers:
+        for kind, metric_name, documentation, key in series:
+            child = getattr(registry, kind)(metric_name, documentation, ('camera',)).labels(camera=name)
+            child.set_function(lambda name=name, key=key: float(supervisor.stats()[name].get(key, 0)))
@@ -0,0 +1,140 @@
+import threading
+import time
+from typing import Dict, Hashable, Optional, Tuple
+
+
+class TokenBucket:
+    """Classic token bucket: holds up to `burst` tokens, refilled at `rate` tokens per second."""
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def consume(self, now: float, tokens: float = 1.0) -> bool:
+        self.refill(now)
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    def is_full(self, now: float) -> bool:
+        self.refill(now)
+        return self.tokens >= self.burst
+
+
+class SaveRateLimiter:
+    """Per-region / per-track save limiter replacing the single global save interval.
+
+    Every save is charged to a key: the track ID when one is given, otherwise the cell
+    of a coarse grid containing the centre of the bounding box. Each key has its own
+    token bucket, so an animal in one part of the frame never suppresses another one
+    elsewhere, while a stationary false positive is held to the refill rate.
+    """
+
+    def __init__(self, interval: float = 10.0, burst: int = 1, grid: Tuple[int, int] = (4, 4),
+                 max_keys: int = 1024):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            interval (float): Seconds needed to refill one token (average spacing between saves per key)
+            burst (int): Saves a key may make back to back before being limited
+            grid (tuple): Grid size as (columns, rows) used to key saves without a track ID
+            max_keys (int): Upper bound on remembered keys; idle full buckets are evicted first
+        """
+        self.interval = interval
+        self.burst = burst
+        self.grid = grid
+        self.max_keys = max_keys
+        self._buckets: Dict[Hashable, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.suppressed = 0
+        self.suppressed_by_kind: Dict[str, int] = {}
+
+    @property
+    def rate(self) -> float:
+        return float('inf') if self.interval <= 0 else 1.0 / self.interval
+
+    def key_for(self, bbox: Optional[Tuple[int, int, int, int]] = None,
+                frame_shape: Optional[Tuple[int, ...]] = None,
+                track_id: Optional[int] = None, camera: Optional[str] = None) -> Hashable:
+        """Return the key a save is charged to: ('track', id) or ('cell', column, row), plus the camera."""
+        scope = (camera,) if camera else ()
+        if track_id is not None:
+            return ('track', track_id) + scope
+        if bbox is None or frame_shape is None:
+            return ('global',) + scope
+        x, y, w, h = bbox
+        height, width = frame_shape[:2]
+        columns, rows = self.grid
+        column = min(columns - 1, max(0, int((x + w / 2.0) * columns / width)))
+        row = min(rows - 1, max(0, int((y + h / 2.0) * rows / height)))
+        return ('cell', column, row) + scope
+
+    def allow(self, bbox: Optional[Tuple[int, int, int, int]] = None,
+              frame_shape: Optional[Tuple[int, ...]] = None,
+              track_id: Optional[int] = None, now: Optional[float] = None,
+              camera: Optional[str] = None) -> bool:
+        """
+        Consume a token for the save's key if one is available.
+
+        Args:
+            bbox (tuple): Bounding box (x, y, w, h) of the object to save
+            frame_shape (tuple): Shape of the frame the box belongs to
+            track_id (int): Tracker identifier; takes precedence over the grid cell
+            now (float): Current monotonic time (default: time.monotonic())
+            camera (str): Camera name, so that cameras never share a key
+
+        Returns:
+            bool: True if the save may proceed, False if it is suppressed
+        """
+        if self.interval <= 0:
+            with self._lock:
+                self.allowed += 1
+            return True
+
+        now = time.monotonic() if now is None else now
+        key = self.key_for(bbox, frame_shape, track_id, camera)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._evict(now)
+                bucket = TokenBucket(self.rate, self.burst, now)
+                self._buckets[key] = bucket
+            else:
+                bucket.rate = self.rate
+                bucket.burst = self.burst
+            if bucket.consume(now):
+                self.allowed += 1
+                return True
+            self.suppressed += 1
+            self.suppressed_by_kind[key[0]] = self.suppressed_by_kind.get(key[0], 0) + 1
+            return False
+
+    def _evict(self, now: float):
+        """Forget buckets that are full again (indistinguishable from new ones), else the oldest."""
+        idle = [key for key, bucket in self._buckets.items() if bucket.is_full(now)]
+        for key in idle:
+            del self._buckets[key]
+        if len(self._buckets) >= self.max_keys:
+            oldest = min(self._buckets, key=lambda key: self._buckets[key].updated)
+            del self._buckets[oldest]
+
+    def stats(self) -> dict:
+        """Return allowed/suppressed counters and the number of tracked keys."""
+        with self._lock:
+            return {
+                'allowed': self.allowed,
+                'suppressed': self.suppressed,
+                'suppressed_by_kind': dict(self.suppressed_by_kind),
+                'active_keys': len(self._buckets),
+            }
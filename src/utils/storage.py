@@ -1,19 +1,56 @@
 import os
-import json
-from datetime import datetime
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
 import shutil
 from pathlib import Path
 import logging
-from typing import Dict, Any, Tuple, Union
+from typing import Dict, Any, List, Optional, Tuple, Union
 import cv2
+import numpy as np
+
+from src.utils.metadata_index import MetadataIndex
+from src.utils.rate_limiter import SaveRateLimiter
 
 class ImageStorage:
-    def __init__(self, base_path="storage", max_storage_gb=10):
+    BACKPRESSURE_BLOCK = 'block'
+    BACKPRESSURE_DROP_NEWEST = 'drop_newest'
+    BACKPRESSURE_DROP_OLDEST = 'drop_oldest'
+
+    RETENTION_OLDEST = 'oldest'
+    RETENTION_SMALLEST = 'smallest'
+
+    def __init__(self, base_path="storage", max_storage_gb=10, async_mode=False,
+                 queue_size=16, workers=1, backpressure=BACKPRESSURE_DROP_NEWEST,
+                 copy_frames=True, min_save_interval=10, save_burst=1, rate_limit_grid=(4, 4),
+                 retention_policy=RETENTION_OLDEST, cleanup_threshold=0.9, uploader=None,
+                 thumbnail_width=None):
         """Initialize the image storage system.
         
         Args:
             base_path (str): Base directory for storing images
-            max_storage_gb (float): Maximum storage limit in gigabytes
+            max_storage_gb (float): Hard budget for everything stored under base_path, in gigabytes
+            async_mode (bool): Queue saves for background workers instead of writing inline
+            queue_size (int): Maximum number of saves waiting for a worker in async mode
+            workers (int): Number of background writer threads in async mode
+            backpressure (str): What to do when the queue is full: 'block' the caller,
+                'drop_newest' (reject the new save) or 'drop_oldest' (evict the oldest pending save)
+            copy_frames (bool): Copy frames into a pooled buffer before queueing; disable
+                only if the caller never reuses a frame buffer after handing it over
+            min_save_interval (float): Average seconds between saves of the same grid cell
+                (or track, for save_detected_object with a track ID)
+            save_burst (int): Saves a cell may make back to back before being limited
+            rate_limit_grid (tuple): Grid (columns, rows) used to key saves without a track ID
+            retention_policy (str): Which captures to evict first when over budget:
+                'oldest' or 'smallest' (smallest detections, i.e. lowest value, first)
+            cleanup_threshold (float): Fraction of the budget at which background eviction
+                starts; it evicts until usage is back below this fraction
+            uploader: Optional S3Uploader; every saved capture and clip is queued for upload
+                and uploaded files are evicted first
+            thumbnail_width (int): With an uploader, also write a small thumbnail of this width
+                for every capture; thumbnails are queued ahead of full images and deleted
+                locally once uploaded
         """
         # Setup logging first
         logging.basicConfig(level=logging.INFO)
@@ -22,14 +59,107 @@ class ImageStorage:
         # Then initialize paths
         self.base_path = Path(base_path)
         self.images_path = self.base_path / "images"
+        self.thumbnails_path = self.base_path / "thumbnails"
+        self.thumbnail_width = thumbnail_width
         self.max_storage_bytes = max_storage_gb * 1024 * 1024 * 1024
+        self.cleanup_threshold = cleanup_threshold
+        self.retention_policy = retention_policy
         
-        # Add last save timestamp tracking
-        self.last_save_timestamp = None
-        self.min_save_interval = 10  # seconds
+        # Per-region / per-track save rate limiting
+        self.rate_limiter = SaveRateLimiter(min_save_interval, save_burst, rate_limit_grid)
         
-        # Finally, create directory structure
+        # Background writer state
+        if backpressure not in (self.BACKPRESSURE_BLOCK, self.BACKPRESSURE_DROP_NEWEST,
+                                self.BACKPRESSURE_DROP_OLDEST):
+            raise ValueError(f"Unknown backpressure policy: {backpressure}")
+        self.async_mode = async_mode
+        self.backpressure = backpressure
+        self.copy_frames = copy_frames
+        self._queue = queue.Queue(maxsize=queue_size)
+        # Reusable annotation buffers: one per queued capture plus one per writer
+        self._scratch_pool = queue.LifoQueue()
+        self._scratch_limit = queue_size + max(1, workers) if async_mode else 1
+        self._workers = []
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'enqueued': 0,
+            'dropped': 0,
+            'over_budget': 0,
+            'written': 0,
+            'failed': 0,
+            'max_queue_depth': 0,
+            'last_latency_ms': 0.0,
+            'max_latency_ms': 0.0,
+            'total_latency_ms': 0.0,
+        }
+        
+        # Finally, create directory structure and open the metadata index
         self._init_directory_structure()
+        self.index = MetadataIndex(self.base_path / "index.db")
+        self.uploader = uploader
+        if uploader is not None and uploader.on_uploaded is None:
+            uploader.on_uploaded = self._on_uploaded
+
+        # Byte accounting: one scan now, then incremental updates on every write/delete
+        self._usage_lock = threading.Lock()
+        self._used_bytes = self._scan_usage()
+        self._over_budget = False
+        self._evict_event = threading.Event()
+        self._closing = False
+        self._retention_thread = threading.Thread(target=self._retention_loop,
+                                                  name='storage-retention', daemon=True)
+        self._retention_thread.start()
+        self._request_eviction_if_needed()
+
+        if self.async_mode:
+            for i in range(max(1, workers)):
+                worker = threading.Thread(target=self._worker_loop,
+                                          name=f'storage-writer-{i}', daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    @property
+    def min_save_interval(self) -> float:
+        """Average seconds between saves of the same grid cell or track."""
+        return self.rate_limiter.interval
+
+    @min_save_interval.setter
+    def min_save_interval(self, value: float):
+        self.rate_limiter.interval = value
+
+    @property
+    def used_bytes(self) -> int:
+        """Bytes currently owned by this storage (images, clips and index)."""
+        return self._used_bytes
+
+    def add_usage(self, size_bytes: int):
+        """Account for bytes written (positive) or deleted (negative) under base_path."""
+        with self._usage_lock:
+            self._used_bytes = max(0, self._used_bytes + size_bytes)
+        if size_bytes > 0:
+            self._request_eviction_if_needed()
+
+    def register_clip(self, clip_id: str, path: Path, size_bytes: int):
+        """Account for an event clip written under base_path and queue it for upload."""
+        self.add_usage(size_bytes)
+        if self.uploader is not None:
+            self.uploader.enqueue('clip', clip_id, path, size_bytes,
+                                  key=self.uploader.object_key(path, self.base_path))
+
+    def _scan_usage(self) -> int:
+        """Sum the size of all regular files under base_path (startup only)."""
+        total = 0
+        for root, _, files in os.walk(self.base_path):
+            for name in files:
+                try:
+                    stat = os.lstat(os.path.join(root, name))
+                except OSError:
+                    continue
+                if not os.path.islink(os.path.join(root, name)):
+                    total += stat.st_size
+        self.logger.info(f"Storage usage at startup: {total / 1024 ** 2:.1f} MB "
+                         f"of {self.max_storage_bytes / 1024 ** 2:.0f} MB budget")
+        return total
 
     def _init_directory_structure(self):
         """Create the necessary directory structure."""
@@ -54,114 +184,472 @@ class ImageStorage:
             self.logger.error(f"Failed to initialize directory structure: {e}")
             raise
 
-    def generate_filename(self, object_id: str) -> Tuple[str, Path]:
+    def generate_filename(self, object_id: str, when: Optional[datetime] = None,
+                          camera: Optional[str] = None) -> Tuple[str, Path]:
         """Generate a unique filename for the image.
         
         Args:
             object_id: Identifier for the detected object
+            when: Capture time used for the name and date directory (default: now)
+            camera: Camera name; its captures go to a subdirectory of the same name
         
         Returns:
             tuple: (filename, full_path)
         """
-        timestamp = datetime.now().strftime("%H-%M-%S")
+        when = when or datetime.now()
+        timestamp = when.strftime("%H-%M-%S")
         filename = f"{timestamp}_object_{object_id}.jpg"
-        current_date = datetime.now().strftime("%Y-%m-%d")
-        full_path = self.images_path / current_date / filename
+        current_date = when.strftime("%Y-%m-%d")
+        root = self.images_path / camera if camera else self.images_path
+        full_path = root / current_date / filename
         return filename, full_path
 
-    def save_detected_object(self, frame: Any, bbox: Tuple[int, int, int, int]) -> bool:
+    def save_detected_object(self, frame: Any, bbox: Tuple[int, int, int, int],
+                             track_id: Optional[int] = None) -> bool:
         """Save a detected object and its metadata.
         
         Args:
             frame: Frame containing the detected object
             bbox: Bounding box tuple (x, y, w, h)
+            track_id: Tracker identifier; rate limiting is keyed by track instead of grid cell
         
         Returns:
             bool: True if save successful, False otherwise
         """
         try:
-            # Check rate limiting
-            current_time = datetime.now()
-            if self.last_save_timestamp is not None:
-                time_diff = (current_time - self.last_save_timestamp).total_seconds()
-                if time_diff < self.min_save_interval:
-                    self.logger.info(f"Skipping save: minimum interval ({self.min_save_interval}s) not reached. Only {time_diff:.1f}s elapsed.")
-                    return False
+            # Check rate limiting for this region or track
+            if not self.rate_limiter.allow(bbox, frame.shape, track_id):
+                key = self.rate_limiter.key_for(bbox, frame.shape, track_id)
+                self.logger.debug(f"Skipping save: rate limit reached for {key}")
+                return False
+
+            return self._save(frame, bbox, datetime.now(), track_id)
+
+        except Exception as e:
+            self.logger.error(f"Failed to save detected object: {e}")
+            return False
+
+    def save_track(self, track: Any, camera: Optional[str] = None) -> bool:
+        """Save the best frame of a finished track, rate limited per region (see save_capture).
+        
+        Args:
+            track: Track from ObjectTracker holding best_frame, best_bbox and best_timestamp
+            camera: Name of the camera that produced the track (multi-camera setups)
+        
+        Returns:
+            bool: True if the save was written or queued, False otherwise
+        """
+        if track.best_frame is None:
+            return False
+        label = getattr(track, 'label', None)
+        confidence = getattr(track, 'confidence', None) if label is not None else None
+        return self.save_capture(track.best_frame, track.best_bbox, datetime.fromtimestamp(track.best_timestamp),
+                                 track.track_id, label, confidence, camera)
+
+    def save_capture(self, frame: Any, bbox: Tuple[int, int, int, int], captured_at: datetime,
+                     track_id: Optional[int] = None, label: Optional[str] = None,
+                     confidence: Optional[float] = None, camera: Optional[str] = None) -> bool:
+        """Save an already selected capture, rate limited by the grid cell of its box.
+        
+        Used for finished tracks, including those reported by camera worker processes.
+        Every track ends only once, so the limiter is keyed by region (and camera), not by
+        track: an object that keeps re-appearing at the same spot, such as a stationary
+        false positive, is saved at most once per min_save_interval.
+        
+        Args:
+            frame: Frame containing the object
+            bbox: Bounding box tuple (x, y, w, h)
+            captured_at: Time the frame was captured
+            track_id: Tracker identifier of the object, if any
+            label: Classifier label of the object, if any
+            confidence: Classifier confidence of the label
+            camera: Camera name; selects the per-camera subdirectory and prefixes the object ID
+        
+        Returns:
+            bool: True if the save was written or queued, False otherwise
+        """
+        try:
+            if not self.rate_limiter.allow(bbox, frame.shape, camera=camera):
+                key = self.rate_limiter.key_for(bbox, frame.shape, camera=camera)
+                self.logger.debug(f"Skipping track {track_id}: rate limit reached for {key}")
+                return False
+            return self._save(frame, bbox, captured_at, track_id, label, confidence, camera)
+        except Exception as e:
+            self.logger.error(f"Failed to save track {track_id}: {e}")
+            return False
+
+    def _save(self, frame: Any, bbox: Tuple[int, int, int, int], captured_at: datetime,
+              track_id: Optional[int] = None, label: Optional[str] = None,
+              confidence: Optional[float] = None, camera: Optional[str] = None) -> bool:
+        """Check the storage budget, then write the capture inline or hand it to the writer pool."""
+        if not self._check_storage_space():
+            # Expected until eviction catches up: counted, and logged once per episode
+            self._count('over_budget')
+            if not self._over_budget:
+                self._over_budget = True
+                self.logger.warning("Storage budget exhausted, skipping saves until eviction frees space")
+            return False
+        self._over_budget = False
+
+        if not self.async_mode:
+            return self._write_capture(frame, bbox, captured_at, track_id=track_id,
+                                       label=label, confidence=confidence, camera=camera)
 
-            if not self._check_storage_space():
-                self.cleanup_old_files()
-                if not self._check_storage_space():
-                    raise RuntimeError("Insufficient storage space")
+        owned = self.copy_frames
+        if owned:
+            frame = self._copy_to_scratch(frame)
+        if not self._enqueue((frame, bbox, captured_at, time.monotonic(), owned, track_id, label, confidence,
+                              camera)):
+            if owned:
+                self._release_scratch(frame)
+            return False
+        return True
+
+    def _copy_to_scratch(self, frame: Any) -> Any:
+        """Copy a frame into a pooled buffer, allocating only when none fits."""
+        try:
+            scratch = self._scratch_pool.get_nowait()
+            if scratch.shape != frame.shape or scratch.dtype != frame.dtype:
+                scratch = np.empty_like(frame)
+        except queue.Empty:
+            scratch = np.empty_like(frame)
+        np.copyto(scratch, frame)
+        return scratch
 
+    def _release_scratch(self, scratch: Any):
+        """Return a buffer obtained from _copy_to_scratch to the pool."""
+        if self._scratch_pool.qsize() < self._scratch_limit:
+            self._scratch_pool.put_nowait(scratch)
+
+    def _write_capture(self, frame: Any, bbox: Tuple[int, int, int, int], captured_at: datetime,
+                       owned: bool = False, track_id: Optional[int] = None,
+                       label: Optional[str] = None, confidence: Optional[float] = None,
+                       camera: Optional[str] = None) -> bool:
+        """Annotate, encode and write a capture together with its metadata.
+        
+        Args:
+            frame: Frame containing the detected object
+            bbox: Bounding box tuple (x, y, w, h)
+            captured_at: Time the detection was accepted for saving
+            owned: The frame is a pooled scratch buffer that may be drawn on and released
+            track_id: Tracker identifier of the object, if any
+            label: Classifier label of the object, if any
+            confidence: Classifier confidence of the label
+            camera: Name of the camera that produced the frame, if any
+        
+        Returns:
+            bool: True if save successful, False otherwise
+        """
+        frame_with_box = frame if owned else self._copy_to_scratch(frame)
+        try:
             # Generate unique object ID using timestamp
-            object_id = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            object_id = captured_at.strftime("%Y%m%d_%H%M%S_%f")
+            if camera:
+                object_id = f"{camera}_{object_id}"
             
-            # Create metadata
             x, y, w, h = bbox
-            metadata = {
-                'object_id': object_id,
-                'timestamp': datetime.now().isoformat(),
-                'bbox': {
-                    'x': x,
-                    'y': y,
-                    'width': w,
-                    'height': h
-                },
-                'frame_size': {
-                    'width': frame.shape[1],
-                    'height': frame.shape[0]
-                }
-            }
 
             # Generate filename and paths
-            _, full_path = self.generate_filename(object_id)
+            _, full_path = self.generate_filename(object_id, captured_at, camera)
+            full_path.parent.mkdir(parents=True, exist_ok=True)
             
-            # Draw rectangle around detected object
-            frame_with_box = frame.copy()
+            # Draw rectangle around detected object on the scratch copy
             cv2.rectangle(frame_with_box, (x, y), (x + w, y + h), (0, 255, 0), 2)
             
             # Add timestamp to the image
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            timestamp = captured_at.strftime("%Y-%m-%d %H:%M:%S")
             cv2.putText(frame_with_box, timestamp, (10, 30), 
                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+            if label is not None:
+                cv2.putText(frame_with_box, f"{label} {confidence:.2f}", (x, max(15, y - 5)),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
             
             # Save the full frame with bounding box
-            cv2.imwrite(str(full_path), frame_with_box)
+            if not cv2.imwrite(str(full_path), frame_with_box):
+                raise IOError(f"cv2.imwrite failed for {full_path}")
 
-            # Save metadata
-            metadata_path = full_path.with_suffix('.json')
-            with open(metadata_path, 'w') as f:
-                json.dump(metadata, f, indent=2)
+            # Record metadata in the index and account for the new file
+            size_bytes = full_path.stat().st_size
+            self.index.add(object_id, captured_at, bbox, (frame.shape[1], frame.shape[0]),
+                           full_path, size_bytes, track_id, label, confidence, camera)
+            self.add_usage(size_bytes)
+            if self.uploader is not None:
+                # Confidently classified and larger detections are worth more and go first
+                priority = w * h / float(frame.shape[0] * frame.shape[1]) + (confidence or 0.0)
+                if self.thumbnail_width:
+                    self._write_thumbnail(frame_with_box, object_id, captured_at, priority, camera)
+                self.uploader.enqueue('image', object_id, full_path, size_bytes,
+                                      key=self.uploader.object_key(full_path, self.base_path),
+                                      priority=priority)
 
-            # Update last save timestamp after successful save
-            self.last_save_timestamp = current_time
             self.logger.info(f"Saved frame with detected object to {full_path}")
             return True
 
         except Exception as e:
             self.logger.error(f"Failed to save detected object: {e}")
             return False
+        finally:
+            self._release_scratch(frame_with_box)
+
+    def _write_thumbnail(self, frame: Any, object_id: str, captured_at: datetime, priority: float,
+                         camera: Optional[str] = None):
+        """Write a downscaled copy of an annotated capture and queue it for upload."""
+        height, width = frame.shape[:2]
+        scale = min(1.0, self.thumbnail_width / float(width))
+        thumbnail = cv2.resize(frame, (max(1, int(width * scale)), max(1, int(height * scale))),
+                               interpolation=cv2.INTER_AREA)
+        path = self._thumbnail_path(object_id, captured_at, camera)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if not cv2.imwrite(str(path), thumbnail, [cv2.IMWRITE_JPEG_QUALITY, 70]):
+            self.logger.warning(f"Could not write thumbnail {path}")
+            return
+        size_bytes = path.stat().st_size
+        self.add_usage(size_bytes)
+        # Thumbnails are identified by their path relative to base_path
+        self.uploader.enqueue('thumbnail', path.relative_to(self.base_path).as_posix(), path, size_bytes,
+                              key=self.uploader.object_key(path, self.base_path), priority=priority)
+
+    def _thumbnail_path(self, object_id: str, captured_at: datetime, camera: Optional[str] = None) -> Path:
+        root = self.thumbnails_path / camera if camera else self.thumbnails_path
+        return (root / captured_at.strftime("%Y-%m-%d")
+                / f"{captured_at.strftime('%H-%M-%S')}_thumb_{object_id}.jpg")
+
+    def _on_uploaded(self, kind: str, item_id: str):
+        """Upload callback: flag captures and clips as uploaded, drop uploaded thumbnails."""
+        if kind != 'thumbnail':
+            self.index.mark_uploaded(kind, item_id)
+            return
+        path = self.base_path / item_id
+        try:
+            self._delete_file(path, path.stat().st_size)
+        except OSError:
+            pass
+
+    def _enqueue(self, item: tuple) -> bool:
+        """Hand a capture to the writer pool according to the backpressure policy."""
+        try:
+            if self.backpressure == self.BACKPRESSURE_BLOCK:
+                self._queue.put(item)
+            elif self.backpressure == self.BACKPRESSURE_DROP_OLDEST:
+                while True:
+                    try:
+                        self._queue.put_nowait(item)
+                        break
+                    except queue.Full:
+                        try:
+                            evicted = self._queue.get_nowait()
+                            if evicted is not None and evicted[4]:
+                                self._release_scratch(evicted[0])
+                            self._queue.task_done()
+                            self._count('dropped')
+                        except queue.Empty:
+                            pass
+            else:
+                self._queue.put_nowait(item)
+        except queue.Full:
+            self._count('dropped')
+            self.logger.warning("Storage queue full, dropping capture")
+            return False
+
+        with self._stats_lock:
+            self._stats['enqueued'] += 1
+            self._stats['max_queue_depth'] = max(self._stats['max_queue_depth'], self._queue.qsize())
+        return True
+
+    def _worker_loop(self):
+        """Write queued captures until a shutdown sentinel is received."""
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                frame, bbox, captured_at, enqueued_at, owned, track_id, label, confidence, camera = item
+                saved = self._write_capture(frame, bbox, captured_at, owned, track_id, label, confidence,
+                                            camera)
+                latency_ms = (time.monotonic() - enqueued_at) * 1000.0
+                with self._stats_lock:
+                    self._stats['written' if saved else 'failed'] += 1
+                    self._stats['last_latency_ms'] = latency_ms
+                    self._stats['max_latency_ms'] = max(self._stats['max_latency_ms'], latency_ms)
+                    self._stats['total_latency_ms'] += latency_ms
+            finally:
+                self._queue.task_done()
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth, throughput and latency counters of the async writer."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        completed = stats['written'] + stats['failed']
+        stats['queue_depth'] = self._queue.qsize()
+        stats['avg_latency_ms'] = stats.pop('total_latency_ms') / completed if completed else 0.0
+        return stats
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until all queued captures have been written.
+        
+        Args:
+            timeout: Maximum time to wait in seconds (None waits forever)
+        
+        Returns:
+            bool: True if the queue drained, False on timeout
+        """
+        if not self._workers:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout: Optional[float] = None):
+        """Flush pending captures, stop the writer and retention threads and close the index."""
+        if self._workers:
+            if not self.flush(timeout):
+                self.logger.warning(f"Storage queue not drained on shutdown, {self._queue.qsize()} captures lost")
+            for _ in self._workers:
+                self._queue.put(None)
+            for worker in self._workers:
+                worker.join(timeout=1.0)
+            self._workers = []
+            self.logger.info(f"Storage writer stopped: {self.stats()}")
+        self._closing = True
+        self._evict_event.set()
+        self._retention_thread.join(timeout=5.0)
+        self.index.close()
 
     def _check_storage_space(self) -> bool:
-        """Check if there's enough storage space available."""
-        total, used, free = shutil.disk_usage(self.base_path)
-        return free > self.max_storage_bytes * 0.1  # Keep 10% buffer
+        """Check the running byte count against the storage budget (no filesystem access)."""
+        self._request_eviction_if_needed()
+        return self._used_bytes < self.max_storage_bytes
+
+    def _request_eviction_if_needed(self):
+        if self._used_bytes > self.max_storage_bytes * self.cleanup_threshold:
+            self._evict_event.set()
+
+    def _retention_loop(self):
+        """Evict captures in the background whenever usage crosses the cleanup threshold."""
+        while True:
+            self._evict_event.wait()
+            self._evict_event.clear()
+            if self._closing:
+                return
+            try:
+                self.enforce_budget()
+            except Exception as e:
+                self.logger.error(f"Storage eviction failed: {e}")
+
+    def enforce_budget(self, batch_size: int = 50) -> int:
+        """Delete captures until usage is below the cleanup threshold.
+        
+        Captures are evicted in retention_policy order, file by file; event clips are
+        evicted oldest first once no captures are left, and files unknown to the index
+        (e.g. from older versions) are removed oldest day first as a last resort.
+        
+        Returns:
+            int: Number of bytes freed
+        """
+        target = self.max_storage_bytes * self.cleanup_threshold
+        freed = 0
+        while self._used_bytes > target and not self._closing:
+            candidates = self.index.eviction_candidates(batch_size, self.retention_policy)
+            if candidates:
+                freed += self._evict_entries(candidates, 'object_id', self.index.delete_captures, target)
+                continue
+            clips = self.index.oldest_clips(batch_size)
+            if clips:
+                freed += self._evict_entries(clips, 'clip_id', self.index.delete_clips, target)
+                continue
+            released = self._evict_unindexed_file()
+            if not released:
+                self.logger.warning("Storage over budget but nothing left to evict")
+                break
+            freed += released
+        if freed:
+            self.logger.info(f"Evicted {freed / 1024 ** 2:.1f} MB, "
+                             f"usage now {self._used_bytes / 1024 ** 2:.1f} MB")
+        return freed
+
+    def _evict_entries(self, entries, id_key: str, delete_from_index, target: float) -> int:
+        """Delete the files of index entries until usage drops below target."""
+        freed = 0
+        removed = []
+        for entry in entries:
+            freed += self._delete_file(Path(entry['path']), entry['bytes'])
+            removed.append(entry[id_key])
+            if self._used_bytes <= target:
+                break
+        delete_from_index(removed)
+        return freed
+
+    def _delete_file(self, path: Path, size_bytes: int) -> int:
+        """Delete one file, update accounting and drop its directory once empty."""
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self.logger.warning(f"Could not delete {path}: {e}")
+            return 0
+        self.add_usage(-size_bytes)
+        try:
+            if path.parent.name != datetime.now().strftime("%Y-%m-%d"):
+                path.parent.rmdir()
+        except OSError:
+            pass
+        return size_bytes
+
+    def _evict_unindexed_file(self) -> int:
+        """Delete the oldest file in the oldest day directory, for files the index does not know."""
+        for root in (self.thumbnails_path, self.images_path, self.base_path / "clips"):
+            for date_dir in self._date_dirs(root):
+                files = sorted(f for f in date_dir.iterdir() if f.is_file())
+                if files:
+                    size_bytes = files[0].stat().st_size
+                    self._delete_file(files[0], size_bytes)
+                    # Report at least one byte so empty files still count as progress
+                    return 0 if files[0].exists() else max(size_bytes, 1)
+        return 0
+
+    @staticmethod
+    def _date_dirs(root: Path) -> List[Path]:
+        """Day directories under root, directly or inside per-camera subdirectories, oldest day first."""
+        def is_day(path: Path) -> bool:
+            try:
+                datetime.strptime(path.name, "%Y-%m-%d")
+            except ValueError:
+                return False
+            return path.is_dir() and not path.is_symlink()
+
+        if not root.is_dir():
+            return []
+        found = []
+        for entry in root.iterdir():
+            if is_day(entry):
+                found.append(entry)
+            elif entry.is_dir() and not entry.is_symlink():
+                found.extend(d for d in entry.iterdir() if is_day(d))
+        return sorted(found, key=lambda d: d.name)
 
     def cleanup_old_files(self, days_to_keep: int = 7) -> None:
         """Remove files older than specified days."""
         try:
             current_time = datetime.now()
-            for date_dir in self.images_path.iterdir():
-                if not date_dir.is_dir() or date_dir.name == "latest":
-                    continue
-                    
-                try:
+            for root in (self.images_path, self.thumbnails_path, self.base_path / "clips"):
+                for date_dir in self._date_dirs(root):
                     dir_date = datetime.strptime(date_dir.name, "%Y-%m-%d")
                     if (current_time - dir_date).days > days_to_keep:
+                        size_bytes = sum(f.stat().st_size for f in date_dir.rglob('*') if f.is_file())
                         shutil.rmtree(date_dir)
+                        self.add_usage(-size_bytes)
+                        self.index.delete_time_range(dir_date, dir_date + timedelta(days=1))
                         self.logger.info(f"Removed old directory: {date_dir}")
-                except ValueError:
-                    continue
 
         except Exception as e:
-            self.logger.error(f"Failed to cleanup old files: {e}") 
\ No newline at end of file
+            self.logger.error(f"Failed to cleanup old files: {e}")
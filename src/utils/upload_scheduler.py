@@ -0,0 +1,149 @@
+import threading
+import time
+import logging
+from datetime import datetime, time as dt_time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.utils.rate_limiter import TokenBucket
+
+
+def parse_time_window(spec: str) -> Tuple[dt_time, dt_time]:
+    """Parse a daily window such as '01:00-05:00'; the end may wrap past midnight."""
+    try:
+        start, end = (part.strip() for part in spec.split('-'))
+        return (datetime.strptime(start, "%H:%M").time(), datetime.strptime(end, "%H:%M").time())
+    except ValueError as e:
+        raise ValueError(f"Invalid time window '{spec}', expected HH:MM-HH:MM") from e
+
+
+class UploadScheduler:
+    """Upload policy for metered links, plugged into S3Uploader.
+
+    Instead of sending every file as soon as it is queued, uploads go out in windows
+    opened every ``upload_interval`` seconds; a window stays open until nothing eligible
+    is left. Within a window thumbnails go first, then the remaining files by priority
+    (detection size). Full images and clips can be held back until a daily off-peak
+    window, and the average transfer rate is capped with a byte token bucket shared by
+    all upload workers.
+    """
+
+    THUMBNAIL = 'thumbnail'
+
+    def __init__(self, upload_interval: float = 300.0, max_bytes_per_second: Optional[float] = None,
+                 offpeak_window: Optional[str] = None, deferred_kinds: Sequence[str] = ('image', 'clip')):
+        """
+        Initialize the scheduler.
+
+        Args:
+            upload_interval (float): Seconds between upload windows (0 uploads continuously)
+            max_bytes_per_second (float): Average upload rate cap (None for unlimited)
+            offpeak_window (str): Daily window such as '01:00-05:00' for bulk uploads;
+                outside it only thumbnails are sent (None sends everything in every window)
+            deferred_kinds (sequence): Upload kinds held back until the off-peak window
+        """
+        self.logger = logging.getLogger(__name__)
+        self.deferred_kinds = tuple(deferred_kinds)
+        self._lock = threading.Lock()
+        self._window_open = False
+        self._window_opened_at = 0.0
+        self._next_window = 0.0  # The first window opens immediately to drain any backlog
+        self._bandwidth: Optional[TokenBucket] = None
+        self.windows = 0
+        self.throttled_seconds = 0.0
+        self.configure(upload_interval, max_bytes_per_second, offpeak_window)
+
+    def configure(self, upload_interval: float, max_bytes_per_second: Optional[float] = None,
+                  offpeak_window: Optional[str] = None):
+        """Change the window interval, rate cap and off-peak window of a running scheduler."""
+        offpeak = parse_time_window(offpeak_window) if offpeak_window else None
+        with self._lock:
+            self.upload_interval = upload_interval
+            self.max_bytes_per_second = max_bytes_per_second
+            self.offpeak = offpeak
+            if not max_bytes_per_second:
+                self._bandwidth = None
+            elif self._bandwidth is None:
+                self._bandwidth = TokenBucket(max_bytes_per_second, max_bytes_per_second, time.monotonic())
+            else:
+                self._bandwidth.rate = self._bandwidth.burst = max_bytes_per_second
+            if not self._window_open:
+                self._next_window = min(self._next_window, self._window_opened_at + upload_interval)
+
+    def in_offpeak(self, now: Optional[datetime] = None) -> bool:
+        """True if bulk uploads may go out now (always true without an off-peak window)."""
+        if self.offpeak is None:
+            return True
+        current = (now or datetime.now()).time()
+        start, end = self.offpeak
+        if start <= end:
+            return start <= current < end
+        return current >= start or current < end
+
+    def next_items(self, queue: Any) -> List[Dict[str, Any]]:
+        """
+        Claim the next item to upload from an UploadQueue, or nothing outside a window.
+
+        Args:
+            queue: The uploader's UploadQueue
+
+        Returns:
+            list: At most one claimed item
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not self._window_open:
+                if now < self._next_window:
+                    return []
+                self._window_open = True
+                self._window_opened_at = now
+                self.windows += 1
+                self.logger.debug("Upload window opened")
+
+        items = queue.claim(1, kinds=(self.THUMBNAIL,))
+        if not items:
+            items = queue.claim(1, exclude_kinds=self._held_kinds())
+        if not items:
+            with self._lock:
+                if self._window_open:
+                    self._window_open = False
+                    self._next_window = self._window_opened_at + self.upload_interval
+                    self.logger.debug(f"Upload window closed after {now - self._window_opened_at:.1f}s")
+        return items
+
+    def _held_kinds(self) -> Tuple[str, ...]:
+        return () if self.in_offpeak() else self.deferred_kinds
+
+    def throttle(self, size_bytes: int, stop_event: threading.Event) -> bool:
+        """
+        Wait until sending size_bytes keeps the average rate under the cap.
+
+        The bucket is charged up front and may go into debt, so a file larger than one
+        second's allowance simply delays the uploads after it.
+
+        Returns:
+            bool: False if stop_event was set while waiting
+        """
+        with self._lock:
+            bucket = self._bandwidth
+            if bucket is None:
+                return True
+            bucket.refill(time.monotonic())
+            bucket.tokens -= size_bytes
+            delay = max(0.0, -bucket.tokens / bucket.rate)
+            self.throttled_seconds += delay
+        if delay <= 0:
+            return True
+        return not stop_event.wait(delay)
+
+    def stats(self, queue: Any) -> Dict[str, Any]:
+        """Window state and the number of queued items waiting for the off-peak window."""
+        held = self._held_kinds()
+        with self._lock:
+            stats = {
+                'window_open': self._window_open,
+                'windows': self.windows,
+                'next_window_in': 0.0 if self._window_open else max(0.0, self._next_window - time.monotonic()),
+                'throttled_seconds': self.throttled_seconds,
+            }
+        stats['deferred'] = queue.pending_count(held) if held else 0
+        return stats
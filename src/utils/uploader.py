@@ -0,0 +1,374 @@
+import random
+import sqlite3
+import threading
+import time
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+
+class UploadQueue:
+    """Crash-safe on-disk queue of files waiting for upload (SQLite, WAL mode).
+
+    Items survive restarts; anything left in the 'uploading' state by a crash is
+    returned to 'pending' when the queue is reopened.
+    """
+
+    PENDING = 'pending'
+    UPLOADING = 'uploading'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS uploads (
+            id            INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind          TEXT NOT NULL,
+            item_id       TEXT NOT NULL,
+            path          TEXT NOT NULL,
+            key           TEXT NOT NULL,
+            bytes         INTEGER NOT NULL,
+            priority      REAL NOT NULL DEFAULT 0,
+            status        TEXT NOT NULL,
+            attempts      INTEGER NOT NULL DEFAULT 0,
+            next_attempt  REAL NOT NULL,
+            created       REAL NOT NULL,
+            last_error    TEXT,
+            UNIQUE (kind, item_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_uploads_due ON uploads (status, next_attempt);
+    """
+
+    def __init__(self, db_path: Union[str, Path]):
+        """Open (or create) the queue database.
+
+        Args:
+            db_path: Location of the SQLite database file
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self._SCHEMA)
+        # Recover items claimed by a worker that never finished
+        self._conn.execute("UPDATE uploads SET status = ? WHERE status = ?", (self.PENDING, self.UPLOADING))
+        self._conn.commit()
+
+    def put(self, kind: str, item_id: str, path: Union[str, Path], key: str, size_bytes: int,
+            priority: float = 0.0) -> None:
+        """Add a file to the queue; re-adding the same item is a no-op."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO uploads (kind, item_id, path, key, bytes, priority, status, "
+                "next_attempt, created) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (kind, item_id, str(path), key, int(size_bytes), priority, self.PENDING, now, now))
+            self._conn.commit()
+
+    def claim(self, limit: int = 1, now: Optional[float] = None, kinds: Sequence[str] = (),
+              exclude_kinds: Sequence[str] = ()) -> List[Dict[str, Any]]:
+        """Atomically move up to `limit` due items to 'uploading' and return them, highest priority first.
+
+        Args:
+            limit (int): Maximum number of items
+            now (float): Epoch time used to decide which retries are due (default: now)
+            kinds (sequence): Only claim these kinds (empty for all)
+            exclude_kinds (sequence): Never claim these kinds
+        """
+        now = time.time() if now is None else now
+        clause, params = self._kind_filter(kinds, exclude_kinds)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM uploads WHERE status = ? AND next_attempt <= ?{clause} "
+                "ORDER BY priority DESC, created LIMIT ?", (self.PENDING, now, *params, limit)).fetchall()
+            self._conn.executemany("UPDATE uploads SET status = ? WHERE id = ?",
+                                   [(self.UPLOADING, row['id']) for row in rows])
+            self._conn.commit()
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    def _kind_filter(kinds: Sequence[str], exclude_kinds: Sequence[str]) -> Tuple[str, tuple]:
+        clause, params = "", ()
+        if kinds:
+            clause += f" AND kind IN ({', '.join('?' * len(kinds))})"
+            params += tuple(kinds)
+        if exclude_kinds:
+            clause += f" AND kind NOT IN ({', '.join('?' * len(exclude_kinds))})"
+            params += tuple(exclude_kinds)
+        return clause, params
+
+    def release(self, item_id: int) -> None:
+        """Return a claimed item to 'pending' without counting an attempt."""
+        with self._lock:
+            self._conn.execute("UPDATE uploads SET status = ? WHERE id = ?", (self.PENDING, item_id))
+            self._conn.commit()
+
+    def complete(self, item_id: int) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE uploads SET status = ?, last_error = NULL WHERE id = ?",
+                               (self.DONE, item_id))
+            self._conn.commit()
+
+    def fail(self, item_id: int, error: str, retry_at: Optional[float]) -> None:
+        """Record a failed attempt; retry_at None marks the item as permanently failed."""
+        status = self.FAILED if retry_at is None else self.PENDING
+        with self._lock:
+            self._conn.execute(
+                "UPDATE uploads SET status = ?, attempts = attempts + 1, next_attempt = ?, last_error = ? "
+                "WHERE id = ?", (status, retry_at or 0.0, error[:500], item_id))
+            self._conn.commit()
+
+    def counts(self) -> Dict[str, int]:
+        """Number of items per status."""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) AS n FROM uploads GROUP BY status").fetchall()
+        return {row['status']: row['n'] for row in rows}
+
+    def pending_count(self, kinds: Sequence[str] = ()) -> int:
+        """Number of items waiting for upload, optionally only of the given kinds."""
+        clause, params = self._kind_filter(kinds, ())
+        with self._lock:
+            row = self._conn.execute(f"SELECT COUNT(*) AS n FROM uploads WHERE status = ?{clause}",
+                                     (self.PENDING, *params)).fetchone()
+        return row['n']
+
+    def oldest_pending(self) -> Optional[float]:
+        """Creation time of the oldest item still waiting, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT MIN(created) AS t FROM uploads WHERE status IN (?, ?)",
+                                     (self.PENDING, self.UPLOADING)).fetchone()
+        return row['t']
+
+    def purge_done(self, older_than: float) -> int:
+        """Forget completed uploads created before the given epoch time."""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM uploads WHERE status = ? AND created < ?",
+                                        (self.DONE, older_than))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class S3Uploader:
+    """Background uploader from the persistent queue to S3 (or an S3-compatible endpoint).
+
+    Uploads run on a small worker pool sharing one boto3 client whose connection pool is
+    sized to the worker count. Large files (event clips) use concurrent multipart
+    transfers. Failures are retried with exponential backoff and jitter; successful
+    uploads are reported through ``on_uploaded`` so retention can delete them first.
+    """
+
+    def __init__(self, bucket: str, queue_path: Union[str, Path] = "storage/uploads.db",
+                 region: Optional[str] = None, prefix: str = "", endpoint_url: Optional[str] = None,
+                 workers: int = 2, poll_interval: float = 1.0, max_attempts: int = 10,
+                 base_backoff: float = 2.0, max_backoff: float = 900.0,
+                 multipart_threshold_mb: float = 8.0, multipart_concurrency: int = 4,
+                 on_uploaded: Optional[Callable[[str, str], None]] = None, client: Any = None,
+                 scheduler: Any = None, keep_done_hours: float = 24.0, purge_interval: float = 3600.0):
+        """
+        Initialize the uploader.
+
+        Args:
+            bucket (str): Destination bucket
+            queue_path: Location of the persistent upload queue database
+            region (str): AWS region
+            prefix (str): Key prefix prepended to every object key
+            endpoint_url (str): Custom S3 endpoint (e.g. a local MinIO/moto server for testing)
+            workers (int): Number of concurrent upload threads
+            poll_interval (float): Seconds between queue polls when idle
+            max_attempts (int): Attempts before an item is marked as failed
+            base_backoff (float): First retry delay in seconds, doubled per attempt
+            max_backoff (float): Upper bound of the retry delay in seconds
+            multipart_threshold_mb (float): Files above this size use multipart upload
+            multipart_concurrency (int): Parallel parts per multipart upload
+            on_uploaded: Callback (kind, item_id) invoked after a successful upload
+            client: Preconfigured boto3 S3 client (created from the other arguments if None)
+            scheduler: Optional UploadScheduler deciding when and at what rate items are sent
+                (default: upload everything as soon as it is queued)
+            keep_done_hours (float): Completed uploads are forgotten after this many hours
+            purge_interval (float): Seconds between purges of completed uploads
+        """
+        self.logger = logging.getLogger(__name__)
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.on_uploaded = on_uploaded
+        self.queue = UploadQueue(queue_path)
+        self.scheduler = scheduler
+        self.keep_done_hours = keep_done_hours
+        self.purge_interval = purge_interval
+        self._next_purge = 0.0
+
+        self.multipart_threshold = int(multipart_threshold_mb * 1024 * 1024)
+        self.multipart_concurrency = multipart_concurrency
+        if client is None:
+            try:
+                import boto3
+                from botocore.config import Config
+            except ImportError as e:
+                raise ImportError("S3 uploads require boto3 (pip install boto3)") from e
+            config = Config(max_pool_connections=self.workers * max(1, multipart_concurrency),
+                            retries={'max_attempts': 1})
+            client = boto3.client('s3', region_name=region, endpoint_url=endpoint_url, config=config)
+        self.client = client
+        self._transfer_config = None
+
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._stats_lock = threading.Lock()
+        self._stats = {'uploaded': 0, 'uploaded_bytes': 0, 'failed_attempts': 0}
+
+    def object_key(self, path: Union[str, Path], base_path: Union[str, Path]) -> str:
+        """Object key for a file: its path relative to the storage base path, under the prefix."""
+        try:
+            relative = Path(path).relative_to(base_path).as_posix()
+        except ValueError:
+            relative = Path(path).name
+        return f"{self.prefix}/{relative}" if self.prefix else relative
+
+    def enqueue(self, kind: str, item_id: str, path: Union[str, Path], size_bytes: int,
+                key: Optional[str] = None, priority: float = 0.0) -> None:
+        """
+        Persist a file for upload; returns immediately.
+
+        Args:
+            kind (str): 'image', 'thumbnail' or 'clip'
+            item_id (str): object_id (images and thumbnails) or clip_id in the metadata index
+            path: Local file path
+            size_bytes (int): File size
+            key (str): Object key (default: file name under the prefix)
+            priority (float): Higher values are uploaded first
+        """
+        if key is None:
+            key = f"{self.prefix}/{Path(path).name}" if self.prefix else Path(path).name
+        self.queue.put(kind, item_id, path, key, size_bytes, priority)
+        self._wake_event.set()
+
+    def start(self):
+        """Start the upload worker threads."""
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, name=f's3-uploader-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self.logger.info(f"S3 uploader started ({self.workers} workers, bucket {self.bucket})")
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the workers; items in flight finish or are retried after the next start."""
+        self._stop_event.set()
+        self._wake_event.set()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        if self._threads:
+            # A worker still mid-upload records its result in the queue, so keep it open;
+            # the item is reclaimed from 'uploading' when the queue is reopened
+            self.logger.warning(f"{len(self._threads)} upload workers still busy, leaving the queue open")
+            return
+        self.queue.close()
+
+    def _next_items(self) -> List[Dict[str, Any]]:
+        """Items this worker should upload next, as decided by the scheduler if there is one."""
+        if self.scheduler is not None:
+            return self.scheduler.next_items(self.queue)
+        return self.queue.claim(1)
+
+    def _purge_if_due(self):
+        """Drop completed uploads past keep_done_hours so the queue database stays small."""
+        now = time.monotonic()
+        with self._stats_lock:
+            if now < self._next_purge:
+                return
+            self._next_purge = now + self.purge_interval
+        purged = self.queue.purge_done(time.time() - self.keep_done_hours * 3600.0)
+        if purged:
+            self.logger.info(f"Purged {purged} completed uploads from the queue")
+
+    def _worker_loop(self):
+        while not self._stop_event.is_set():
+            self._purge_if_due()
+            items = self._next_items()
+            if not items:
+                self._wake_event.wait(self.poll_interval)
+                self._wake_event.clear()
+                continue
+            for item in items:
+                if self._stop_event.is_set():
+                    self.queue.release(item['id'])
+                    continue
+                self._upload(item)
+
+    @property
+    def transfer_config(self) -> Any:
+        """boto3 TransferConfig for the multipart settings (None if boto3 is not installed)."""
+        if self._transfer_config is None:
+            try:
+                from boto3.s3.transfer import TransferConfig
+            except ImportError:
+                # An injected client that is not boto3's has no use for it
+                return None
+            self._transfer_config = TransferConfig(multipart_threshold=self.multipart_threshold,
+                                                   max_concurrency=self.multipart_concurrency,
+                                                   use_threads=True)
+        return self._transfer_config
+
+    def _upload(self, item: Dict[str, Any]) -> bool:
+        path = Path(item['path'])
+        if not path.exists():
+            # Evicted locally before it could be uploaded; nothing left to send
+            self.queue.fail(item['id'], "file no longer exists", None)
+            self.logger.warning(f"Dropping upload of missing file {path}")
+            return False
+        if self.scheduler is not None and not self.scheduler.throttle(item['bytes'], self._stop_event):
+            # Shutting down while waiting for bandwidth; send it after the next start
+            self.queue.release(item['id'])
+            return False
+        try:
+            self.client.upload_file(str(path), self.bucket, item['key'], Config=self.transfer_config)
+        except Exception as e:
+            attempts = item['attempts'] + 1
+            retry_at = None
+            if attempts < self.max_attempts:
+                delay = min(self.max_backoff, self.base_backoff * 2 ** (attempts - 1))
+                retry_at = time.time() + delay * random.uniform(0.5, 1.0)
+            self.queue.fail(item['id'], str(e), retry_at)
+            with self._stats_lock:
+                self._stats['failed_attempts'] += 1
+            self.logger.warning(f"Upload of {path} failed (attempt {attempts}): {e}")
+            return False
+
+        self.queue.complete(item['id'])
+        with self._stats_lock:
+            self._stats['uploaded'] += 1
+            self._stats['uploaded_bytes'] += item['bytes']
+        if self.on_uploaded is not None:
+            try:
+                self.on_uploaded(item['kind'], item['item_id'])
+            except Exception as e:
+                self.logger.error(f"Upload callback failed for {path}: {e}")
+        self.logger.info(f"Uploaded {path} to s3://{self.bucket}/{item['key']}")
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Upload counters and queue state."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        counts = self.queue.counts()
+        oldest = self.queue.oldest_pending()
+        stats.update({
+            'pending': counts.get(UploadQueue.PENDING, 0) + counts.get(UploadQueue.UPLOADING, 0),
+            'failed': counts.get(UploadQueue.FAILED, 0),
+            'backlog_age_seconds': time.time() - oldest if oldest else 0.0,
+        })
+        if self.scheduler is not None:
+            stats.update(self.scheduler.stats(self.queue))
+        return stats
@@ -0,0 +1,123 @@
+import sys
+import logging
+import tracemalloc
+import unittest
+
+import cv2
+import numpy as np
+
+from src.camera.camera_handler import CameraHandler
+from src.camera.frame_buffer import FrameRingBuffer
+from src.camera.frame_source import SyntheticSource
+from src.camera.object_detector import ObjectDetector
+from src.camera.roi import RegionOfInterest
+
+WIDTH, HEIGHT = 640, 480
+# Room for Python objects (box lists, contour arrays, lock waiters), far below any image:
+# a 320x200 grayscale copy is 64 KB, a full 640x480 BGR frame 900 KB
+TOLERANCE = 12 * 1024
+
+
+def moving_blob_frames(count):
+    rng = np.random.default_rng(0)
+    background = rng.integers(40, 80, size=(HEIGHT, WIDTH, 3), dtype=np.uint8)
+    frames = []
+    for i in range(count):
+        frame = background.copy()
+        for k in range(3):
+            cv2.circle(frame, (40 + 12 * i + 150 * k, 100 + 120 * k), 20, (230, 230, 230), -1)
+        frames.append(frame)
+    return frames
+
+
+@unittest.skipIf(sys.version_info < (3, 9), "tracemalloc.reset_peak() needs Python 3.9")
+class SteadyStateAllocationTest(unittest.TestCase):
+    """After warm-up, the capture and detection loop reuses its buffers instead of allocating."""
+
+    def setUp(self):
+        logging.disable(logging.INFO)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def trace(self, step, frames):
+        """
+        Run step() once per frame under tracemalloc.
+
+        Returns:
+            tuple: (largest peak of a single step above the memory live before it,
+                memory still held after all steps)
+        """
+        # A running maximum: collecting per-step results would itself allocate
+        peak = 0
+        tracemalloc.start()
+        try:
+            start = tracemalloc.get_traced_memory()[0]
+            for _ in range(frames):
+                tracemalloc.reset_peak()
+                baseline = tracemalloc.get_traced_memory()[0]
+                step()
+                peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+            retained = tracemalloc.get_traced_memory()[0] - start
+        finally:
+            tracemalloc.stop()
+        return peak, retained
+
+    def assert_steady(self, step, frames):
+        peak, retained = self.trace(step, frames)
+        self.assertLess(peak, TOLERANCE)
+        self.assertLess(retained, TOLERANCE)
+
+    def assert_detector_steady(self, warmup=10, frames=20, **kwargs):
+        detector = ObjectDetector(min_area=100, render=False, **kwargs)
+        # Frames are generated up front so that only detection is traced
+        sequence = iter(moving_blob_frames(warmup + frames))
+        for _ in range(warmup):
+            detector.detect_objects(next(sequence))
+        detections = [0]
+
+        def step():
+            detections[0] += len(detector.detect_objects(next(sequence))[0])
+
+        self.assert_steady(step, frames)
+        self.assertGreater(detections[0], 0)
+
+    def test_contours(self):
+        self.assert_detector_steady()
+
+    def test_components(self):
+        self.assert_detector_steady(extraction='components')
+
+    def test_scaled(self):
+        self.assert_detector_steady(detection_scale=0.5)
+
+    def test_roi(self):
+        roi = RegionOfInterest(exclude=[[[0, 0], [200, 0], [0, 200]]])
+        self.assert_detector_steady(roi=roi)
+
+    def test_frame_difference(self):
+        self.assert_detector_steady(background_model='frame_difference')
+
+    def test_capture_and_detect_loop(self):
+        # The capture thread reads into the ring's slots while the consumer detects on them
+        source = SyntheticSource((WIDTH, HEIGHT), realtime=False, max_frames=1000)
+        camera = CameraHandler(source=source, buffer_size=4, drop_policy=FrameRingBuffer.BLOCK)
+        detector = ObjectDetector(min_area=100, render=False)
+        self.assertTrue(camera.initialize())
+        camera.start_capture()
+        try:
+            def step():
+                success, frame = camera.next(timeout=1.0)
+                self.assertTrue(success)
+                detector.detect_objects(frame)
+
+            for _ in range(50):
+                step()
+            self.assert_steady(step, 500)
+        finally:
+            camera.release()
+        self.assertEqual(camera.stats()['dropped'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import sys
+import logging
+import unittest
+
+from src.camera.camera_handler import CameraHandler
+from src.camera.frame_source import SyntheticSource
+
+
+@unittest.skipIf(sys.version_info < (3, 8), "the capture process needs Python 3.8")
+class CaptureProcessEndTest(unittest.TestCase):
+    """The consumer side of the capture process at the end of a source and after a crash."""
+
+    def setUp(self):
+        logging.disable(logging.INFO)
+        self.camera = None
+
+    def tearDown(self):
+        if self.camera is not None:
+            self.camera.stop_capture()
+        logging.disable(logging.NOTSET)
+
+    def start(self, frames):
+        source = SyntheticSource((64, 48), max_frames=frames, realtime=False)
+        self.camera = CameraHandler(source=source, capture_process=True, buffer_size=2)
+        self.assertTrue(self.camera.initialize())
+        return self.camera
+
+    def test_newest_after_producer_exits(self):
+        camera = self.start(frames=5)
+        camera._process.join(timeout=10.0)
+        self.assertFalse(camera._process.is_alive())
+
+        # Handles, ('finished',) and the closed pipe are all waiting
+        success, frame = camera.next(timeout=1.0, newest=True)
+        self.assertTrue(success)
+        self.assertEqual(frame.shape, (48, 64, 3))
+        self.assertTrue(camera.finished)
+        self.assertEqual(camera.next(timeout=1.0, newest=True), (False, None))
+        self.assertEqual(camera.latest(), (False, None))
+
+    def test_crash_raises(self):
+        camera = self.start(frames=None)
+        self.assertTrue(camera.next(timeout=5.0)[0])
+        camera._process.kill()
+        camera._process.join(timeout=5.0)
+
+        # Draining the handles sent before the crash runs into the closed pipe
+        with self.assertRaises(RuntimeError):
+            camera.next(timeout=1.0, newest=True)
+        self.assertFalse(camera.finished)
+
+
+if __name__ == '__main__':
+    unittest.main()
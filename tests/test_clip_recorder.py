@@ -0,0 +1,63 @@
+import logging
+import tempfile
+import unittest
+
+import cv2
+import numpy as np
+
+from src.utils.clip_recorder import EventClipRecorder
+
+
+def clip_duration(path):
+    capture = cv2.VideoCapture(str(path))
+    try:
+        frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = capture.get(cv2.CAP_PROP_FPS)
+    finally:
+        capture.release()
+    return frames / fps
+
+
+class ClipDurationTest(unittest.TestCase):
+    """Clips keep wall-clock time when frames arrive slower than the clip frame rate."""
+
+    def setUp(self):
+        logging.disable(logging.INFO)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.saved = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        logging.disable(logging.NOTSET)
+
+    def record(self, input_fps, seconds, trigger_at):
+        """Feed frames at input_fps with explicit timestamps; returns the clip's playback duration."""
+        self.saved.clear()
+        self.recorder = EventClipRecorder(self.tmp.name, pre_roll=4.0, post_roll=4.0, fps=10.0,
+                                          on_saved=lambda clip_id, path, size: self.saved.append(path))
+        frame = np.zeros((120, 160, 3), np.uint8)
+        start = 1_800_000_000.0
+        for i in range(int(seconds * input_fps)):
+            timestamp = start + i / input_fps
+            cv2.putText(frame, str(i), (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+            if i == int(trigger_at * input_fps):
+                self.recorder.trigger((10, 10, 20, 20), timestamp=timestamp)
+            self.recorder.add_frame(frame, timestamp=timestamp)
+        self.recorder.close()
+        self.assertEqual(len(self.saved), 1)
+        return clip_duration(self.saved[0])
+
+    def test_slow_input_plays_in_real_time(self):
+        # Quiet-period rate: 4 s pre-roll, trigger, 4 s post-roll
+        for input_fps in (2.0, 5.0):
+            with self.subTest(input_fps=input_fps):
+                duration = self.record(input_fps, seconds=10.0, trigger_at=4.0)
+                self.assertAlmostEqual(duration, 8.0, delta=0.6)
+
+    def test_fast_input_is_subsampled(self):
+        duration = self.record(30.0, seconds=10.0, trigger_at=4.0)
+        self.assertAlmostEqual(duration, 8.0, delta=0.3)
+
+
+if __name__ == '__main__':
+    unittest.main()
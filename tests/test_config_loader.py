@@ -0,0 +1,19 @@
+import unittest
+
+from src.utils.config_loader import AppConfig, ConfigError
+
+
+class ConfigParsingTest(unittest.TestCase):
+    def test_zones(self):
+        zone = [[0, 0], [10, 0], [0, 10]]
+        config = AppConfig.from_dict({'detection': {'include_zones': [], 'exclude_zones': [zone]}})
+        self.assertEqual(config.detection.include_zones, [])
+        self.assertEqual(config.detection.exclude_zones, [zone])
+
+    def test_zones_must_be_a_list(self):
+        with self.assertRaises(ConfigError):
+            AppConfig.from_dict({'detection': {'exclude_zones': "0,0 10,0 0,10"}})
+
+
+if __name__ == '__main__':
+    unittest.main()
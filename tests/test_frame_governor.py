@@ -0,0 +1,73 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.camera.skip_policy import AdaptiveSkipPolicy
+from src.utils.frame_governor import FrameRateGovernor, find_cpu_thermal_zone
+
+
+class ThermalZoneTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def add_zone(self, index, kind, millidegrees):
+        zone = self.root / f'thermal_zone{index}'
+        zone.mkdir()
+        (zone / 'type').write_text(f"{kind}\n")
+        (zone / 'temp').write_text(f"{millidegrees}\n")
+
+    def test_jetson_nano_picks_cpu_zone(self):
+        # Zone order on the Jetson Nano
+        for index, kind in enumerate(('AO-therm', 'CPU-therm', 'GPU-therm', 'PLL-therm', 'PMIC-Die')):
+            self.add_zone(index, kind, 40000 + index * 1000)
+        self.assertEqual(find_cpu_thermal_zone(self.root), self.root / 'thermal_zone1' / 'temp')
+
+        governor = FrameRateGovernor(thermal_zone=find_cpu_thermal_zone(self.root))
+        self.assertEqual(governor._read_temperature(), 41.0)
+
+    def test_falls_back_to_zone0(self):
+        self.add_zone(0, 'soc-thermal', 50000)
+        self.assertEqual(find_cpu_thermal_zone(self.root), self.root / 'thermal_zone0' / 'temp')
+        self.assertEqual(find_cpu_thermal_zone(self.root / 'missing'), self.root / 'missing' / 'thermal_zone0' / 'temp')
+
+    def test_hot_cpu_zone_throttles(self):
+        self.add_zone(0, 'AO-therm', 30000)
+        self.add_zone(1, 'CPU-therm', 85000)
+        governor = FrameRateGovernor(max_temperature=80.0, thermal_zone=find_cpu_thermal_zone(self.root))
+        governor.pace(False, 0.001)
+        self.assertEqual(governor.temperature, 85.0)
+        self.assertEqual(governor.duty, 0.5)
+
+
+class CaptureRateTest(unittest.TestCase):
+    def test_decode_cap_keeps_the_average_rate(self):
+        for limit in (2.0, 15.0, 20.0):
+            policy = AdaptiveSkipPolicy(idle_fps=0.0, max_load=0.0)
+            policy.max_fps = limit
+            # Ten seconds of a 30 fps camera
+            decoded = sum(policy.decide(i / 30.0) for i in range(300))
+            self.assertAlmostEqual(decoded / 10.0, limit, delta=0.2)
+
+    def test_no_cap_decodes_everything(self):
+        policy = AdaptiveSkipPolicy(idle_fps=0.0, max_load=0.0)
+        self.assertTrue(all(policy.decide(i / 30.0) for i in range(30)))
+
+    def test_capture_fps_follows_limits(self):
+        governor = FrameRateGovernor(max_temperature=0.0)
+        self.assertFalse(governor.limited)
+        self.assertEqual(governor.capture_fps, 0.0)
+        governor.target_fps = 15.0
+        self.assertTrue(governor.limited)
+        self.assertEqual(governor.capture_fps, 15.0)
+        # Throttled to half duty with 0.05 s per frame: 10 fps at most
+        governor.pace(False, 0.05)
+        governor.duty = 0.5
+        self.assertEqual(governor.capture_fps, 10.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import logging
+import tempfile
+import unittest
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from src.camera.frame_source import ImageDirectorySource
+
+
+class ImageDirectorySourceTest(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.ERROR)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        logging.disable(logging.NOTSET)
+
+    def test_looping_over_unreadable_images_ends(self):
+        for name in ('a.jpg', 'b.jpg'):
+            (self.path / name).write_bytes(b"not an image")
+        source = ImageDirectorySource(self.path, realtime=False, loop=True)
+        self.assertTrue(source.open())
+
+        self.assertEqual(source.read(), (False, None))
+        self.assertTrue(source.exhausted)
+
+    def test_unreadable_images_are_skipped(self):
+        (self.path / 'a.jpg').write_bytes(b"not an image")
+        cv2.imwrite(str(self.path / 'b.jpg'), np.zeros((8, 8, 3), np.uint8))
+        source = ImageDirectorySource(self.path, realtime=False, loop=True)
+        self.assertTrue(source.open())
+
+        for _ in range(3):
+            success, frame = source.read()
+            self.assertTrue(success)
+            self.assertEqual(frame.shape, (8, 8, 3))
+        self.assertFalse(source.exhausted)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+
+import cv2
+import numpy as np
+
+from src.camera.illumination import IlluminationChangeDetector
+from src.camera.object_detector import ObjectDetector
+from src.camera.pipeline import apply_detection_settings
+from src.camera.roi import RegionOfInterest
+from src.utils.config_loader import DetectionConfig
+
+WIDTH, HEIGHT = 320, 240
+
+
+def ir_switch_frames(count=60, switch_at=30):
+    """Textured day scene with a moving blob; at switch_at the IR night mode turns on."""
+    rng = np.random.default_rng(0)
+    day = rng.integers(40, 120, size=(HEIGHT, WIDTH), dtype=np.uint8)
+    day = cv2.GaussianBlur(day, (5, 5), 0)
+    # IR night mode: brighter and with different contrast over the whole frame
+    night = cv2.convertScaleAbs(day, alpha=1.6, beta=50)
+    for i in range(count):
+        gray = (night if i >= switch_at else day).copy()
+        cv2.circle(gray, (20 + 4 * i, HEIGHT // 2), 12, 255, -1)
+        yield i, cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+
+
+def is_full_frame(box):
+    return box[2] * box[3] >= 0.5 * WIDTH * HEIGHT
+
+
+class IlluminationChangeTest(unittest.TestCase):
+    def run_detector(self, illumination):
+        detector = ObjectDetector(min_area=100, illumination=illumination, render=False)
+        full_frame = 0
+        resumed_at = None
+        for i, frame in ir_switch_frames():
+            boxes, _ = detector.detect_objects(frame)
+            full_frame += sum(1 for box in boxes if is_full_frame(box))
+            if i > 30 and resumed_at is None and boxes and not any(is_full_frame(box) for box in boxes):
+                resumed_at = i
+        return detector, full_frame, resumed_at
+
+    def test_ir_switch_without_guard_reports_full_frame_boxes(self):
+        _, full_frame, _ = self.run_detector(None)
+        self.assertGreater(full_frame, 0)
+
+    def test_ir_switch_is_suppressed(self):
+        detector, full_frame, resumed_at = self.run_detector(IlluminationChangeDetector())
+        self.assertEqual(full_frame, 0)
+        self.assertEqual(detector.illumination_changes, 1)
+        self.assertGreater(detector.illumination_suppressed_frames, 0)
+        # The moving blob is detected again once the background has re-adapted
+        self.assertIsNotNone(resumed_at)
+        self.assertFalse(detector.background_model.fast_adaptation)
+
+    def test_change_fraction_counts_only_watched_pixels(self):
+        # Excluding the centre leaves a border of a quarter of the frame; the brightness
+        # guard is disabled so that only the changed fraction can flag the IR switch
+        roi = RegionOfInterest(exclude=[[[20, 20], [WIDTH - 20, 20], [WIDTH - 20, HEIGHT - 20], [20, HEIGHT - 20]]])
+        detector = ObjectDetector(min_area=100, roi=roi, render=False,
+                                  illumination=IlluminationChangeDetector(brightness_jump=1000.0))
+        for _, frame in ir_switch_frames():
+            detector.detect_objects(frame)
+        self.assertEqual(detector.illumination_changes, 1)
+
+    def test_counters_survive_reload(self):
+        detector, _, _ = self.run_detector(IlluminationChangeDetector())
+        changes, suppressed = detector.illumination_changes, detector.illumination_suppressed_frames
+
+        apply_detection_settings(DetectionConfig(illumination_change_fraction=0.0), detector)
+        self.assertIsNone(detector.illumination)
+        apply_detection_settings(DetectionConfig(), detector)
+        self.assertIsNotNone(detector.illumination)
+
+        self.assertEqual(detector.illumination_changes, changes)
+        self.assertEqual(detector.illumination_suppressed_frames, suppressed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src.utils.uploader import S3Uploader, UploadQueue
+
+try:
+    import boto3
+    from moto import mock_aws
+except ImportError:
+    mock_aws = None
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+class FailingClient:
+    """S3 client stand-in whose uploads always fail."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def upload_file(self, *args, **kwargs):
+        self.calls += 1
+        raise ConnectionError("endpoint unreachable")
+
+
+class UploaderTestBase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = Path(self.tmp.name)
+        self.uploader = None
+
+    def tearDown(self):
+        if self.uploader is not None:
+            self.uploader.stop()
+        self.tmp.cleanup()
+
+    def write_file(self, name, size=1024):
+        path = self.base / "images" / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(os.urandom(size))
+        return path
+
+
+@unittest.skipIf(mock_aws is None, "moto is not installed")
+class S3UploaderMotoTest(UploaderTestBase):
+    """Uploads against moto's in-process S3."""
+
+    def setUp(self):
+        super().setUp()
+        env = mock.patch.dict(os.environ, {'AWS_ACCESS_KEY_ID': 'testing', 'AWS_SECRET_ACCESS_KEY': 'testing',
+                                           'AWS_DEFAULT_REGION': 'us-east-1'})
+        env.start()
+        self.addCleanup(env.stop)
+        self.aws = mock_aws()
+        self.aws.start()
+        self.addCleanup(self.aws.stop)
+        self.s3 = boto3.client('s3', region_name='us-east-1')
+        self.s3.create_bucket(Bucket='animals')
+
+    def test_uploads_queued_files_and_reports_them(self):
+        uploaded = []
+        self.uploader = S3Uploader('animals', self.base / "uploads.db", region='us-east-1', prefix='site',
+                                   poll_interval=0.05, on_uploaded=lambda kind, item: uploaded.append((kind, item)))
+        path = self.write_file("a.jpg")
+        key = self.uploader.object_key(path, self.base)
+        self.uploader.start()
+        self.uploader.enqueue('image', 'a', path, path.stat().st_size, key=key)
+
+        self.assertTrue(wait_for(lambda: uploaded))
+        self.assertEqual(uploaded, [('image', 'a')])
+        self.assertEqual(key, 'site/images/a.jpg')
+        body = self.s3.get_object(Bucket='animals', Key=key)['Body'].read()
+        self.assertEqual(body, path.read_bytes())
+        self.assertEqual(self.uploader.stats()['uploaded'], 1)
+
+    def test_multipart_upload_of_large_file(self):
+        self.uploader = S3Uploader('animals', self.base / "uploads.db", region='us-east-1',
+                                   poll_interval=0.05, multipart_threshold_mb=5.0)
+        path = self.write_file("clip.mp4", size=11 * 1024 * 1024)
+        self.uploader.start()
+        self.uploader.enqueue('clip', 'c', path, path.stat().st_size, key='clip.mp4')
+
+        self.assertTrue(wait_for(lambda: self.uploader.stats()['uploaded'] == 1, timeout=20.0))
+        head = self.s3.head_object(Bucket='animals', Key='clip.mp4')
+        self.assertEqual(head['ContentLength'], path.stat().st_size)
+
+    def test_queue_survives_restart(self):
+        path = self.write_file("b.jpg")
+        self.uploader = S3Uploader('animals', self.base / "uploads.db", region='us-east-1')
+        self.uploader.enqueue('image', 'b', path, path.stat().st_size, key='b.jpg')
+        self.uploader.stop()
+
+        self.uploader = S3Uploader('animals', self.base / "uploads.db", region='us-east-1', poll_interval=0.05)
+        self.uploader.start()
+        self.assertTrue(wait_for(lambda: self.uploader.stats()['uploaded'] == 1))
+        self.assertEqual(self.s3.get_object(Bucket='animals', Key='b.jpg')['Body'].read(), path.read_bytes())
+
+
+class S3UploaderRetryTest(UploaderTestBase):
+    """Failure handling with an injected client."""
+
+    def test_failed_uploads_are_retried_then_given_up(self):
+        client = FailingClient()
+        self.uploader = S3Uploader('animals', self.base / "uploads.db", client=client, poll_interval=0.02,
+                                   max_attempts=3, base_backoff=0.01, max_backoff=0.01)
+        path = self.write_file("a.jpg")
+        self.uploader.start()
+        self.uploader.enqueue('image', 'a', path, path.stat().st_size)
+
+        self.assertTrue(wait_for(lambda: self.uploader.stats()['failed'] == 1))
+        self.assertEqual(client.calls, 3)
+        self.assertEqual(self.uploader.stats()['failed_attempts'], 3)
+
+    def test_missing_file_is_dropped(self):
+        client = FailingClient()
+        self.uploader = S3Uploader('animals', self.base / "uploads.db", client=client, poll_interval=0.02)
+        self.uploader.start()
+        self.uploader.enqueue('image', 'gone', self.base / "gone.jpg", 10)
+
+        self.assertTrue(wait_for(lambda: self.uploader.stats()['failed'] == 1))
+        self.assertEqual(client.calls, 0)
+
+    def test_completed_uploads_are_purged(self):
+        queue = UploadQueue(self.base / "uploads.db")
+        queue.put('image', 'a', self.base / "a.jpg", 'a.jpg', 10)
+        item = queue.claim(1)[0]
+        queue.complete(item['id'])
+        self.assertEqual(queue.purge_done(time.time() - 3600), 0)
+        self.assertEqual(queue.purge_done(time.time() + 1), 1)
+        self.assertEqual(queue.counts(), {})
+        queue.close()
+
+
+if __name__ == '__main__':
+    unittest.main()